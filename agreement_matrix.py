@@ -0,0 +1,86 @@
+from typing import Iterable
+
+import numpy as np
+
+from models import NationalParty
+from vote_matrix import ABSENT, VOTE_CODES, VoteMatrix, majority_votes
+
+# a block of votes times ~800 MEPs stays in the low megabytes, while the matrix products stay large enough to be fast
+AGREEMENT_BLOCK_ROWS = 1024
+
+
+class AgreementMatrix:
+    labels: list[str]
+    agreements: np.ndarray
+    overlaps: np.ndarray
+
+    def __init__(self, labels: list[str], agreements: np.ndarray, overlaps: np.ndarray):
+        self.labels = labels
+        self.agreements = agreements
+        self.overlaps = overlaps
+
+    def agreement_rates(self) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.agreements / self.overlaps * 100
+
+
+def pairwise_agreement(codes: np.ndarray, block_rows=AGREEMENT_BLOCK_ROWS) -> tuple[np.ndarray, np.ndarray]:
+    column_count = codes.shape[1]
+    agreements = np.zeros((column_count, column_count), dtype=np.int64)
+    overlaps = np.zeros((column_count, column_count), dtype=np.int64)
+    for first_row in range(0, codes.shape[0], block_rows):
+        block = codes[first_row:first_row + block_rows]
+        # float32 products are exact, since a block never counts more than block_rows votes
+        voted = (block != ABSENT).astype(np.float32)
+        overlaps += (voted.T @ voted).astype(np.int64)
+        for code in VOTE_CODES.values():
+            same_vote = (block == code).astype(np.float32)
+            agreements += (same_vote.T @ same_vote).astype(np.int64)
+    return agreements, overlaps
+
+
+def party_majority_codes(vote_matrix: VoteMatrix, national_parties: list[NationalParty]) -> np.ndarray:
+    codes = np.full((len(vote_matrix.days), len(national_parties)), ABSENT, dtype=np.int8)
+    for column, national_party in enumerate(national_parties):
+        member_columns_by_roster = {}
+        for day, rows in vote_matrix.rows_by_day.items():
+            national_party_mep_ids = national_party.members.get_member_ids_at(day)
+            if national_party_mep_ids not in member_columns_by_roster:
+                member_columns_by_roster[national_party_mep_ids] = vote_matrix.columns_of(national_party_mep_ids)
+            # majority_votes indexes VOTES and marks a missing majority with -1, vote codes count from 1 with 0 as absent
+            codes[rows, column] = majority_votes(vote_matrix.tallies(member_columns_by_roster[national_party_mep_ids], rows)) + 1
+    return codes
+
+
+def party_agreement_matrix(vote_matrix: VoteMatrix, national_parties: Iterable[NationalParty], block_rows=AGREEMENT_BLOCK_ROWS) -> AgreementMatrix:
+    national_parties = list(national_parties)
+    agreements, overlaps = pairwise_agreement(party_majority_codes(vote_matrix, national_parties), block_rows)
+    return AgreementMatrix([f"{national_party.name} ({national_party.country})" for national_party in national_parties], agreements, overlaps)
+
+
+def mep_agreement_matrix(vote_matrix: VoteMatrix, block_rows=AGREEMENT_BLOCK_ROWS) -> AgreementMatrix:
+    agreements, overlaps = pairwise_agreement(vote_matrix.votes, block_rows)
+    return AgreementMatrix(list(vote_matrix.mep_ids), agreements, overlaps)
+
+
+def _compact(counts: np.ndarray) -> np.ndarray:
+    return counts.astype(np.min_scalar_type(int(counts.max()) if counts.size else 0))
+
+
+def save_agreement_matrix(agreement_matrix: AgreementMatrix, file_uri: str):
+    with open(file_uri, "wb") as agreement_matrix_file:
+        np.savez_compressed(
+            agreement_matrix_file,
+            labels=np.array(agreement_matrix.labels, dtype=str),
+            agreements=_compact(agreement_matrix.agreements),
+            overlaps=_compact(agreement_matrix.overlaps),
+        )
+
+
+def load_agreement_matrix(file_uri: str) -> AgreementMatrix:
+    with np.load(file_uri) as agreement_matrix_file:
+        return AgreementMatrix(
+            agreement_matrix_file["labels"].tolist(),
+            agreement_matrix_file["agreements"].astype(np.int64),
+            agreement_matrix_file["overlaps"].astype(np.int64),
+        )
@@ -0,0 +1,41 @@
+from argparse import ArgumentParser
+from os import listdir
+from os.path import join
+from time import perf_counter
+import tracemalloc
+
+from loader.mep_history_parser import MEP_HISTORY_PARSERS
+
+
+def load_corpus(folder: str) -> list[str]:
+    corpus = []
+    for filename in sorted(listdir(folder)):
+        if filename.endswith(".html"):
+            with open(join(folder, filename), "rb") as page_file:
+                corpus.append(page_file.read().decode("utf-8"))
+    return corpus
+
+
+def benchmark_parser(parser_name: str, corpus: list[str]) -> tuple[float, int]:
+    extract_status_lists = MEP_HISTORY_PARSERS[parser_name]
+    started_at = perf_counter()
+    for page_content in corpus:
+        extract_status_lists(page_content)
+    elapsed = perf_counter() - started_at
+    tracemalloc.start()
+    for page_content in corpus:
+        extract_status_lists(page_content)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(corpus) / elapsed, peak_memory
+
+
+if __name__ == "__main__":
+    argument_parser = ArgumentParser(description="Compare MEP history page parsers over saved pages")
+    argument_parser.add_argument("folder", nargs="?", default="html", help="folder of saved history pages (default: html)")
+    arguments = argument_parser.parse_args()
+    corpus = load_corpus(arguments.folder)
+    print(f"{len(corpus)} pages from {arguments.folder}")
+    for parser_name in MEP_HISTORY_PARSERS:
+        pages_per_second, peak_memory = benchmark_parser(parser_name, corpus)
+        print(f"{parser_name:>8}: {pages_per_second:10.1f} pages/s, peak {peak_memory / 1024:10.1f} KiB")
@@ -0,0 +1,74 @@
+from argparse import ArgumentParser
+from datetime import date, timedelta
+import pickle
+from random import Random
+from sys import intern
+from time import perf_counter
+import tracemalloc
+
+from models import MEP, Membership, NationalParty, Period
+
+
+def create_membership_graph(mep_count: int, party_count: int, seed=0) -> list[NationalParty]:
+    random = Random(seed)
+    national_parties = [NationalParty(f"Party {index}", f"Country {index % 27}") for index in range(party_count)]
+    for index in range(mep_count):
+        # ids are built at runtime like the ones parsed from the MEP lists, so they start out uninterned
+        mep = MEP(str(100000 + index), f"Member {index}", f"Country {index % 27}")
+        start_date = date(2019, 7, 2)
+        for _ in range(random.randint(1, 4)):
+            end_date = start_date + timedelta(days=random.randint(30, 900))
+            random.choice(national_parties).members.add(Membership(mep, Period(start_date, end_date)))
+            start_date = end_date + timedelta(days=1)
+    return national_parties
+
+
+def measure_graph_memory(mep_count: int, party_count: int) -> int:
+    tracemalloc.start()
+    national_parties = create_membership_graph(mep_count, party_count)
+    allocated_memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del national_parties
+    return allocated_memory
+
+
+def measure_hot_paths(national_parties: list[NationalParty], repeat: int) -> tuple[float, float, float]:
+    meps = [membership.member for national_party in national_parties for membership in national_party.members]
+    mep_set = set(meps)
+    started_at = perf_counter()
+    for _ in range(repeat):
+        for mep in meps:
+            mep in mep_set
+    hashing_elapsed = perf_counter() - started_at
+    started_at = perf_counter()
+    for _ in range(repeat):
+        for national_party in national_parties:
+            national_party.members._reset_index()
+            national_party.members.get_member_ids_at(date(2021, 3, 18))
+    index_elapsed = perf_counter() - started_at
+    member_ids_of_parties = [national_party.members.get_member_ids_at(date(2021, 3, 18)) for national_party in national_parties]
+    # ballot ids arrive as separate string objects from the XML attributes and are interned by the roll call loader
+    ballot_ids = [intern("".join(mep.id)) for mep in meps]
+    started_at = perf_counter()
+    for _ in range(repeat):
+        for ballot_id, member_ids in zip(ballot_ids, member_ids_of_parties * (len(ballot_ids) // len(member_ids_of_parties) + 1)):
+            ballot_id in member_ids
+    lookup_elapsed = perf_counter() - started_at
+    return hashing_elapsed, index_elapsed, lookup_elapsed
+
+
+if __name__ == "__main__":
+    argument_parser = ArgumentParser(description="Measure memory and hot paths of the membership graph")
+    argument_parser.add_argument("--meps", type=int, default=20000)
+    argument_parser.add_argument("--parties", type=int, default=400)
+    argument_parser.add_argument("--repeat", type=int, default=5)
+    arguments = argument_parser.parse_args()
+    national_parties = create_membership_graph(arguments.meps, arguments.parties)
+    membership_count = sum(1 for national_party in national_parties for _ in national_party.members)
+    print(f"{arguments.meps} MEPs, {arguments.parties} parties, {membership_count} memberships")
+    print(f"graph memory: {measure_graph_memory(arguments.meps, arguments.parties) / 1024 / 1024:10.2f} MiB")
+    print(f" pickle size: {len(pickle.dumps(national_parties)) / 1024 / 1024:10.2f} MiB")
+    hashing_elapsed, index_elapsed, lookup_elapsed = measure_hot_paths(national_parties, arguments.repeat)
+    print(f"MEP set lookups: {hashing_elapsed * 1000:10.1f} ms")
+    print(f" roster rebuild: {index_elapsed * 1000:10.1f} ms")
+    print(f" id set lookups: {lookup_elapsed * 1000:10.1f} ms")
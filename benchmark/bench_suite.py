@@ -0,0 +1,196 @@
+from argparse import ArgumentParser
+from datetime import datetime
+import json
+import logging
+from os import chdir, getcwd
+from os.path import exists
+import platform
+from shutil import rmtree
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Optional
+
+import numpy as np
+
+from benchmark.synthetic_data import SyntheticMembershipGraph, create_synthetic_membership_graph, synthetic_sitting_days, write_synthetic_roll_call_votes
+from loader.roll_call_loader import ROLL_CALL_CACHE_FOLDER, clear_roll_call_caches, load_roll_call_votes, parse_roll_call_votes, tally_political_groups_of
+from loader.voting_data_loader import VOTING_DATA_FOLDER
+from logger import create_logger
+from main import compare_roll_call_votes, compare_voting_cohesion_of_parties_on_days_vectorized, compare_voting_cohesion_with_ep_groups, find_group_ids_of_party
+from models import VotingCohesionComparison
+
+BENCHMARK_RESULTS_VERSION = 1
+# a benchmark slower than its baseline by more than this share is reported as a regression
+DEFAULT_TOLERANCE = 0.3
+
+
+class BenchmarkResult:
+    name: str
+    seconds: float
+    items: int
+    unit: str
+
+    def __init__(self, name: str, seconds: float, items: int, unit: str):
+        self.name = name
+        self.seconds = seconds
+        self.items = items
+        self.unit = unit
+
+    def to_dict(self) -> dict:
+        return {"seconds": self.seconds, "items": self.items, "unit": self.unit, "items_per_second": self.items / self.seconds if self.seconds else None}
+
+
+def best_of(repeat: int, run: Callable[[], int], prepare: Callable[[], None] = lambda: None) -> tuple[float, int]:
+    # the fastest repetition is the least disturbed by the rest of the machine
+    timings = []
+    items = 0
+    for _ in range(repeat):
+        prepare()
+        started_at = perf_counter()
+        items = run()
+        timings.append(perf_counter() - started_at)
+    return min(timings), items
+
+
+def reset_roll_call_caches(keep_pickles=True):
+    clear_roll_call_caches()
+    if not keep_pickles and exists(ROLL_CALL_CACHE_FOLDER):
+        rmtree(ROLL_CALL_CACHE_FOLDER)
+
+
+def benchmark_parsing(sitting_days, repeat: int) -> BenchmarkResult:
+    def parse() -> int:
+        return sum(len(parse_roll_call_votes(f"{VOTING_DATA_FOLDER}/{sitting_day}.xml")) for sitting_day in sitting_days)
+    seconds, items = best_of(repeat, parse)
+    return BenchmarkResult("parsing", seconds, items, "votes")
+
+
+def benchmark_membership_lookup(membership_graph: SyntheticMembershipGraph, sitting_days, repeat: int) -> BenchmarkResult:
+    def reset_indexes():
+        for memberships in [national_party.members for national_party in membership_graph.national_parties] + [political_group.members for political_group in membership_graph.political_groups]:
+            memberships._reset_index()
+
+    def look_up() -> int:
+        lookups = 0
+        for sitting_day in sitting_days:
+            for national_party in membership_graph.national_parties:
+                if national_party.members.get_member_ids_at(sitting_day):
+                    find_group_ids_of_party(sitting_day, membership_graph.political_groups, national_party)
+                lookups += 1
+        return lookups
+    seconds, items = best_of(repeat, look_up, reset_indexes)
+    return BenchmarkResult("membership_lookup", seconds, items, "party days")
+
+
+def benchmark_counting(membership_graph: SyntheticMembershipGraph, pairings: dict[str, str], sitting_days, repeat: int) -> list[BenchmarkResult]:
+    logger = logging.getLogger()
+    roll_call_votes_by_day = {sitting_day: load_roll_call_votes(sitting_day, logger, True) for sitting_day in sitting_days}
+    group_tallies_by_day = {sitting_day: [tally_political_groups_of(roll_call_vote) for roll_call_vote in roll_call_votes] for sitting_day, roll_call_votes in roll_call_votes_by_day.items()}
+    vote_count = sum(len(roll_call_votes) for roll_call_votes in roll_call_votes_by_day.values())
+
+    def count() -> int:
+        comparisons = {national_party: VotingCohesionComparison() for national_party in membership_graph.national_parties}
+        for sitting_day, roll_call_votes in roll_call_votes_by_day.items():
+            for vote_comparison in compare_roll_call_votes(sitting_day, roll_call_votes, group_tallies_by_day[sitting_day], membership_graph.national_parties, membership_graph.political_groups, pairings, logger):
+                comparisons[vote_comparison.national_party].add(vote_comparison)
+        return vote_count
+
+    def count_vectorized() -> int:
+        compare_voting_cohesion_of_parties_on_days_vectorized(sitting_days, membership_graph.national_parties, membership_graph.political_groups, pairings, logger, True)
+        return vote_count
+
+    seconds, _ = best_of(repeat, count)
+    vectorized_seconds, _ = best_of(repeat, count_vectorized)
+    # every vote is compared for all parties at once, the throughput is per vote
+    return [BenchmarkResult("counting", seconds, vote_count, "votes"), BenchmarkResult("counting_vectorized", vectorized_seconds, vote_count, "votes")]
+
+
+def benchmark_end_to_end(membership_graph: SyntheticMembershipGraph, pairings: dict[str, str], sitting_days, repeat: int) -> list[BenchmarkResult]:
+    # the party with the most memberships gives the largest rosters to count
+    national_party = max(membership_graph.national_parties, key=lambda national_party: sum(1 for _ in national_party.members))
+    vote_count = sum(len(load_roll_call_votes(sitting_day, logging.getLogger(), True)) for sitting_day in sitting_days)
+
+    def compare() -> int:
+        compare_voting_cohesion_with_ep_groups(national_party, membership_graph.political_groups, pairings, sitting_days[0], sitting_days[-1], True)
+        return vote_count
+
+    cold_seconds, _ = best_of(repeat, compare, lambda: reset_roll_call_caches(keep_pickles=False))
+    warm_seconds, _ = best_of(repeat, compare, reset_roll_call_caches)
+    return [BenchmarkResult("end_to_end_cold", cold_seconds, vote_count, "votes"), BenchmarkResult("end_to_end_warm", warm_seconds, vote_count, "votes")]
+
+
+def run_benchmarks(days: int, votes_per_day: int, meps: int, parties: int, repeat: int, seed: int) -> dict:
+    parameters = {"days": days, "votes_per_day": votes_per_day, "meps": meps, "parties": parties, "repeat": repeat, "seed": seed}
+    working_directory = getcwd()
+    with TemporaryDirectory() as temporary_directory:
+        # the loaders work relative to the working directory, so the synthetic term gets a directory of its own
+        chdir(temporary_directory)
+        try:
+            reset_roll_call_caches()
+            sitting_days = synthetic_sitting_days(days)
+            membership_graph = create_synthetic_membership_graph(meps, parties, sitting_days, seed=seed)
+            pairings = write_synthetic_roll_call_votes(sitting_days, votes_per_day, membership_graph, seed=seed)
+            results = [benchmark_parsing(sitting_days, repeat), benchmark_membership_lookup(membership_graph, sitting_days, repeat)]
+            results += benchmark_counting(membership_graph, pairings, sitting_days, repeat)
+            results += benchmark_end_to_end(membership_graph, pairings, sitting_days, repeat)
+        finally:
+            reset_roll_call_caches()
+            chdir(working_directory)
+    return {
+        "version": BENCHMARK_RESULTS_VERSION,
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform()},
+        "parameters": parameters,
+        "results": {result.name: result.to_dict() for result in results},
+    }
+
+
+def compare_with_baseline(benchmark_results: dict, baseline: dict, tolerance=DEFAULT_TOLERANCE) -> list[str]:
+    if benchmark_results["parameters"] != baseline["parameters"]:
+        return [f"parameters differ from the baseline: {baseline['parameters']}"]
+    regressions = []
+    for name, result in benchmark_results["results"].items():
+        baseline_result = baseline["results"].get(name)
+        if baseline_result is not None and result["seconds"] > baseline_result["seconds"] * (1 + tolerance):
+            regressions.append(f"{name}: {result['seconds']:.3f} s against {baseline_result['seconds']:.3f} s in the baseline")
+    return regressions
+
+
+def format_results(benchmark_results: dict, baseline: Optional[dict] = None) -> str:
+    lines = [", ".join(f"{name} {value}" for name, value in benchmark_results["parameters"].items())]
+    for name, result in benchmark_results["results"].items():
+        line = f"{name:>20}: {result['seconds']:10.3f} s {result['items_per_second'] or 0:14.0f} {result['unit']}/s"
+        if baseline is not None and name in baseline["results"]:
+            line += f" {result['seconds'] / baseline['results'][name]['seconds']:8.2f}x baseline"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    argument_parser = ArgumentParser(description="Benchmark parsing, membership lookup, counting and whole comparisons over a synthetic term, offline")
+    argument_parser.add_argument("--days", type=int, default=12)
+    argument_parser.add_argument("--votes-per-day", type=int, default=100)
+    argument_parser.add_argument("--meps", type=int, default=705)
+    argument_parser.add_argument("--parties", type=int, default=200)
+    argument_parser.add_argument("--repeat", type=int, default=3)
+    argument_parser.add_argument("--seed", type=int, default=0)
+    argument_parser.add_argument("--output", help="write the results as JSON to this file")
+    argument_parser.add_argument("--baseline", help="compare with results written earlier by --output, and fail on regressions")
+    argument_parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    arguments = argument_parser.parse_args()
+    create_logger("quiet")
+    baseline = None
+    if arguments.baseline is not None:
+        with open(arguments.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    benchmark_results = run_benchmarks(arguments.days, arguments.votes_per_day, arguments.meps, arguments.parties, arguments.repeat, arguments.seed)
+    print(format_results(benchmark_results, baseline))
+    if arguments.output is not None:
+        with open(arguments.output, "w", encoding="utf-8") as output_file:
+            json.dump(benchmark_results, output_file, indent=2)
+    if baseline is not None:
+        regressions = compare_with_baseline(benchmark_results, baseline, arguments.tolerance)
+        for regression in regressions:
+            print(f"regression: {regression}")
+        if regressions:
+            raise SystemExit(1)
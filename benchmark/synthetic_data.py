@@ -0,0 +1,120 @@
+from datetime import date, timedelta
+from os import makedirs
+from os.path import exists
+from random import Random
+from xml.sax.saxutils import escape, unescape
+
+from const import VOTES
+from loader.voting_data_loader import VOTING_DATA_FOLDER
+from models import MEP, EUPoliticalGroup, Membership, NationalParty, Period
+
+FIRST_SYNTHETIC_SITTING_DAY = date(2019, 7, 15)
+# plenary weeks sit from Monday to Thursday, roughly every other week
+SITTING_WEEKDAYS = (0, 1, 2, 3)
+SITTING_WEEK_INTERVAL = 2
+ABSENCE_RATE = 0.1
+# ballots without a PersId are matched through the MepId - PersId pairings, like older minutes
+MISSING_PERS_ID_RATE = 0.05
+PARTY_DISCIPLINE = 0.9
+GROUP_DISCIPLINE = 0.8
+
+
+class SyntheticMembershipGraph:
+    meps: list[MEP]
+    national_parties: list[NationalParty]
+    political_groups: list[EUPoliticalGroup]
+    group_ids_of_parties: dict[NationalParty, str]
+
+    def __init__(self, meps: list[MEP], national_parties: list[NationalParty], political_groups: list[EUPoliticalGroup], group_ids_of_parties: dict[NationalParty, str]):
+        self.meps = meps
+        self.national_parties = national_parties
+        self.political_groups = political_groups
+        self.group_ids_of_parties = group_ids_of_parties
+
+
+def synthetic_sitting_days(day_count: int, first_day=FIRST_SYNTHETIC_SITTING_DAY) -> list[date]:
+    first_monday = first_day - timedelta(days=first_day.weekday())
+    return [
+        first_monday + timedelta(weeks=week * SITTING_WEEK_INTERVAL, days=weekday)
+        for week in range(day_count // len(SITTING_WEEKDAYS) + 1)
+        for weekday in SITTING_WEEKDAYS
+    ][:day_count]
+
+
+def create_synthetic_membership_graph(mep_count: int, party_count: int, sitting_days: list[date], country_count=27, seed=0) -> SyntheticMembershipGraph:
+    random = Random(seed)
+    political_groups = [EUPoliticalGroup(name, ids) for name, ids in EUPoliticalGroup.id_name_pairings.items()]
+    national_parties = [NationalParty(f"Party {index}", f"Country {index % country_count}") for index in range(party_count)]
+    # a party sits in one group for the whole term, so find_group_ids_of_party always finds exactly one
+    group_of_parties = {national_party: political_groups[index % len(political_groups)] for index, national_party in enumerate(national_parties)}
+    parties_of_countries = {}
+    for national_party in national_parties:
+        parties_of_countries.setdefault(national_party.country, []).append(national_party)
+    first_day, last_day = sitting_days[0], sitting_days[-1]
+    meps = []
+    for index in range(mep_count):
+        country = f"Country {index % country_count}"
+        mep = MEP(str(100000 + index), f"Member {index}", country)
+        meps.append(mep)
+        start_date = first_day
+        # most MEPs stay in one party, some switch once or twice during the term
+        stint_count = random.choice((1, 1, 1, 2, 3))
+        for stint in range(stint_count):
+            end_date = None if stint == stint_count - 1 else start_date + timedelta(days=random.randint(60, 1200))
+            if end_date is not None and end_date >= last_day:
+                end_date = None
+            national_party = random.choice(parties_of_countries.get(country, national_parties))
+            national_party.members.add(Membership(mep, Period(start_date, end_date)))
+            group_of_parties[national_party].members.add(Membership(mep, Period(start_date, end_date)))
+            if end_date is None:
+                break
+            start_date = end_date + timedelta(days=1)
+    return SyntheticMembershipGraph(
+        meps,
+        national_parties,
+        political_groups,
+        # the minutes carry the unescaped identifier, the first id of a group is the one they use
+        {national_party: unescape(political_group.ids[0]) for national_party, political_group in group_of_parties.items()},
+    )
+
+
+def synthetic_roll_call_xml(sitting_day: date, vote_count: int, membership_graph: SyntheticMembershipGraph, random: Random) -> str:
+    voters = [
+        (mep, national_party, membership_graph.group_ids_of_parties[national_party])
+        for national_party in membership_graph.national_parties
+        for mep in national_party.members.get_members_at(sitting_day)
+    ]
+    parts = [f'<?xml version="1.0" encoding="UTF-8"?>\n<PV.RollCallVoteResults Sitting.Date="{sitting_day}">\n']
+    for vote_index in range(vote_count):
+        group_lines = {group_id: random.choice(VOTES) for group_id in membership_graph.group_ids_of_parties.values()}
+        party_lines = {
+            national_party: group_lines[group_id] if random.random() < GROUP_DISCIPLINE else random.choice(VOTES)
+            for national_party, group_id in membership_graph.group_ids_of_parties.items()
+        }
+        ballots = {vote: {} for vote in VOTES}
+        for mep, national_party, group_id in voters:
+            if random.random() < ABSENCE_RATE:
+                continue
+            vote = party_lines[national_party] if random.random() < PARTY_DISCIPLINE else random.choice(VOTES)
+            pers_id = "" if random.random() < MISSING_PERS_ID_RATE else f' PersId="{mep.id}"'
+            ballots[vote].setdefault(group_id, []).append(f'<PoliticalGroup.Member.Name MepId="{int(mep.id) - 90000}"{pers_id}>{escape(mep.name)}</PoliticalGroup.Member.Name>')
+        parts.append(f'<RollCallVote.Result Identifier="{sitting_day:%Y%m%d}{vote_index:04d}" Date="{sitting_day} 12:00:00">')
+        parts.append(f'<RollCallVote.Description.Text>A9-{vote_index:04d}/{sitting_day.year} - Synthetic report {vote_index}</RollCallVote.Description.Text>')
+        for vote, ballots_of_groups in ballots.items():
+            parts.append(f'<Result.{vote} Number="{sum(len(group_ballots) for group_ballots in ballots_of_groups.values())}">')
+            for group_id, group_ballots in ballots_of_groups.items():
+                parts.append(f'<Result.PoliticalGroup.List Identifier="{escape(group_id)}">{"".join(group_ballots)}</Result.PoliticalGroup.List>')
+            parts.append(f'</Result.{vote}>')
+        parts.append('</RollCallVote.Result>\n')
+    parts.append('</PV.RollCallVoteResults>\n')
+    return "".join(parts)
+
+
+def write_synthetic_roll_call_votes(sitting_days: list[date], vote_count: int, membership_graph: SyntheticMembershipGraph, folder=VOTING_DATA_FOLDER, seed=0) -> dict[str, str]:
+    random = Random(seed)
+    if not exists(folder):
+        makedirs(folder)
+    for sitting_day in sitting_days:
+        with open(f"{folder}/{sitting_day}.xml", "w", encoding="utf-8") as xml_file:
+            xml_file.write(synthetic_roll_call_xml(sitting_day, vote_count, membership_graph, random))
+    return {str(int(mep.id) - 90000): mep.id for mep in membership_graph.meps}
@@ -0,0 +1,100 @@
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Callable, NamedTuple, Optional, Union
+
+import numpy as np
+
+from models import VotingCohesionComparison
+
+BUCKETS: dict[str, Callable[[date], date]] = {
+    "week": lambda day: day - timedelta(days=day.weekday()),
+    "month": lambda day: day.replace(day=1),
+    "quarter": lambda day: day.replace(month=(day.month - 1) // 3 * 3 + 1, day=1),
+    "year": lambda day: day.replace(month=1, day=1),
+}
+
+
+class CohesionSummary(NamedTuple):
+    start_date: date
+    end_date: date
+    voting_count: int
+    average_cohesion: Optional[float]
+    non_coherent_voting_count: int
+    agreement_percentages: dict[str, float]
+
+
+class CohesionSeries:
+    days: list[date]
+    political_group_names: list[str]
+    cohesion_sums: np.ndarray
+    voting_counts: np.ndarray
+    non_coherent_voting_counts: np.ndarray
+    same_counts: np.ndarray
+    different_counts: np.ndarray
+
+    def __init__(self, days: list[date], political_group_names: list[str], cohesion_sums: np.ndarray, voting_counts: np.ndarray, non_coherent_voting_counts: np.ndarray, same_counts: np.ndarray, different_counts: np.ndarray):
+        # every array holds running totals with a leading zero, so any range of sitting days is one subtraction
+        self.days = days
+        self.political_group_names = political_group_names
+        self.cohesion_sums = cohesion_sums
+        self.voting_counts = voting_counts
+        self.non_coherent_voting_counts = non_coherent_voting_counts
+        self.same_counts = same_counts
+        self.different_counts = different_counts
+
+    def summary_between(self, start_date: date, end_date: date) -> CohesionSummary:
+        first, last = bisect_left(self.days, start_date), bisect_right(self.days, end_date)
+        voting_count = int(self.voting_counts[last] - self.voting_counts[first])
+        same_counts = self.same_counts[last] - self.same_counts[first]
+        compared_counts = same_counts + self.different_counts[last] - self.different_counts[first]
+        return CohesionSummary(
+            start_date,
+            end_date,
+            voting_count,
+            float(self.cohesion_sums[last] - self.cohesion_sums[first]) / voting_count if voting_count else None,
+            int(self.non_coherent_voting_counts[last] - self.non_coherent_voting_counts[first]),
+            {
+                political_group_name: float(same_count) / int(compared_count) * 100
+                for political_group_name, same_count, compared_count in zip(self.political_group_names, same_counts, compared_counts)
+                if compared_count > 0
+            },
+        )
+
+    def bucketed(self, bucket: Union[str, Callable[[date], date]] = "month") -> list[CohesionSummary]:
+        bucket_start_of = BUCKETS[bucket] if isinstance(bucket, str) else bucket
+        bucket_starts = sorted({bucket_start_of(day) for day in self.days})
+        # a bucket ends where the next one starts, the last one at the last sitting day
+        bucket_ends = ([next_bucket_start - timedelta(days=1) for next_bucket_start in bucket_starts[1:]] + [self.days[-1]]) if bucket_starts else []
+        return [self.summary_between(bucket_start, bucket_end) for bucket_start, bucket_end in zip(bucket_starts, bucket_ends)]
+
+    def rolling(self, window: timedelta) -> list[CohesionSummary]:
+        return [self.summary_between(day - window + timedelta(days=1), day) for day in self.days]
+
+
+def create_cohesion_series(comparisons_by_day: dict[date, VotingCohesionComparison]) -> CohesionSeries:
+    days = sorted(comparisons_by_day)
+    political_group_names = sorted({political_group_name for comparison in comparisons_by_day.values() for political_group_name in comparison.political_group_voting_comparisons})
+    cohesion_sums = np.zeros(len(days) + 1)
+    voting_counts = np.zeros(len(days) + 1, dtype=np.int64)
+    non_coherent_voting_counts = np.zeros(len(days) + 1, dtype=np.int64)
+    same_counts = np.zeros((len(days) + 1, len(political_group_names)), dtype=np.int64)
+    different_counts = np.zeros((len(days) + 1, len(political_group_names)), dtype=np.int64)
+    for index, day in enumerate(days, start=1):
+        comparison = comparisons_by_day[day]
+        cohesion_sums[index] = sum(comparison.national_party_voting_cohesion_per_voting)
+        voting_counts[index] = len(comparison.national_party_voting_cohesion_per_voting)
+        non_coherent_voting_counts[index] = len(comparison.non_coherent_votings)
+        for column, political_group_name in enumerate(political_group_names):
+            comparison_counter = comparison.political_group_voting_comparisons.get(political_group_name)
+            if comparison_counter is not None:
+                same_counts[index, column] = comparison_counter['same']
+                different_counts[index, column] = comparison_counter['different']
+    return CohesionSeries(
+        days,
+        political_group_names,
+        np.cumsum(cohesion_sums),
+        np.cumsum(voting_counts),
+        np.cumsum(non_coherent_voting_counts),
+        np.cumsum(same_counts, axis=0),
+        np.cumsum(different_counts, axis=0),
+    )
@@ -18,3 +18,13 @@ MSZP_NAME = 'Magyar Szocialista Párt'
 MOMENTUM_NAME = 'Momentum'
 JOBBIK_NAME = 'Jobbik Magyarországért Mozgalom'
 JOBBIK_CONSEVATIVES_NAME = 'Jobbik – Konzervatívok'
+TRACKED_PARTY_NAMES = [
+    FIDESZ_NAME,
+    KDNP_NAME,
+    DK_NAME,
+    CHANCE_NAME,
+    MSZP_NAME,
+    MOMENTUM_NAME,
+    JOBBIK_NAME,
+    JOBBIK_CONSEVATIVES_NAME,
+]
@@ -0,0 +1,51 @@
+from datetime import date
+from typing import Iterable, Optional
+from unicodedata import category, normalize
+
+from models import MEP, EUPoliticalGroup
+from name_util import extract_last_name
+
+
+def normalize_name(name: str) -> str:
+    decomposed_name = normalize("NFKD", name.casefold())
+    return " ".join("".join(character for character in decomposed_name if category(character) != "Mn").replace(" -", "-").replace("- ", "-").split())
+
+
+def name_variants_of(mep: MEP) -> list[str]:
+    # roll call votes list MEPs by last name, followed by the first name where the last name is shared
+    try:
+        last_name = extract_last_name(mep.name)
+    except IndexError:
+        return [normalize_name(mep.name)]
+    first_name = mep.name[:-len(last_name)].strip()
+    return [normalize_name(last_name), normalize_name(f"{last_name} {first_name}"), normalize_name(mep.name)]
+
+
+class MepIdentityResolver:
+    _mep_ids_by_name: dict[str, set[str]]
+    _political_groups_by_id: dict[str, EUPoliticalGroup]
+    _candidate_mep_ids: dict[str, frozenset[str]]
+
+    def __init__(self, meps: Iterable[MEP], eu_political_groups: Iterable[EUPoliticalGroup] = ()):
+        self._mep_ids_by_name = {}
+        self._political_groups_by_id = {political_group_id: political_group for political_group in eu_political_groups for political_group_id in political_group.ids}
+        self._candidate_mep_ids = {}
+        for mep in meps:
+            for name_variant in name_variants_of(mep):
+                self._mep_ids_by_name.setdefault(name_variant, set()).add(mep.id)
+
+    def index_entries(self) -> Iterable[tuple[str, str]]:
+        for name_variant, mep_ids in self._mep_ids_by_name.items():
+            for mep_id in mep_ids:
+                yield name_variant, mep_id
+
+    def resolve(self, ballot_name: Optional[str], political_group_id: Optional[str] = None, date_to_check: Optional[date] = None) -> Optional[str]:
+        if ballot_name is None:
+            return None
+        if ballot_name not in self._candidate_mep_ids:
+            self._candidate_mep_ids[ballot_name] = frozenset(self._mep_ids_by_name.get(normalize_name(ballot_name), ()))
+        mep_ids = self._candidate_mep_ids[ballot_name]
+        # the name is unique across every country, or the group the ballot was cast in tells the namesakes apart
+        if len(mep_ids) > 1 and political_group_id in self._political_groups_by_id and date_to_check is not None:
+            mep_ids = mep_ids & self._political_groups_by_id[political_group_id].members.get_member_ids_at(date_to_check)
+        return next(iter(mep_ids)) if len(mep_ids) == 1 else None
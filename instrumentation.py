@@ -0,0 +1,107 @@
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+import cProfile
+from io import StringIO
+import pstats
+from time import perf_counter
+import tracemalloc
+from typing import Optional
+
+PROFILERS = ("cprofile", "tracemalloc")
+PROFILE_REPORT_LINES = 25
+# a disabled stage hands out this shared context, so instrumented code pays one attribute check and no allocation
+_DISABLED_STAGE = nullcontext()
+
+
+class Stage:
+    instrumentation: "Instrumentation"
+    name: str
+    started_at: float
+
+    def __init__(self, instrumentation: "Instrumentation", name: str):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.started_at = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation.add_time(self.name, perf_counter() - self.started_at)
+
+
+class Instrumentation:
+    enabled: bool
+    timings: dict[str, float]
+    calls: Counter
+    counters: Counter
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.timings = {}
+        self.calls = Counter()
+        self.counters = Counter()
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _DISABLED_STAGE
+        return Stage(self, name)
+
+    def add_time(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.calls[name] += 1
+
+    def count(self, name: str, amount=1):
+        if self.enabled:
+            self.counters[name] += amount
+
+    def reset(self):
+        self.timings.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def report(self) -> str:
+        lines = ["stage timings:"]
+        for name, seconds in sorted(self.timings.items(), key=lambda timing: timing[1], reverse=True):
+            lines.append(f"  {name:<24} {seconds:10.3f} s {self.calls[name]:10d} calls")
+        lines.append("counters:")
+        for name, amount in sorted(self.counters.items()):
+            lines.append(f"  {name:<24} {amount:14d}")
+        return "\n".join(lines)
+
+
+instrumentation = Instrumentation()
+
+
+def enable_instrumentation(enabled=True) -> Instrumentation:
+    instrumentation.enabled = enabled
+    instrumentation.reset()
+    return instrumentation
+
+
+@contextmanager
+def profiled(profiler: Optional[str], report_lines=PROFILE_REPORT_LINES):
+    report = StringIO()
+    if profiler is None:
+        yield report
+        return
+    assert profiler in PROFILERS, f"Unknown profiler {profiler}, expected one of {', '.join(PROFILERS)}"
+    if profiler == "cprofile":
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield report
+        finally:
+            profile.disable()
+            pstats.Stats(profile, stream=report).sort_stats("cumulative").print_stats(report_lines)
+    else:
+        tracemalloc.start()
+        try:
+            yield report
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report.write(f"peak traced memory: {peak_memory / 1024 / 1024:.1f} MiB\n")
+            for statistic in snapshot.statistics("lineno")[:report_lines]:
+                report.write(f"{statistic}\n")
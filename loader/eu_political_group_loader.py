@@ -15,16 +15,15 @@ def load_default_political_groups():
     }
 
 
-def extract_political_group_memberships(details_containers) -> list[tuple[str, Period]]:
-    political_groups_container = details_containers[0]
-    political_groups_container_children = political_groups_container.findChildren("li" , recursive=False)
-    return [extract_political_group_membership_data_from(child) for child in political_groups_container_children]
+def extract_political_group_memberships(status_lists: list[list[tuple[str, str]]]) -> list[tuple[str, Period]]:
+    political_groups_entries = status_lists[0]
+    return [extract_political_group_membership_data_from(entry) for entry in political_groups_entries]
 
 
-def extract_political_group_membership_data_from(political_groups_container_child) -> tuple[str, Period]:
-    unparsed_period = political_groups_container_child.select_one("strong").text
+def extract_political_group_membership_data_from(political_groups_entry: tuple[str, str]) -> tuple[str, Period]:
+    unparsed_period, political_group_membership_info = political_groups_entry
     period = extract_period_from(unparsed_period)
-    political_group_name = extract_political_group_from(political_groups_container_child.text, unparsed_period)
+    political_group_name = extract_political_group_from(political_group_membership_info, unparsed_period)
     return political_group_name, period
 
 
@@ -0,0 +1,123 @@
+from hashlib import sha256
+import json
+import os
+from os.path import exists
+from typing import Iterable, Optional
+
+import numpy as np
+
+from models import MEP, EUPoliticalGroup, Membership, NationalParty, Period
+
+MEMBERSHIP_STORE_FOLDER = "cache/membership_store"
+MEMBERSHIP_STORE_SCHEMA_VERSION = 1
+MEMBERSHIP_COLUMNS = ("mep", "owner", "start", "end")
+MEMBERSHIP_TABLES = ("national_party", "political_group")
+# date ordinals start at 1, so 0 stands for an open-ended period
+OPEN_END = 0
+
+
+class MembershipStore:
+    meps: list[tuple[str, str, str]]
+    national_parties: list[tuple[str, Optional[str]]]
+    political_groups: list[tuple[str, list[str], Optional[list[str]]]]
+    columns: dict[str, np.ndarray]
+
+    def __init__(self, meps: list, national_parties: list, political_groups: list, columns: dict[str, np.ndarray]):
+        self.meps = meps
+        self.national_parties = national_parties
+        self.political_groups = political_groups
+        self.columns = columns
+
+    def to_models(self) -> tuple[set[EUPoliticalGroup], set[NationalParty]]:
+        meps = [MEP(id, name, country) for id, name, country in self.meps]
+        national_parties = [NationalParty(name, country) for name, country in self.national_parties]
+        political_groups = [EUPoliticalGroup(name, ids, aliases) for name, ids, aliases in self.political_groups]
+        for table, owners in zip(MEMBERSHIP_TABLES, (national_parties, political_groups)):
+            rows = zip(*(self.columns[f"{table}_{column}"].tolist() for column in MEMBERSHIP_COLUMNS))
+            for mep, owner, start, end in rows:
+                period = Period.from_ordinals(start, end if end != OPEN_END else None)
+                owners[owner].members.add(Membership(meps[mep], period))
+        return set(political_groups), set(national_parties)
+
+
+def _membership_columns_of(owners: list, mep_index: dict[str, int]) -> dict[str, np.ndarray]:
+    rows = [
+        (mep_index[membership.member.id], owner, membership.period.start_ordinal, membership.period.end_ordinal if membership.period.end_ordinal is not None else OPEN_END)
+        for owner, owner_object in enumerate(owners)
+        for membership in owner_object.members
+    ]
+    table = np.array(rows, dtype=np.int32).reshape(len(rows), len(MEMBERSHIP_COLUMNS))
+    return {column: np.ascontiguousarray(table[:, index]) for index, column in enumerate(MEMBERSHIP_COLUMNS)}
+
+
+def create_membership_store(eu_political_groups: Iterable[EUPoliticalGroup], national_parties: Iterable[NationalParty]) -> MembershipStore:
+    national_parties = sorted(national_parties, key=lambda national_party: (national_party.name, national_party.country or ""))
+    eu_political_groups = sorted(eu_political_groups, key=lambda political_group: political_group.name)
+    meps = {}
+    for owner in [*national_parties, *eu_political_groups]:
+        for membership in owner.members:
+            assert isinstance(membership.member, MEP), f"Only MEP memberships can be stored, found {membership.member}"
+            meps.setdefault(membership.member.id, membership.member)
+    meps = sorted(meps.values(), key=lambda mep: mep.id)
+    mep_index = {mep.id: index for index, mep in enumerate(meps)}
+    columns = {}
+    for table, owners in zip(MEMBERSHIP_TABLES, (national_parties, eu_political_groups)):
+        columns.update({f"{table}_{column}": values for column, values in _membership_columns_of(owners, mep_index).items()})
+    return MembershipStore(
+        [(mep.id, mep.name, mep.country) for mep in meps],
+        [(national_party.name, national_party.country) for national_party in national_parties],
+        [(political_group.name, list(political_group.ids), political_group.aliases) for political_group in eu_political_groups],
+        columns,
+    )
+
+
+def fingerprint_membership_sources(eu_political_groups: Iterable[EUPoliticalGroup], source_file_uris: Iterable[str] = ()) -> str:
+    group_definitions = sorted((political_group.name, list(political_group.ids), political_group.aliases or []) for political_group in eu_political_groups)
+    # a refetched or edited MEP list or history page changes its size or mtime, statting them is far cheaper than hashing
+    source_files = []
+    for source_file_uri in sorted(set(source_file_uris)):
+        if exists(source_file_uri):
+            source_file_stat = os.stat(source_file_uri)
+            source_files.append((source_file_uri, source_file_stat.st_size, source_file_stat.st_mtime_ns))
+    return sha256(json.dumps([group_definitions, source_files]).encode()).hexdigest()
+
+
+def save_membership_store(membership_store: MembershipStore, source_fingerprint: str, folder=MEMBERSHIP_STORE_FOLDER):
+    os.makedirs(folder, exist_ok=True)
+    meta_file_uri = f"{folder}/meta.json"
+    # the metadata is written last, so a half-written store is never picked up
+    if exists(meta_file_uri):
+        os.remove(meta_file_uri)
+    for name, values in membership_store.columns.items():
+        np.save(f"{folder}/{name}.npy", values)
+    meta = {
+        "schema_version": MEMBERSHIP_STORE_SCHEMA_VERSION,
+        "source_fingerprint": source_fingerprint,
+        "meps": membership_store.meps,
+        "national_parties": membership_store.national_parties,
+        "political_groups": membership_store.political_groups,
+    }
+    with open(f"{meta_file_uri}.part", "w", encoding="utf-8") as meta_file:
+        json.dump(meta, meta_file, ensure_ascii=False)
+    os.replace(f"{meta_file_uri}.part", meta_file_uri)
+
+
+def load_membership_store(source_fingerprint: str, folder=MEMBERSHIP_STORE_FOLDER) -> Optional[MembershipStore]:
+    meta_file_uri = f"{folder}/meta.json"
+    if not exists(meta_file_uri):
+        return None
+    with open(meta_file_uri, encoding="utf-8") as meta_file:
+        meta = json.load(meta_file)
+    if meta.get("schema_version") != MEMBERSHIP_STORE_SCHEMA_VERSION or meta.get("source_fingerprint") != source_fingerprint:
+        return None
+    columns = {
+        f"{table}_{column}": np.load(f"{folder}/{table}_{column}.npy", mmap_mode="r")
+        for table in MEMBERSHIP_TABLES
+        for column in MEMBERSHIP_COLUMNS
+    }
+    return MembershipStore(
+        [tuple(mep) for mep in meta["meps"]],
+        [tuple(national_party) for national_party in meta["national_parties"]],
+        [tuple(political_group) for political_group in meta["political_groups"]],
+        columns,
+    )
@@ -1,8 +1,10 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, date
 import os
 from os.path import exists
 from time import sleep
 from typing import (
+    Iterable,
     List,
     Optional,
     Tuple,
@@ -10,21 +12,32 @@ from typing import (
 from re import sub
 
 import requests
-from bs4 import BeautifulSoup, Tag
+from requests.adapters import HTTPAdapter
 import xml.etree.ElementTree as ET
-import re
-import logging
 import pickle
 
 from const import FIRST_DATE_OF_NINTH_EP_SESSION
 from loader.eu_political_group_loader import extract_political_group_memberships, load_default_political_groups
 from loader.loader_util import extract_period_from
+from loader.membership_store import create_membership_store, fingerprint_membership_sources, load_membership_store, save_membership_store
+from loader.mep_history_parser import MEP_HISTORY_PARSERS
+from loader.voting_data_loader import RETRIED_STATUS_CODES
 from logger import create_logger
+from registry import EntityRegistry
 from models import (
     EUPoliticalGroup,
     NationalParty,
     MEP,
     Membership,
+    Period,
+)
+
+MEP_HISTORY_URL_TEMPLATE = "https://www.europarl.europa.eu/meps/en/{id}/{name}/history/9#detailedcardmep"
+MEP_HISTORY_CACHE_FOLDER = "html"
+MEP_LIST_URLS = (
+    "https://www.europarl.europa.eu/meps/en/full-list/xml/",
+    "https://www.europarl.europa.eu/meps/en/incoming-outgoing/outgoing/xml",
+    "https://www.europarl.europa.eu/meps/en/incoming-outgoing/incoming/xml",
 )
 
 
@@ -37,9 +50,13 @@ def parse_xml(xml_data) -> Tuple[str, Optional[str], str, str]:
     return mep_name, mep_party, mep_political_group, mep_id
 
 
-def fetch_mep_xml(url: str) -> str:
+def mep_xml_cache_file_uri(url: str) -> str:
     cache_file_name = sub(r"[^a-z0-9]", "", url)
-    cache_file_uri = f"xml/{cache_file_name}.xml"
+    return f"xml/{cache_file_name}.xml"
+
+
+def fetch_mep_xml(url: str) -> str:
+    cache_file_uri = mep_xml_cache_file_uri(url)
     if os.path.exists(cache_file_uri):
         with open(cache_file_uri) as cached_xml:
             return cached_xml.read()
@@ -160,70 +177,148 @@ def create_national_parties_from(xml_address: str) -> set[NationalParty]:
     return {create_national_party_from(mep_data) for mep_data in root_data}
 
 
-def load_mep_data() -> tuple[List[EUPoliticalGroup], List[NationalParty]]:
-    cache_folder = "cache"
+def load_legacy_mep_data(logger, cache_folder="cache") -> Optional[tuple[set[EUPoliticalGroup], set[NationalParty]]]:
     eu_groups_file_uri = f"{cache_folder}/eu_groups.pkl"
     national_party_file_uri = f"{cache_folder}/national_parties.pkl"
-    if exists(eu_groups_file_uri) and exists(national_party_file_uri):
+    if not (exists(eu_groups_file_uri) and exists(national_party_file_uri)):
+        return None
+    try:
         with open(eu_groups_file_uri, "rb") as eu_groups_file:
             eu_groups = pickle.load(eu_groups_file)
         with open(national_party_file_uri, "rb") as national_party_file:
             national_parties = pickle.load(national_party_file)
-        return eu_groups, national_parties
-    else:
-        eu_groups, national_parties = fetch_mep_data()
-        with open(eu_groups_file_uri, "wb") as eu_groups_file:
-            pickle.dump(eu_groups, eu_groups_file)
-        with open(national_party_file_uri, "wb") as national_party_file:
-            pickle.dump(national_parties, national_party_file)
-        return eu_groups, national_parties
+    except (AttributeError, ImportError, pickle.UnpicklingError) as e:
+        logger.warning(f"Pickled MEP data in {cache_folder} is not readable any more, refetching: {e}")
+        return None
+    return eu_groups, national_parties
+
+
+def membership_source_file_uris() -> list[str]:
+    history_file_uris = [f"{MEP_HISTORY_CACHE_FOLDER}/{filename}" for filename in os.listdir(MEP_HISTORY_CACHE_FOLDER) if filename.endswith(".html")] if exists(MEP_HISTORY_CACHE_FOLDER) else []
+    return [mep_xml_cache_file_uri(url) for url in MEP_LIST_URLS] + history_file_uris
+
 
+def fingerprint_mep_data_sources() -> str:
+    return fingerprint_membership_sources(load_default_political_groups(), membership_source_file_uris())
 
 
-def fetch_mep_data() -> tuple[List[EUPoliticalGroup], List[NationalParty]]:
+def load_mep_data(url_template=MEP_HISTORY_URL_TEMPLATE, retries=3, backoff=3.0) -> tuple[set[EUPoliticalGroup], set[NationalParty]]:
     logger = create_logger()
-    current_meps = create_meps_from("https://www.europarl.europa.eu/meps/en/full-list/xml/")
-    former_meps = create_meps_from("https://www.europarl.europa.eu/meps/en/incoming-outgoing/outgoing/xml")
+    membership_store = load_membership_store(fingerprint_mep_data_sources())
+    if membership_store is not None:
+        return membership_store.to_models()
+    # pickles written by earlier versions are migrated once instead of scraping every MEP again
+    legacy_mep_data = load_legacy_mep_data(logger)
+    if legacy_mep_data is not None:
+        (eu_groups, national_parties), missing_meps = legacy_mep_data, set()
+    else:
+        eu_groups, national_parties, missing_meps = fetch_mep_data(url_template, retries, backoff)
+    if missing_meps:
+        # a failed page leaves no file behind, so a store saved now would hide the gap from every later run
+        logger.warning(f"{len(missing_meps)} MEP histories could not be fetched, the membership store is not saved until they are")
+    else:
+        # fetching may have written the source files, so they are fingerprinted as they are now
+        save_membership_store(create_membership_store(eu_groups, national_parties), fingerprint_mep_data_sources())
+    return eu_groups, national_parties
+
+
+def fetch_mep_data(url_template=MEP_HISTORY_URL_TEMPLATE, retries=3, backoff=3.0) -> tuple[set[EUPoliticalGroup], set[NationalParty], set[MEP]]:
+    logger = create_logger()
+    full_list_url, outgoing_list_url, incoming_list_url = MEP_LIST_URLS
+    current_meps = create_meps_from(full_list_url)
+    former_meps = create_meps_from(outgoing_list_url)
     all_meps = current_meps.union(former_meps)
-    national_parties = create_national_parties_from("https://www.europarl.europa.eu/meps/en/full-list/xml/").union(
-        create_national_parties_from("https://www.europarl.europa.eu/meps/en/incoming-outgoing/outgoing/xml").union(
-            create_national_parties_from("https://www.europarl.europa.eu/meps/en/incoming-outgoing/incoming/xml")            
+    national_parties = create_national_parties_from(full_list_url).union(
+        create_national_parties_from(outgoing_list_url).union(
+            create_national_parties_from(incoming_list_url)
         )
     )
-    political_groups = load_default_political_groups()
-    for mep in all_meps:
-        url_name_part = mep.name.upper().replace(" ", "_")
-        mep_data_url = f"https://www.europarl.europa.eu/meps/en/{mep.id}/{url_name_part}/history/9#detailedcardmep"
-        soup = extract_soup_from(mep_data_url)
-        logging.info(f"processing {mep_data_url}...")
-        details_containers = soup.select(".erpl_meps-status-list > .erpl_meps-status > ul")
-        if len(details_containers) > 0:
-            national_parties_container = details_containers[1]
-            national_parties_container_children = national_parties_container.findChildren("li" , recursive=False)
-            for national_party_data_container in national_parties_container_children:
-                unparsed_period = national_party_data_container.select_one("strong").text
-                national_party_membership_period = extract_period_from(unparsed_period)
-                national_party_name, national_party_nation = extract_national_party_from(national_party_data_container.text, unparsed_period)
-                national_parties_found = [party for party in national_parties if party.name == national_party_name and party.country == national_party_nation]
-                assert len(national_parties_found) < 2
-                national_party = national_parties_found[0] if len(national_parties_found) == 1 else NationalParty(national_party_name, national_party_nation)
+    registry = EntityRegistry(national_parties, load_default_political_groups())
+    mep_histories = fetch_mep_histories(all_meps, logger, url_template=url_template, retries=retries, backoff=backoff)
+    for mep in sorted(all_meps, key=lambda mep: mep.id):
+        mep_history = mep_histories.get(mep)
+        if mep_history is not None:
+            national_party_memberships_data, eu_group_memberships_data = mep_history
+            for national_party_name, national_party_nation, national_party_membership_period in national_party_memberships_data:
+                national_party = registry.find_or_add_party(national_party_name, national_party_nation)
                 national_party.members.add(Membership(mep, national_party_membership_period))
-                if len(national_parties_found) == 0:
-                    national_parties.add(national_party)
-            eu_group_memberships_data = extract_political_group_memberships(details_containers)
             for eu_group_name, eu_group_membership_period in eu_group_memberships_data:
-                political_group = find_political_group_by_name(political_groups, eu_group_name)
+                political_group = find_political_group_by_name(registry, eu_group_name)
                 political_group_membership = Membership(mep, eu_group_membership_period)
                 political_group.members.add(political_group_membership)
-        else:
-            logger.warn(f"No details for {mep_data_url}, skipping")
-    return political_groups, national_parties
+        elif mep in mep_histories:
+            logger.warning(f"No details for {mep_history_url_of(mep, url_template)}, skipping")
+    # a MEP whose page failed to download has no entry at all
+    return registry.political_groups, registry.national_parties, all_meps.difference(mep_histories)
 
 
-def find_political_group_by_name(political_groups_to_be_searched: list[EUPoliticalGroup], political_group_name: str) -> EUPoliticalGroup:
-    found_groups = [group for group in political_groups_to_be_searched if group.has_name(political_group_name)]
-    assert len(found_groups) == 1, f"No political group named {political_group_name} found"
-    return found_groups[0]
+def mep_history_url_of(mep: MEP, url_template=MEP_HISTORY_URL_TEMPLATE) -> str:
+    return url_template.format(id=mep.id, name=mep.name.upper().replace(" ", "_"))
+
+
+def fetch_mep_history_page(mep: MEP, session: requests.Session, url_template=MEP_HISTORY_URL_TEMPLATE, retries=3, backoff=3.0) -> str:
+    cache_file_uri = f"{MEP_HISTORY_CACHE_FOLDER}/{mep.id}.html"
+    if exists(cache_file_uri):
+        with open(cache_file_uri, "rb") as cached_html:
+            return cached_html.read().decode("utf-8")
+    url = mep_history_url_of(mep, url_template)
+    for attempt in range(retries + 1):
+        try:
+            page = session.get(url, timeout=30)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+        else:
+            # a missing or forbidden page stays that way, only throttling and server errors are worth another try
+            if page.status_code not in RETRIED_STATUS_CODES or attempt == retries:
+                page.raise_for_status()
+                break
+        sleep(backoff * 2 ** attempt)
+    # the page is only persisted once fully downloaded, so an interrupted scrape resumes from here
+    with open(f"{cache_file_uri}.part", "wb") as cached_html:
+        cached_html.write(page.content)
+    os.replace(f"{cache_file_uri}.part", cache_file_uri)
+    return page.content.decode("utf-8")
+
+
+def extract_mep_history_from(page_content: str, parser="stream") -> Optional[tuple[list[tuple[str, str, Period]], list[tuple[str, Period]]]]:
+    status_lists = MEP_HISTORY_PARSERS[parser](page_content)
+    if len(status_lists) == 0:
+        return None
+    national_party_memberships_data = []
+    for unparsed_period, national_party_membership_info in status_lists[1]:
+        national_party_membership_period = extract_period_from(unparsed_period)
+        national_party_name, national_party_nation = extract_national_party_from(national_party_membership_info, unparsed_period)
+        national_party_memberships_data.append((national_party_name, national_party_nation, national_party_membership_period))
+    return national_party_memberships_data, extract_political_group_memberships(status_lists)
+
+
+def fetch_mep_histories(meps: Iterable[MEP], logger, concurrency=8, workers=None, url_template=MEP_HISTORY_URL_TEMPLATE, retries=3, backoff=3.0, parser="stream") -> dict[MEP, Optional[tuple]]:
+    if not exists(MEP_HISTORY_CACHE_FOLDER):
+        os.makedirs(MEP_HISTORY_CACHE_FOLDER)
+    mep_histories = {}
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=concurrency) as fetcher, ProcessPoolExecutor(max_workers=workers) as parsers:
+        session.mount("https://", HTTPAdapter(pool_maxsize=concurrency))
+        session.mount("http://", HTTPAdapter(pool_maxsize=concurrency))
+        page_futures = {fetcher.submit(fetch_mep_history_page, mep, session, url_template, retries, backoff): mep for mep in meps}
+        history_futures = {}
+        for page_future in as_completed(page_futures):
+            mep = page_futures[page_future]
+            try:
+                history_futures[parsers.submit(extract_mep_history_from, page_future.result(), parser)] = mep
+            except requests.RequestException as e:
+                logger.error(f"fetching {mep_history_url_of(mep, url_template)} failed: {e}")
+        for history_future in as_completed(history_futures):
+            mep = history_futures[history_future]
+            logger.info(f"processed {mep_history_url_of(mep, url_template)}")
+            mep_histories[mep] = history_future.result()
+    return mep_histories
+
+
+def find_political_group_by_name(registry: EntityRegistry, political_group_name: str) -> EUPoliticalGroup:
+    political_group = registry.find_political_group_by_name(political_group_name)
+    assert political_group is not None, f"No political group named {political_group_name} found"
+    return political_group
 
 
 def party_is_member_of_group(political_group: EUPoliticalGroup, national_party: NationalParty) -> bool:
@@ -241,14 +336,3 @@ def extract_national_party_from(child: str, unparsed_period: str) -> tuple[str,
     return party_name, party_nation
   
 
-def extract_last_name(mep_name):
-    # David McAllister is the only MEP with non-capitalized last name
-    return re.findall(r" [^a-z]+$| McALLISTER$", mep_name)[0][1:]
-
-def extract_soup_from(url: str) -> BeautifulSoup:
-    try:
-        page = requests.get(url)
-    except Exception:
-        sleep(3)
-        page = requests.get(url)
-    return BeautifulSoup(page.content, 'html.parser')
@@ -0,0 +1,103 @@
+from html.parser import HTMLParser
+import re
+
+from bs4 import BeautifulSoup
+
+STATUS_LIST_SELECTOR = ".erpl_meps-status-list > .erpl_meps-status > ul"
+STATUS_LIST_CONTAINER_PATTERN = re.compile(r"""<\w+\s[^>]*\bclass\s*=\s*["'][^"']*\berpl_meps-status-list\b""")
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+def extract_status_lists_with_soup(page_content: str) -> list[list[tuple[str, str]]]:
+    soup = BeautifulSoup(page_content, 'html.parser')
+    return [
+        [(entry.select_one("strong").text, entry.text) for entry in status_list.find_all("li", recursive=False)]
+        for status_list in soup.select(STATUS_LIST_SELECTOR)
+    ]
+
+
+class StatusListsComplete(Exception):
+    pass
+
+
+class StatusListExtractor(HTMLParser):
+    status_lists: list[list[tuple[str, str]]]
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.status_lists = []
+        self._open_elements = []
+        self._status_list_depth = None
+        self._entry_depth = None
+        self._entry_text = []
+        self._period_depth = None
+        self._period_text = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        classes = next((value.split() for name, value in attrs if name == "class" and value), [])
+        depth = len(self._open_elements)
+        if tag == "ul" and self._status_list_depth is None and self._is_inside_status():
+            self._status_list_depth = depth
+            self.status_lists.append([])
+        elif tag == "li" and self._status_list_depth is not None and self._entry_depth is None and depth == self._status_list_depth + 1:
+            self._entry_depth = depth
+            self._entry_text = []
+            self._period_text = None
+        elif tag == "strong" and self._entry_depth is not None and self._period_text is None:
+            self._period_depth = depth
+            self._period_text = []
+        self._open_elements.append((tag, classes))
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        matching_depths = [depth for depth, (open_tag, _) in enumerate(self._open_elements) if open_tag == tag]
+        if not matching_depths:
+            return
+        depth = matching_depths[-1]
+        if self._period_depth is not None and depth <= self._period_depth:
+            self._period_depth = None
+        if self._entry_depth is not None and depth <= self._entry_depth:
+            self.status_lists[-1].append(("".join(self._period_text or []), "".join(self._entry_text)))
+            self._entry_depth = None
+        if self._status_list_depth is not None and depth <= self._status_list_depth:
+            self._status_list_depth = None
+        del self._open_elements[depth:]
+        if not self._open_elements:
+            raise StatusListsComplete()
+
+    def handle_data(self, data):
+        if self._entry_depth is not None:
+            self._entry_text.append(data)
+            if self._period_depth is not None:
+                self._period_text.append(data)
+
+    def _is_inside_status(self) -> bool:
+        return (
+            len(self._open_elements) >= 2
+            and "erpl_meps-status" in self._open_elements[-1][1]
+            and "erpl_meps-status-list" in self._open_elements[-2][1]
+        )
+
+
+def extract_status_lists_with_stream(page_content: str) -> list[list[tuple[str, str]]]:
+    # history pages carry a single status list container, only that fragment of the page is parsed
+    container_match = STATUS_LIST_CONTAINER_PATTERN.search(page_content)
+    if container_match is None:
+        return []
+    extractor = StatusListExtractor()
+    try:
+        extractor.feed(page_content[container_match.start():])
+        extractor.close()
+    except StatusListsComplete:
+        pass
+    return extractor.status_lists
+
+
+MEP_HISTORY_PARSERS = {
+    "soup": extract_status_lists_with_soup,
+    "stream": extract_status_lists_with_stream,
+}
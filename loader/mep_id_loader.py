@@ -1,53 +1,99 @@
-from datetime import date, timedelta
-import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from os import makedirs
 from os.path import exists
 import pickle
+from sys import intern
+from typing import Iterable
 from xml.etree import ElementTree
-from const import (
-    FIRST_DATE_OF_NINTH_EP_SESSION,
-    VOTES,
-)
+
+from const import FIRST_DATE_OF_NINTH_EP_SESSION
+from loader.session_calendar import load_sitting_days
 from loader.voting_data_loader import load_voting_data
 
 from logger import create_logger
 
+MEP_IDS_CACHE_FOLDER = "cache"
+MEP_IDS_FILE_URI = f"{MEP_IDS_CACHE_FOLDER}/mep_ids.pkl"
+SCANNED_DAYS_FILE_URI = f"{MEP_IDS_CACHE_FOLDER}/mep_ids_scanned_days.pkl"
+PAIRING_DAYS_FILE_URI = f"{MEP_IDS_CACHE_FOLDER}/mep_ids_pairing_days.pkl"
+
+
+def _load_pickle(file_uri: str, default):
+    if exists(file_uri):
+        with open(file_uri, "rb") as pickle_file:
+            return pickle.load(pickle_file)
+    return default
+
 
-def load_mep_ids() -> dict[int, int]:
-    cache_folder = "cache"
-    mep_ids_file_uri = f"{cache_folder}/mep_ids.pkl"
-    if exists(mep_ids_file_uri):
-        with open(mep_ids_file_uri, "rb") as mep_ids_file:
-            mep_ids = pickle.load(mep_ids_file)
-    else:
-        mep_ids = fetch_mep_ids()
-        with open(mep_ids_file_uri, "wb") as mep_ids_file:
-            pickle.dump(mep_ids, mep_ids_file)
+def _save_pickle(file_uri: str, content):
+    if not exists(MEP_IDS_CACHE_FOLDER):
+        makedirs(MEP_IDS_CACHE_FOLDER)
+    with open(file_uri, "wb") as pickle_file:
+        pickle.dump(content, pickle_file)
+
+
+def load_mep_ids(workers=None) -> dict[str, str]:
+    mep_ids = _load_pickle(MEP_IDS_FILE_URI, dict())
+    scanned_days = _load_pickle(SCANNED_DAYS_FILE_URI, set())
+    pairing_days = _load_pickle(PAIRING_DAYS_FILE_URI, None)
+    if pairing_days is None:
+        # without the sitting each pairing came from, new days cannot be merged in date order, so every day is scanned once
+        mep_ids, scanned_days, pairing_days = dict(), set(), dict()
+    pairings_by_day = scan_mep_id_pairings_by_day(scanned_days, workers)
+    if pairings_by_day:
+        merge_mep_id_pairings(mep_ids, pairing_days, pairings_by_day)
+        _save_pickle(MEP_IDS_FILE_URI, mep_ids)
+        _save_pickle(PAIRING_DAYS_FILE_URI, pairing_days)
+        _save_pickle(SCANNED_DAYS_FILE_URI, scanned_days | pairings_by_day.keys())
     return mep_ids
 
 
-def fetch_mep_ids() -> dict[int, int]:
+def fetch_mep_ids(workers=None) -> dict[str, str]:
     mep_id_pers_id_pairings = dict()
+    merge_mep_id_pairings(mep_id_pers_id_pairings, dict(), scan_mep_id_pairings_by_day(workers=workers))
+    return mep_id_pers_id_pairings
+
+
+def merge_mep_id_pairings(mep_id_pers_id_pairings: dict[str, str], pairing_days: dict[str, date], pairings_by_day: dict[date, dict[str, str]]):
+    # the pairing of the latest sitting wins, even when an earlier sitting is only scanned now
+    for day in sorted(pairings_by_day):
+        for mep_id, pers_id in pairings_by_day[day].items():
+            if pairing_days.get(mep_id, date.min) <= day:
+                mep_id_pers_id_pairings[mep_id] = pers_id
+                pairing_days[mep_id] = day
+
+
+def scan_mep_id_pairings_by_day(scanned_days: Iterable[date] = (), workers=None) -> dict[date, dict[str, str]]:
     logger = create_logger()
-    logger.setLevel(logging.INFO)
-    date_to_examine = FIRST_DATE_OF_NINTH_EP_SESSION
-    end_date = date.today()
-    while date_to_examine <= end_date:
-        filename = load_voting_data(date_to_examine, logger, True)
-        if filename:
-            with open(filename) as file:
-                xml_tree = ElementTree.parse(file)
-                root = xml_tree.getroot()
-                for roll_call_vote_result in root:
-                    if roll_call_vote_result.tag == "RollCallVote.Result":
-                        for vote in VOTES:
-                            result_by_vote = roll_call_vote_result.find(f'Result.{vote}')
-                            if result_by_vote:
-                                for political_group_votes in result_by_vote:
-                                    for mep_voting in political_group_votes:
-                                        voting_mep_id = mep_voting.attrib.get('PersId')
-                                        alternate_id = mep_voting.attrib['MepId']
-                                        if voting_mep_id:
-                                            mep_id_pers_id_pairings[alternate_id] = voting_mep_id
-                                            logger.debug(f"pairing added: {alternate_id} - {voting_mep_id}")
-        date_to_examine = date_to_examine + timedelta(days=1)
-    return mep_id_pers_id_pairings
\ No newline at end of file
+    scanned_days = set(scanned_days)
+    days_to_scan = [date_to_examine for date_to_examine in load_sitting_days(FIRST_DATE_OF_NINTH_EP_SESSION, date.today(), logger, True) if date_to_examine not in scanned_days]
+    filenames_by_day = {date_to_examine: load_voting_data(date_to_examine, logger, True) for date_to_examine in days_to_scan}
+    filenames_by_day = {date_to_examine: filename for date_to_examine, filename in filenames_by_day.items() if filename}
+    logger.info(f'scanning {len(filenames_by_day)} sitting days for MepId - PersId pairings')
+    return dict(zip(filenames_by_day, scan_mep_id_pairings_of(filenames_by_day.values(), workers)))
+
+
+def scan_mep_id_pairings_of(filenames: Iterable[str], workers=None) -> list[dict[str, str]]:
+    filenames = list(filenames)
+    if len(filenames) < 2:
+        return [scan_mep_id_pairings(filename) for filename in filenames]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(scan_mep_id_pairings, filenames))
+
+
+def scan_mep_id_pairings(filename: str) -> dict[str, str]:
+    mep_id_pers_id_pairings = {}
+    root = None
+    # the ids are attributes, so start events carry everything needed and no vote is built
+    for _, element in ElementTree.iterparse(filename, events=("start",)):
+        if root is None:
+            root = element
+        elif element.tag == "PoliticalGroup.Member.Name":
+            pers_id = element.attrib.get('PersId')
+            if pers_id:
+                mep_id_pers_id_pairings[intern(element.attrib['MepId'])] = intern(pers_id)
+        elif element.tag == "RollCallVote.Result":
+            # the results started before this one are complete, dropping them keeps memory flat
+            root.clear()
+    return mep_id_pers_id_pairings
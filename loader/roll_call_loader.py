@@ -0,0 +1,222 @@
+from collections import OrderedDict
+from datetime import date
+from os import makedirs
+from os.path import exists, getsize
+import pickle
+from sys import intern
+from time import perf_counter
+from typing import Iterator, Optional
+from xml.etree import ElementTree
+
+from const import VOTES
+from instrumentation import instrumentation
+from loader.voting_data_loader import load_voting_data
+from models import Ballot, GroupTally, RollCallVote
+
+ROLL_CALL_CACHE_FOLDER = "cache/roll_call"
+# bumped whenever the pickled roll call votes or group tallies change layout
+ROLL_CALL_CACHE_SCHEMA_VERSION = 1
+
+# the memos keep the most recently used sittings only, so a long range does not pile up in memory
+ROLL_CALL_MEMO_SIZE = 16
+
+_roll_call_votes_by_date: OrderedDict[date, list[RollCallVote]] = OrderedDict()
+_group_tallies_by_date: OrderedDict[date, list[dict[str, GroupTally]]] = OrderedDict()
+
+
+def _memoized(memo: OrderedDict, date_to_examine: date):
+    memoized = memo.get(date_to_examine)
+    if memoized is not None:
+        memo.move_to_end(date_to_examine)
+    return memoized
+
+
+def _memoize(memo: OrderedDict, date_to_examine: date, value):
+    memo[date_to_examine] = value
+    memo.move_to_end(date_to_examine)
+    while len(memo) > ROLL_CALL_MEMO_SIZE:
+        memo.popitem(last=False)
+
+
+def clear_roll_call_caches():
+    _roll_call_votes_by_date.clear()
+    _group_tallies_by_date.clear()
+
+
+def _roll_call_cache_file_uri(date_to_examine: date) -> str:
+    return f"{ROLL_CALL_CACHE_FOLDER}/{date_to_examine}.pkl"
+
+
+def _load_versioned_pickle(file_uri: str):
+    if not exists(file_uri):
+        return None
+    try:
+        with open(file_uri, "rb") as cache_file:
+            payload = pickle.load(cache_file)
+    except (AttributeError, EOFError, ImportError, pickle.UnpicklingError):
+        return None
+    # pickles of an older layout, or from before the version was stored, are treated as missing
+    if not isinstance(payload, dict) or payload.get("schema_version") != ROLL_CALL_CACHE_SCHEMA_VERSION:
+        return None
+    return payload["data"]
+
+
+def _save_versioned_pickle(file_uri: str, data):
+    with open(file_uri, "wb") as cache_file:
+        pickle.dump({"schema_version": ROLL_CALL_CACHE_SCHEMA_VERSION, "data": data}, cache_file)
+
+
+def load_cached_roll_call_votes(date_to_examine: date, memoize=True) -> Optional[list[RollCallVote]]:
+    roll_call_votes = _memoized(_roll_call_votes_by_date, date_to_examine)
+    if roll_call_votes is not None:
+        instrumentation.count("roll call memory hits")
+        return roll_call_votes
+    if not exists(_roll_call_cache_file_uri(date_to_examine)):
+        return None
+    with instrumentation.stage("roll call cache load"):
+        roll_call_votes = _load_versioned_pickle(_roll_call_cache_file_uri(date_to_examine))
+    if roll_call_votes is None:
+        return None
+    instrumentation.count("roll call cache hits")
+    if memoize:
+        _memoize(_roll_call_votes_by_date, date_to_examine, roll_call_votes)
+    return roll_call_votes
+
+
+def load_roll_call_votes(date_to_examine: date, logger, offline=False) -> Optional[list[RollCallVote]]:
+    roll_call_votes = load_cached_roll_call_votes(date_to_examine)
+    if roll_call_votes is not None:
+        return roll_call_votes
+    filename = load_voting_data(date_to_examine, logger, offline)
+    if not filename:
+        return None
+    instrumentation.count("roll call cache misses")
+    roll_call_votes = parse_roll_call_votes(filename)
+    if not exists(ROLL_CALL_CACHE_FOLDER):
+        makedirs(ROLL_CALL_CACHE_FOLDER)
+    _save_versioned_pickle(_roll_call_cache_file_uri(date_to_examine), roll_call_votes)
+    save_group_tallies(date_to_examine, [tally_political_groups_of(roll_call_vote) for roll_call_vote in roll_call_votes])
+    _memoize(_roll_call_votes_by_date, date_to_examine, roll_call_votes)
+    return roll_call_votes
+
+
+def _group_tallies_file_uri(date_to_examine: date) -> str:
+    return f"{ROLL_CALL_CACHE_FOLDER}/{date_to_examine}.tallies.pkl"
+
+
+def save_group_tallies(date_to_examine: date, group_tallies: list[dict[str, GroupTally]]):
+    _save_versioned_pickle(_group_tallies_file_uri(date_to_examine), group_tallies)
+    _memoize(_group_tallies_by_date, date_to_examine, group_tallies)
+
+
+def load_stored_group_tallies(date_to_examine: date, memoize=True) -> Optional[list[dict[str, GroupTally]]]:
+    group_tallies = _memoized(_group_tallies_by_date, date_to_examine)
+    if group_tallies is not None:
+        return group_tallies
+    group_tallies = _load_versioned_pickle(_group_tallies_file_uri(date_to_examine))
+    if group_tallies is not None and memoize:
+        _memoize(_group_tallies_by_date, date_to_examine, group_tallies)
+    return group_tallies
+
+
+def load_group_tallies(date_to_examine: date, logger, offline=False) -> Optional[list[dict[str, GroupTally]]]:
+    group_tallies = load_stored_group_tallies(date_to_examine)
+    if group_tallies is None:
+        instrumentation.count("group tally cache misses")
+        roll_call_votes = load_roll_call_votes(date_to_examine, logger, offline)
+        if roll_call_votes is None:
+            return None
+        # sittings ingested before the tallies existed get them on first use
+        group_tallies = [tally_political_groups_of(roll_call_vote) for roll_call_vote in roll_call_votes]
+        save_group_tallies(date_to_examine, group_tallies)
+    else:
+        instrumentation.count("group tally cache hits")
+    return group_tallies
+
+
+def majority_vote_of(counts: tuple[int, ...]) -> Optional[str]:
+    # the first maximum in VOTES order wins, like select_max_voted
+    majority_count = max(counts)
+    return VOTES[counts.index(majority_count)] if majority_count > 0 else None
+
+
+def tally_political_groups_of(roll_call_vote: RollCallVote) -> dict[str, GroupTally]:
+    counts_by_group_id = {}
+    for vote_index, vote in enumerate(VOTES):
+        for political_group_id, ballots in roll_call_vote.results[vote].items():
+            counts_by_group_id.setdefault(political_group_id, [0] * len(VOTES))[vote_index] += len(ballots)
+    return {political_group_id: GroupTally(tuple(counts), majority_vote_of(tuple(counts))) for political_group_id, counts in counts_by_group_id.items()}
+
+
+def majority_vote_of_political_group(group_tallies: dict[str, GroupTally], political_group_ids: list[str]) -> Optional[str]:
+    group_tallies_of_political_group = [group_tallies[political_group_id] for political_group_id in political_group_ids if political_group_id in group_tallies]
+    if len(group_tallies_of_political_group) == 1:
+        return group_tallies_of_political_group[0].majority_vote
+    counts = [0] * len(VOTES)
+    for group_tally in group_tallies_of_political_group:
+        counts = [count + group_count for count, group_count in zip(counts, group_tally.counts)]
+    return majority_vote_of(tuple(counts))
+
+
+def stream_roll_call_votes(date_to_examine: date, logger, offline=False) -> Optional[Iterator[RollCallVote]]:
+    # a streamed sitting is let go once it is consumed, so it is not memoized
+    roll_call_votes = load_cached_roll_call_votes(date_to_examine, memoize=False)
+    if roll_call_votes is not None:
+        return iter(roll_call_votes)
+    filename = load_voting_data(date_to_examine, logger, offline)
+    if not filename:
+        return None
+    return iterate_roll_call_votes(filename)
+
+
+def parse_roll_call_votes(filename: str) -> list[RollCallVote]:
+    return list(iterate_roll_call_votes(filename))
+
+
+def iterate_roll_call_votes(filename: str) -> Iterator[RollCallVote]:
+    if instrumentation.enabled:
+        instrumentation.count("files parsed")
+        instrumentation.count("bytes parsed", getsize(filename))
+    root = None
+    started_at = perf_counter()
+    for event, element in ElementTree.iterparse(filename, events=("start", "end")):
+        if root is None:
+            root = element
+        elif event == "end" and element.tag == "RollCallVote.Result":
+            roll_call_vote = create_roll_call_vote_from(element)
+            if instrumentation.enabled:
+                # votes may be consumed lazily, so only the time spent in here is attributed to parsing
+                instrumentation.add_time("parse", perf_counter() - started_at)
+                instrumentation.count("votes parsed")
+                instrumentation.count("ballots parsed", sum(1 for _ in roll_call_vote.ballots()))
+            yield roll_call_vote
+            # every consumed result is a direct child of the root, dropping them keeps memory flat
+            root.clear()
+            started_at = perf_counter()
+
+
+def create_roll_call_vote_from(roll_call_vote_result: ElementTree.Element) -> RollCallVote:
+    voting_description = roll_call_vote_result.find("RollCallVote.Description.Text")
+    results = {}
+    for vote in VOTES:
+        political_group_results = {}
+        result_by_vote = roll_call_vote_result.find(f'Result.{vote}')
+        if result_by_vote is not None:
+            for political_group_votes in result_by_vote:
+                political_group_id = intern(political_group_votes.attrib['Identifier'])
+                ballots = tuple(create_ballot_from(mep_voting, political_group_id) for mep_voting in political_group_votes)
+                political_group_results[political_group_id] = political_group_results.get(political_group_id, ()) + ballots
+        results[vote] = political_group_results
+    return RollCallVote(roll_call_vote_result.attrib.get('Identifier'), extract_voting_identifier(voting_description), results)
+
+
+def create_ballot_from(mep_voting: ElementTree.Element, political_group_id: str) -> Ballot:
+    pers_id = mep_voting.attrib.get('PersId')
+    return Ballot(political_group_id, intern(pers_id) if pers_id else None, intern(mep_voting.attrib['MepId']), mep_voting.text)
+
+
+def extract_voting_identifier(voting_description: ElementTree.Element) -> str:
+    if voting_description.text and voting_description.text.strip():
+        return voting_description.text
+    link = voting_description.find("a")
+    return f'{link.text} {link.tail}'
@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+from os import makedirs
+from os.path import dirname, exists, getmtime
+import pickle
+from typing import Optional
+
+from loader.voting_data_loader import VOTING_DATA_FOLDER, prefetch_voting_data
+
+SESSION_CALENDAR_FILE_URI = "cache/session_calendar.pkl"
+# minutes of a sitting can be published days later, so recent days without a vote are probed again
+RECHECK_WINDOW = timedelta(days=14)
+
+
+class SessionCalendar:
+    vote_days: set[date]
+    non_vote_days: set[date]
+    last_checked: dict[date, date]
+    offline_non_vote_days: set[date]
+    offline_folder_mtime: Optional[float]
+
+    def __init__(self):
+        self.vote_days = set()
+        self.non_vote_days = set()
+        self.last_checked = dict()
+        self.offline_non_vote_days = set()
+        self.offline_folder_mtime = None
+
+    def __setstate__(self, state):
+        # calendars pickled before offline checks were recorded have none
+        self.__dict__.update(state)
+        self.__dict__.setdefault('offline_non_vote_days', set())
+        self.__dict__.setdefault('offline_folder_mtime', None)
+
+    def sitting_days(self, start_date: date, end_date: date) -> list[date]:
+        return sorted(day for day in self.vote_days if start_date <= day <= end_date)
+
+    def is_known(self, day: date, today: date) -> bool:
+        if day in self.vote_days:
+            return True
+        if day in self.non_vote_days:
+            return day < self.last_checked[day] - RECHECK_WINDOW or self.last_checked[day] >= today
+        return False
+
+    def days_to_probe(self, start_date: date, end_date: date, today: date, offline=False) -> list[date]:
+        days_in_range = (start_date + timedelta(days=day) for day in range((end_date - start_date).days + 1))
+        return [day for day in days_in_range if not self.is_known(day, today) and not (offline and day in self.offline_non_vote_days)]
+
+    def record_offline_check(self, folder_mtime: Optional[float]):
+        # a file added to the folder may belong to any day found missing before, so those checks are dropped
+        if folder_mtime != self.offline_folder_mtime:
+            self.offline_non_vote_days.clear()
+            self.offline_folder_mtime = folder_mtime
+
+    def record(self, day: date, has_vote: bool, checked_at: date):
+        if has_vote:
+            self.vote_days.add(day)
+            self.non_vote_days.discard(day)
+            self.offline_non_vote_days.discard(day)
+        else:
+            self.non_vote_days.add(day)
+        self.last_checked[day] = checked_at
+
+
+def load_session_calendar() -> SessionCalendar:
+    if exists(SESSION_CALENDAR_FILE_URI):
+        with open(SESSION_CALENDAR_FILE_URI, "rb") as session_calendar_file:
+            return pickle.load(session_calendar_file)
+    return SessionCalendar()
+
+
+def save_session_calendar(session_calendar: SessionCalendar):
+    if not exists(dirname(SESSION_CALENDAR_FILE_URI)):
+        makedirs(dirname(SESSION_CALENDAR_FILE_URI))
+    with open(SESSION_CALENDAR_FILE_URI, "wb") as session_calendar_file:
+        pickle.dump(session_calendar, session_calendar_file)
+
+
+def refresh_session_calendar(session_calendar: SessionCalendar, start_date: date, end_date: date, logger, offline=False) -> SessionCalendar:
+    today = date.today()
+    if offline:
+        session_calendar.record_offline_check(getmtime(VOTING_DATA_FOLDER) if exists(VOTING_DATA_FOLDER) else None)
+    days_to_probe = session_calendar.days_to_probe(start_date, end_date, today, offline)
+    if not days_to_probe:
+        return session_calendar
+    logger.debug(f'probing {len(days_to_probe)} days from {days_to_probe[0]} to {days_to_probe[-1]}')
+    if offline:
+        # absence of a file says nothing about the sitting while offline, so it is only trusted until the folder changes
+        for day in days_to_probe:
+            if exists(f"{VOTING_DATA_FOLDER}/{day}.xml"):
+                session_calendar.record(day, True, today)
+            else:
+                session_calendar.offline_non_vote_days.add(day)
+    else:
+        for day, filename in prefetch_voting_data(days_to_probe, logger).items():
+            session_calendar.record(day, filename is not None, today)
+    return session_calendar
+
+
+def load_sitting_days(start_date: date, end_date: date, logger, offline=False) -> list[date]:
+    session_calendar = refresh_session_calendar(load_session_calendar(), start_date, end_date, logger, offline)
+    save_session_calendar(session_calendar)
+    return session_calendar.sitting_days(start_date, end_date)
@@ -1,18 +1,32 @@
-from typing import Optional
+import asyncio
+from datetime import date
+from time import monotonic
+from typing import Iterable, Optional
 from os import makedirs
 from os.path import exists
 import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import instrumentation
+
+VOTING_DATA_FOLDER = "xml"
+VOTING_DATA_URL_TEMPLATE = 'https://www.europarl.europa.eu/doceo/document/PV-9-{date}-RCV_FR.xml'
+RETRIED_STATUS_CODES = {429, 500, 502, 503, 504}
 
 
 def load_voting_data(date_to_examine, logger, offline=False) -> Optional[str]:
-    foldername = "xml"
+    foldername = VOTING_DATA_FOLDER
     filename = f"{foldername}/{date_to_examine}.xml"
     if exists(filename):
+        instrumentation.count("voting data cache hits")
         return filename
     elif not offline:
         if not exists(foldername):
             makedirs(foldername)
-        response = requests.get(f'https://www.europarl.europa.eu/doceo/document/PV-9-{date_to_examine}-RCV_FR.xml')
+        with instrumentation.stage("download"):
+            response = requests.get(VOTING_DATA_URL_TEMPLATE.format(date=date_to_examine))
+        instrumentation.count("files downloaded")
+        instrumentation.count("bytes downloaded", len(response.content))
         if response.status_code == 200:
             with open(filename, "wb") as voting_record_file:
                 voting_record_file.write(response.content)
@@ -22,3 +36,89 @@ def load_voting_data(date_to_examine, logger, offline=False) -> Optional[str]:
             return None
     else:
         logger.debug(f'file for {date_to_examine} is missing, skipping due to offline mode')
+
+
+class TokenBucket:
+    rate: float
+    capacity: float
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def prefetch_voting_data(
+        dates_to_fetch: Iterable[date],
+        logger,
+        concurrency=8,
+        requests_per_second=4.0,
+        retries=3,
+        backoff=1.0,
+        url_template=VOTING_DATA_URL_TEMPLATE,
+) -> dict[date, Optional[str]]:
+    # downloads overlap, so the stage is timed as a whole instead of per request
+    with instrumentation.stage("download"):
+        return asyncio.run(_prefetch_voting_data(list(dates_to_fetch), logger, concurrency, requests_per_second, retries, backoff, url_template))
+
+
+async def _prefetch_voting_data(dates_to_fetch, logger, concurrency, requests_per_second, retries, backoff, url_template) -> dict[date, Optional[str]]:
+    if not exists(VOTING_DATA_FOLDER):
+        makedirs(VOTING_DATA_FOLDER)
+    semaphore = asyncio.Semaphore(concurrency)
+    token_bucket = TokenBucket(requests_per_second, max(1, concurrency))
+    with requests.Session() as session:
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        filenames = await asyncio.gather(*[
+            _fetch_voting_data(session, semaphore, token_bucket, date_to_fetch, logger, retries, backoff, url_template)
+            for date_to_fetch in dates_to_fetch
+        ], return_exceptions=True)
+    # days that could not be fetched are left out, so callers do not mistake them for days without a vote
+    return {date_to_fetch: filename for date_to_fetch, filename in zip(dates_to_fetch, filenames) if not isinstance(filename, Exception)}
+
+
+async def _fetch_voting_data(session, semaphore, token_bucket, date_to_fetch, logger, retries, backoff, url_template) -> Optional[str]:
+    filename = f"{VOTING_DATA_FOLDER}/{date_to_fetch}.xml"
+    if exists(filename):
+        instrumentation.count("voting data cache hits")
+        return filename
+    url = url_template.format(date=date_to_fetch)
+    async with semaphore:
+        for attempt in range(retries + 1):
+            await token_bucket.acquire()
+            try:
+                response = await asyncio.to_thread(session.get, url, timeout=30)
+            except requests.RequestException as e:
+                logger.warning(f'downloading {url} failed: {e}')
+            else:
+                instrumentation.count("files downloaded")
+                instrumentation.count("bytes downloaded", len(response.content))
+                if response.status_code == 200:
+                    with open(filename, "wb") as voting_record_file:
+                        voting_record_file.write(response.content)
+                    return filename
+                elif response.status_code == 404:
+                    logger.debug(f'file for {date_to_fetch} is missing, skipping on the assumption that no vote took place')
+                    return None
+                elif response.status_code not in RETRIED_STATUS_CODES:
+                    logger.error(f'downloading {url} failed with status {response.status_code}')
+                    raise IOError(f'unexpected status {response.status_code} for {url}')
+            if attempt < retries:
+                await asyncio.sleep(backoff * 2 ** attempt)
+    logger.error(f'giving up on {url} after {retries + 1} attempts')
+    raise IOError(f'giving up on {url} after {retries + 1} attempts')
@@ -1,12 +1,41 @@
 import logging
+from os import environ
 from sys import stdout
+from typing import Optional, Union
 
+LOG_FILE_URI = 'logger.log'
+LOG_LEVEL_ENVIRONMENT_VARIABLE = 'EP_VOTING_LOG_LEVEL'
+DEFAULT_LOG_LEVEL = logging.INFO
+# quiet mode keeps warnings and errors only, for unattended runs over long date ranges
+LOG_LEVELS = {
+    'quiet': logging.WARNING,
+    'debug': logging.DEBUG,
+    'info': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR,
+}
+STDOUT_HANDLER_NAME = 'stdout'
 
-def create_logger():
-    logging.basicConfig(filename='logger.log', encoding='utf-8', level=logging.DEBUG)
+
+def log_level_of(level: Union[int, str, None]) -> int:
+    if level is None:
+        level = environ.get(LOG_LEVEL_ENVIRONMENT_VARIABLE)
+    if level is None:
+        return DEFAULT_LOG_LEVEL
+    if isinstance(level, int):
+        return level
+    return LOG_LEVELS[level.lower()]
+
+
+def create_logger(level: Optional[Union[int, str]] = None):
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
-    handler = logging.StreamHandler(stdout)
-    handler.setLevel(logging.DEBUG)
-    logger.addHandler(handler)
+    # handlers are set up once per process, later calls only hand out the configured logger
+    if not any(handler.get_name() == STDOUT_HANDLER_NAME for handler in logger.handlers):
+        logging.basicConfig(filename=LOG_FILE_URI, encoding='utf-8')
+        handler = logging.StreamHandler(stdout)
+        handler.set_name(STDOUT_HANDLER_NAME)
+        logger.addHandler(handler)
+        logger.setLevel(log_level_of(level))
+    elif level is not None:
+        logger.setLevel(log_level_of(level))
     return logger
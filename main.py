@@ -1,33 +1,37 @@
+from argparse import ArgumentParser
 from collections import Counter
-from datetime import (
-    date,
-    timedelta,
-)
-from time import sleep
-from typing import Iterable, Optional
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from functools import partial
+from os import makedirs
+from typing import Iterable, Iterator, Optional
 from sys import stdout
 import logging
-import xml.etree.ElementTree as ElementTree
-
-from const import (
-    CHANCE_NAME,
-    DATE_OF_UJHELYI_QUITTING_MSZP,
-    DK_NAME,
-    FIRST_DATE_OF_NINTH_EP_SESSION,
-    DATE_OF_FIDESZ_QUITTING_EPP_EP_GROUP,
-    JOBBIK_CONSEVATIVES_NAME,
-    JOBBIK_NAME,
-    JOBBIK_NAME_CHANGE_REGISTERED,
-    KDNP_NAME,
-    MOMENTUM_NAME,
-    MSZP_NAME,
-    VOTES,
-)
+
+import numpy as np
+
+from const import FIRST_DATE_OF_NINTH_EP_SESSION, TRACKED_PARTY_NAMES, VOTES
+from agreement_matrix import AgreementMatrix, mep_agreement_matrix, party_agreement_matrix, save_agreement_matrix
+from cohesion_series import CohesionSeries, create_cohesion_series
+from identity_resolver import MepIdentityResolver
+from instrumentation import PROFILERS, enable_instrumentation, instrumentation, profiled
 from loader.mep_id_loader import load_mep_ids
-from loader.voting_data_loader import load_voting_data
+from loader.roll_call_loader import (
+    load_group_tallies,
+    load_roll_call_votes,
+    load_stored_group_tallies,
+    majority_vote_of_political_group,
+    stream_roll_call_votes,
+    tally_political_groups_of,
+)
+from loader.session_calendar import load_sitting_days
 from logger import create_logger
 from loader.mep_data_loader import load_mep_data
-from models import MEP, EUPoliticalGroup, NationalParty
+from registry import EntityRegistry
+from result_export import VoteComparisonWriter
+from result_store import fingerprint_membership_data, load_result_store, save_result_store
+from vote_matrix import NO_MAJORITY, build_vote_matrix, compare_voting_cohesion_in_vote_matrix
+from models import Ballot, EUPoliticalGroup, GroupTally, NationalParty, RollCallVote, VoteComparison, VotingCohesionComparison
 
 VOTING_RECORD_FILE_PATH = 'voting_record.xml'
 
@@ -44,16 +48,18 @@ def calculate_cohesion(fidesz_votes: Counter) -> float:
     return majority_vote_count / total_vote_count * 100
 
 
-def is_mep_party_member(mep_voting: ElementTree.Element, party_meps: list[MEP], mep_id_pers_id_pairings: dict[int, int]) -> bool:
-    voting_mep_id = mep_voting.attrib.get('PersId')
-    alternate_id = mep_voting.attrib['MepId']
+def is_mep_party_member(ballot: Ballot, party_mep_ids: frozenset[str], mep_id_pers_id_pairings: dict[str, str], identity_resolver: Optional[MepIdentityResolver] = None, date_to_examine: Optional[date] = None, unresolved_ballots: Optional[set[Ballot]] = None) -> bool:
+    voting_mep_id = ballot.pers_id
+    alternate_id = ballot.mep_id
     if not voting_mep_id:
         voting_mep_id = mep_id_pers_id_pairings.get(alternate_id)
+    if not voting_mep_id and identity_resolver is not None:
+        voting_mep_id = identity_resolver.resolve(ballot.name, ballot.political_group_id, date_to_examine)
     if not voting_mep_id:
-        # TODO implement backup based on name and country
-        logging.error(f"No ID found for {mep_voting.text} (ID: {voting_mep_id}, alternative: {alternate_id})")
+        # the caller reports unresolved ballots once per vote, however many parties looked them up
+        if unresolved_ballots is not None:
+            unresolved_ballots.add(ballot)
         return False
-    party_mep_ids = [mep.id for mep in party_meps]
     return voting_mep_id in party_mep_ids
 
 
@@ -63,88 +69,329 @@ def find_group_ids_of_party(date_to_examine: date, political_groups: set[EUPolit
     return groups_of_party[0].ids
 
 
-def extract_national_vote_counter(roll_call_vote_result, eu_parliamentary_group_of_party: list[str], national_party_meps: list[MEP], mep_id_pers_id_pairings: dict[int, int]) -> Counter:
+def extract_national_vote_counter(roll_call_vote: RollCallVote, eu_parliamentary_group_of_party: list[str], national_party_mep_ids: frozenset[str], mep_id_pers_id_pairings: dict[str, str], identity_resolver: Optional[MepIdentityResolver] = None, date_to_examine: Optional[date] = None, unresolved_ballots: Optional[set[Ballot]] = None) -> Counter:
     national_party_votes_counter = Counter({vote: 0 for vote in VOTES})
     for vote in VOTES:
-        result_by_vote = roll_call_vote_result.find(f'Result.{vote}')
-        if result_by_vote:
-            for political_group_votes in result_by_vote:
-                political_group_id = political_group_votes.attrib['Identifier']
-                if political_group_id in eu_parliamentary_group_of_party:
-                    for mep_voting in political_group_votes:
-                        if is_mep_party_member(mep_voting, national_party_meps, mep_id_pers_id_pairings):
-                            national_party_votes_counter[vote] = national_party_votes_counter.get(vote, 0) + 1
+        for political_group_id, ballots in roll_call_vote.results[vote].items():
+            if political_group_id in eu_parliamentary_group_of_party:
+                for ballot in ballots:
+                    if is_mep_party_member(ballot, national_party_mep_ids, mep_id_pers_id_pairings, identity_resolver, date_to_examine, unresolved_ballots):
+                        national_party_votes_counter[vote] = national_party_votes_counter.get(vote, 0) + 1
     return national_party_votes_counter
 
 
-def extract_political_group_votes_counter(roll_call_vote_result, political_group: EUPoliticalGroup) -> Counter:
+def extract_political_group_votes_counter(roll_call_vote: RollCallVote, political_group: EUPoliticalGroup) -> Counter:
     political_group_votes_counter = Counter({vote: 0 for vote in VOTES})
     for vote in VOTES:
-        result_by_vote = roll_call_vote_result.find(f'Result.{vote}')
-        if result_by_vote:
-            for political_group_votes in result_by_vote:
-                political_group_id = political_group_votes.attrib['Identifier']
-                if political_group_id in political_group.ids:
-                    political_group_votes_counter[vote] = len(political_group_votes)
+        political_group_results = roll_call_vote.results[vote]
+        for political_group_id in political_group.ids:
+            if political_group_id in political_group_results:
+                political_group_votes_counter[vote] = len(political_group_results[political_group_id])
     return political_group_votes_counter
 
 
-def compare_voting_cohesion_with_ep_groups(national_party: NationalParty, eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, start_date=FIRST_DATE_OF_NINTH_EP_SESSION, end_date=date.today(), offline=False):
-    logger = create_logger()
-    logger.setLevel(logging.DEBUG)
-    political_group_voting_comparisons = {
-        political_group_name_ids: Counter(same=0, different=0) for political_group_name_ids in EUPoliticalGroup.id_name_pairings
+def iterate_vote_comparisons_at(date_to_examine: date, national_parties: list[NationalParty], eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, logger, offline=False, streaming=False, identity_resolver: Optional[MepIdentityResolver] = None) -> Optional[Iterator[VoteComparison]]:
+    roll_call_votes = stream_roll_call_votes(date_to_examine, logger, offline) if streaming else load_roll_call_votes(date_to_examine, logger, offline)
+    if roll_call_votes is None:
+        return None
+    # group tallies are stored at ingest; a streamed sitting that was never ingested is tallied on the fly
+    group_tallies = load_stored_group_tallies(date_to_examine, memoize=False) if streaming else load_group_tallies(date_to_examine, logger, offline)
+    return compare_roll_call_votes(date_to_examine, roll_call_votes, group_tallies, national_parties, eu_political_groups, mep_id_pers_id_pairings, logger, identity_resolver)
+
+
+def compare_roll_call_votes(date_to_examine: date, roll_call_votes: Iterable[RollCallVote], group_tallies: Optional[list[dict[str, GroupTally]]], national_parties: list[NationalParty], eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, logger, identity_resolver: Optional[MepIdentityResolver] = None) -> Iterator[VoteComparison]:
+    with instrumentation.stage("membership resolution"):
+        national_party_mep_ids = {national_party: national_party.members.get_member_ids_at(date_to_examine) for national_party in national_parties}
+        # a party without MEPs on the day has no votes to compare
+        voting_national_parties = [national_party for national_party in national_parties if national_party_mep_ids[national_party]]
+        eu_parliamentary_groups_of_parties = {national_party: find_group_ids_of_party(date_to_examine, eu_political_groups, national_party) for national_party in voting_national_parties}
+    # the level is checked once per sitting, the per-group comparison lines are only built when they are emitted
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+    for vote_index, roll_call_vote in enumerate(roll_call_votes):
+        voting_identifier = roll_call_vote.description
+        logger.debug('processing %s', voting_identifier)
+        # counting is finished before anything is yielded, so the stage does not include the time of the consumer
+        with instrumentation.stage("counting"):
+            # group majorities do not depend on the party, so they are joined from the tallies once per vote
+            vote_group_tallies = group_tallies[vote_index] if group_tallies is not None else tally_political_groups_of(roll_call_vote)
+            political_group_majority_votes = {political_group.name: majority_vote_of_political_group(vote_group_tallies, political_group.ids) for political_group in eu_political_groups}
+            unresolved_ballots = set()
+            national_party_votes_counters = [
+                (national_party, extract_national_vote_counter(roll_call_vote, eu_parliamentary_groups_of_parties[national_party], national_party_mep_ids[national_party], mep_id_pers_id_pairings, identity_resolver, date_to_examine, unresolved_ballots))
+                for national_party in voting_national_parties
+            ]
+        for ballot in sorted(unresolved_ballots):
+            logger.debug('no ID found for %s (MEP ID: %s)', ballot.name, ballot.mep_id)
+        instrumentation.count("votes compared")
+        for national_party, national_party_votes_counter in national_party_votes_counters:
+            logger.debug('%s: %s', national_party.name, national_party_votes_counter)
+            party_majority_vote = select_max_voted(national_party_votes_counter)
+            cohesion = calculate_cohesion(national_party_votes_counter) if party_majority_vote is not None else None
+            vote_comparison = VoteComparison(date_to_examine, roll_call_vote.id, voting_identifier, national_party, party_majority_vote, cohesion, political_group_majority_votes)
+            if debug_enabled:
+                for political_group_name, political_group_majority_vote, comparison_result in vote_comparison.political_group_comparison_results():
+                    logger.debug('%s: %s voted %s while %s with %s', comparison_result, national_party.name, party_majority_vote, political_group_name, political_group_majority_vote)
+            yield vote_comparison
+
+
+def compare_voting_cohesion_of_parties_at(date_to_examine: date, national_parties: list[NationalParty], eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, logger, offline=False, streaming=False, identity_resolver: Optional[MepIdentityResolver] = None) -> Optional[dict[NationalParty, VotingCohesionComparison]]:
+    vote_comparisons = iterate_vote_comparisons_at(date_to_examine, national_parties, eu_political_groups, mep_id_pers_id_pairings, logger, offline, streaming, identity_resolver)
+    if vote_comparisons is None:
+        return None
+    comparisons = {national_party: VotingCohesionComparison() for national_party in national_parties}
+    for vote_comparison in vote_comparisons:
+        comparisons[vote_comparison.national_party].add(vote_comparison)
+    return comparisons
+
+
+def compare_voting_cohesion_at(date_to_examine: date, national_party: NationalParty, eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, logger, offline=False, streaming=False, identity_resolver: Optional[MepIdentityResolver] = None) -> Optional[VotingCohesionComparison]:
+    comparisons = compare_voting_cohesion_of_parties_at(date_to_examine, [national_party], eu_political_groups, mep_id_pers_id_pairings, logger, offline, streaming, identity_resolver)
+    return comparisons[national_party] if comparisons is not None else None
+
+
+def compare_voting_cohesion_on_days(dates_to_examine: list[date], compare_voting_cohesion_on, workers=None) -> dict[date, VotingCohesionComparison]:
+    if workers is not None and workers > 1 and len(dates_to_examine) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map yields in submission order, so the merged result does not depend on scheduling
+            comparisons = executor.map(compare_voting_cohesion_on, dates_to_examine, chunksize=max(1, len(dates_to_examine) // (workers * 4)))
+            comparisons_by_day = dict(zip(dates_to_examine, comparisons))
+    else:
+        comparisons_by_day = {date_to_examine: compare_voting_cohesion_on(date_to_examine) for date_to_examine in dates_to_examine}
+    return {date_to_examine: comparison for date_to_examine, comparison in comparisons_by_day.items() if comparison is not None}
+
+
+def political_group_majorities_of(group_tallies_by_day: dict[date, list[dict[str, GroupTally]]], eu_political_groups: list[EUPoliticalGroup]) -> dict[str, np.ndarray]:
+    # majorities are indices into VOTES, like the ones taken from a vote matrix
+    vote_indices = {vote: vote_index for vote_index, vote in enumerate(VOTES)}
+    return {
+        political_group.name: np.array([
+            vote_indices.get(majority_vote_of_political_group(vote_group_tallies, political_group.ids), NO_MAJORITY)
+            for day in sorted(group_tallies_by_day)
+            for vote_group_tallies in group_tallies_by_day[day]
+        ], dtype=np.intp)
+        for political_group in eu_political_groups
     }
-    national_party_voting_cohesion_per_voting = []
-    non_coherent_votings = set()
-    date_to_examine = start_date
-    national_party_meps = national_party.members.get_members_at(date_to_examine)
-    while date_to_examine <= end_date:
-        filename = load_voting_data(date_to_examine, logger, offline)
-        if filename:
-            with open(filename) as file:
-                eu_parliamentary_group_of_party = find_group_ids_of_party(date_to_examine, eu_political_groups, national_party)
-                xml_tree = ElementTree.parse(file)
-                root = xml_tree.getroot()
-                for roll_call_vote_result in root:
-                    if roll_call_vote_result.tag == "RollCallVote.Result":
-                        voting_description = roll_call_vote_result.find("RollCallVote.Description.Text")
-                        voting_identifier = voting_description.text if voting_description.text and voting_description.text.strip() else f'{voting_description.find("a").text} {voting_description.find("a").tail}'    
-                        logger.debug(f'processing {voting_identifier}')
-                        national_party_votes_counter = extract_national_vote_counter(roll_call_vote_result, eu_parliamentary_group_of_party, national_party_meps, mep_id_pers_id_pairings)
-                        logger.debug(f'national party: {national_party_votes_counter}')
-                        party_majority_vote = select_max_voted(national_party_votes_counter)
-                        if party_majority_vote is not None:
-                            cohesion = calculate_cohesion(national_party_votes_counter)
-                            national_party_voting_cohesion_per_voting.append(calculate_cohesion(national_party_votes_counter))
-                            if cohesion < 100:
-                                non_coherent_votings.add(f'{date_to_examine} - {voting_identifier}')
-                            for political_group in eu_political_groups:
-                                political_group_votes_counter = extract_political_group_votes_counter(roll_call_vote_result, political_group)
-                                political_group_majority_vote = select_max_voted(political_group_votes_counter)
-                                if political_group_majority_vote is not None:
-                                    comparison_result = 'same' if political_group_majority_vote == party_majority_vote else 'different'
-                                    logger.debug(f'{comparison_result}: {national_party.name} voted {party_majority_vote} while {political_group.name} with {political_group_majority_vote}')
-                                    political_group_voting_comparisons[political_group.name][comparison_result] = political_group_voting_comparisons[political_group.name][comparison_result] + 1
-        date_to_examine = date_to_examine + timedelta(days=1)
-        if not offline:
-            sleep(1)
-    logger.info(political_group_voting_comparisons)
-    percentages = {political_group_name: political_group_voting_comparisons[political_group_name]['same'] / (political_group_voting_comparisons[political_group_name]['same'] + political_group_voting_comparisons[political_group_name]['different']) * 100 for political_group_name in EUPoliticalGroup.id_name_pairings}
-    logger.info(percentages)
-    fidesz_cohesion_overall_average = sum(national_party_voting_cohesion_per_voting) / len(national_party_voting_cohesion_per_voting)
-    logger.info(fidesz_cohesion_overall_average)
-    logger.info(f"{len(non_coherent_votings)} non-coherent votings: {non_coherent_votings}")
-
-
-def find_party_by_name_and_country(national_parties: Iterable[NationalParty], name: str, country: str):
-    parties_by_name_and_country = [party for party in national_parties if party.name == name and party.country == country]
-    assert len(parties_by_name_and_country) == 1
-    return parties_by_name_and_country[0]
-    
+
+
+def use_vectorized_comparison(vectorized: Optional[bool], streaming=False, workers=None) -> bool:
+    # the vote matrix holds the whole range in one process, so streaming and workers are left to the per-sitting loop
+    loop_only = streaming or (workers is not None and workers > 1)
+    if vectorized and loop_only:
+        raise ValueError("The vectorized comparison neither streams sittings nor runs on workers")
+    return not loop_only if vectorized is None else vectorized
+
+
+def compare_voting_cohesion_of_parties_on_days_vectorized(dates_to_examine: list[date], national_parties: list[NationalParty], eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, logger, offline=False, identity_resolver: Optional[MepIdentityResolver] = None) -> dict[date, dict[NationalParty, VotingCohesionComparison]]:
+    roll_call_votes_by_day = {date_to_examine: load_roll_call_votes(date_to_examine, logger, offline) for date_to_examine in dates_to_examine}
+    roll_call_votes_by_day = {date_to_examine: roll_call_votes for date_to_examine, roll_call_votes in roll_call_votes_by_day.items() if roll_call_votes is not None}
+    group_tallies_by_day = {date_to_examine: load_group_tallies(date_to_examine, logger, offline) for date_to_examine in roll_call_votes_by_day}
+    with instrumentation.stage("membership resolution"):
+        national_party_mep_ids_by_party = {
+            national_party: {date_to_examine: national_party.members.get_member_ids_at(date_to_examine) for date_to_examine in roll_call_votes_by_day}
+            for national_party in national_parties
+        }
+        group_ids_of_parties_by_day = {
+            national_party: {
+                date_to_examine: find_group_ids_of_party(date_to_examine, eu_political_groups, national_party) if national_party_mep_ids else []
+                for date_to_examine, national_party_mep_ids in national_party_mep_ids_by_day.items()
+            }
+            for national_party, national_party_mep_ids_by_day in national_party_mep_ids_by_party.items()
+        }
+    # the matrix is built once for every party, from the ballots cast in their groups only
+    political_group_ids = {group_id for group_ids_of_party_by_day in group_ids_of_parties_by_day.values() for group_ids in group_ids_of_party_by_day.values() for group_id in group_ids}
+    with instrumentation.stage("vote matrix"):
+        vote_matrix = build_vote_matrix(roll_call_votes_by_day, mep_id_pers_id_pairings, identity_resolver, political_group_ids)
+    with instrumentation.stage("counting"):
+        # the group majorities come from the tallies stored at ingest, like in compare_roll_call_votes
+        political_group_majorities = political_group_majorities_of(group_tallies_by_day, eu_political_groups)
+        comparisons_by_day = {date_to_examine: {} for date_to_examine in roll_call_votes_by_day}
+        for national_party in national_parties:
+            party_comparisons_by_day = compare_voting_cohesion_in_vote_matrix(vote_matrix, eu_political_groups, national_party_mep_ids_by_party[national_party], group_ids_of_parties_by_day[national_party], political_group_majorities)
+            for date_to_examine, comparisons in comparisons_by_day.items():
+                comparisons[national_party] = party_comparisons_by_day.get(date_to_examine, VotingCohesionComparison())
+    instrumentation.count("votes compared", len(vote_matrix.days))
+    return comparisons_by_day
+
+
+def compare_voting_cohesion_on_days_vectorized(dates_to_examine: list[date], national_party: NationalParty, eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, logger, offline=False, identity_resolver: Optional[MepIdentityResolver] = None) -> dict[date, VotingCohesionComparison]:
+    comparisons_by_day = compare_voting_cohesion_of_parties_on_days_vectorized(dates_to_examine, [national_party], eu_political_groups, mep_id_pers_id_pairings, logger, offline, identity_resolver)
+    return {date_to_examine: comparisons[national_party] for date_to_examine, comparisons in comparisons_by_day.items()}
+
+
+def log_voting_cohesion_comparison(logger, national_party: NationalParty, comparison: VotingCohesionComparison):
+    logger.info(f"{national_party.name} ({national_party.country})")
+    logger.info(comparison.political_group_voting_comparisons)
+    logger.info(comparison.agreement_percentages())
+    if comparison.national_party_voting_cohesion_per_voting:
+        logger.info(comparison.average_cohesion())
+    logger.info(f"{len(comparison.non_coherent_votings)} non-coherent votings")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('non-coherent votings: %s', sorted(comparison.non_coherent_votings))
+
+
+def compare_voting_cohesion_by_day(national_party: NationalParty, eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, logger, start_date=FIRST_DATE_OF_NINTH_EP_SESSION, end_date=date.today(), offline=False, streaming=False, workers=None, incremental=False, vectorized: Optional[bool] = None, identity_resolver: Optional[MepIdentityResolver] = None) -> dict[date, VotingCohesionComparison]:
+    vectorized = use_vectorized_comparison(vectorized, streaming, workers)
+    dates_to_examine = load_sitting_days(start_date, end_date, logger, offline)
+    compare_voting_cohesion_on_day = partial(
+        compare_voting_cohesion_at,
+        national_party=national_party,
+        eu_political_groups=eu_political_groups,
+        mep_id_pers_id_pairings=mep_id_pers_id_pairings,
+        logger=logger,
+        offline=offline,
+        streaming=streaming,
+        identity_resolver=identity_resolver,
+    )
+
+    def compare_voting_cohesion_on(dates_to_compute: list[date]) -> dict[date, VotingCohesionComparison]:
+        if vectorized:
+            return compare_voting_cohesion_on_days_vectorized(dates_to_compute, national_party, eu_political_groups, mep_id_pers_id_pairings, logger, offline, identity_resolver)
+        return compare_voting_cohesion_on_days(dates_to_compute, compare_voting_cohesion_on_day, workers)
+
+    if incremental:
+        result_store = load_result_store(national_party, fingerprint_membership_data(national_party, eu_political_groups, mep_id_pers_id_pairings, identity_resolver))
+        comparisons_by_day = result_store.comparisons_by_day
+        dates_to_compute = [date_to_examine for date_to_examine in dates_to_examine if date_to_examine not in comparisons_by_day]
+        instrumentation.count("result store hits", len(dates_to_examine) - len(dates_to_compute))
+        instrumentation.count("result store misses", len(dates_to_compute))
+        logger.info(f'{len(dates_to_examine) - len(dates_to_compute)} sitting days loaded from the result store, {len(dates_to_compute)} to process')
+        comparisons_by_day.update(compare_voting_cohesion_on(dates_to_compute))
+        save_result_store(national_party, result_store)
+    else:
+        comparisons_by_day = compare_voting_cohesion_on(dates_to_examine)
+    return {date_to_examine: comparisons_by_day[date_to_examine] for date_to_examine in dates_to_examine if date_to_examine in comparisons_by_day}
+
+
+def compare_voting_cohesion_with_ep_groups(national_party: NationalParty, eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, start_date=FIRST_DATE_OF_NINTH_EP_SESSION, end_date=date.today(), offline=False, streaming=False, workers=None, incremental=False, vectorized: Optional[bool] = None, identity_resolver: Optional[MepIdentityResolver] = None):
+    logger = create_logger()
+    comparisons_by_day = compare_voting_cohesion_by_day(national_party, eu_political_groups, mep_id_pers_id_pairings, logger, start_date, end_date, offline, streaming, workers, incremental, vectorized, identity_resolver)
+    comparison = VotingCohesionComparison()
+    for day_comparison in comparisons_by_day.values():
+        comparison.merge(day_comparison)
+    log_voting_cohesion_comparison(logger, national_party, comparison)
+    return comparison
+
+
+def compare_voting_cohesion_series(national_party: NationalParty, eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, start_date=FIRST_DATE_OF_NINTH_EP_SESSION, end_date=date.today(), bucket="month", rolling_window: Optional[timedelta] = None, offline=False, streaming=False, workers=None, incremental=False, vectorized: Optional[bool] = None, identity_resolver: Optional[MepIdentityResolver] = None) -> CohesionSeries:
+    logger = create_logger()
+    comparisons_by_day = compare_voting_cohesion_by_day(national_party, eu_political_groups, mep_id_pers_id_pairings, logger, start_date, end_date, offline, streaming, workers, incremental, vectorized, identity_resolver)
+    cohesion_series = create_cohesion_series(comparisons_by_day)
+    for cohesion_summary in cohesion_series.bucketed(bucket):
+        logger.info(cohesion_summary)
+    if rolling_window is not None:
+        for cohesion_summary in cohesion_series.rolling(rolling_window):
+            logger.info(cohesion_summary)
+    return cohesion_series
+
+
+def compare_voting_cohesion_of_parties_with_ep_groups(national_parties: Iterable[NationalParty], eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, start_date=FIRST_DATE_OF_NINTH_EP_SESSION, end_date=date.today(), offline=False, streaming=False, workers=None, incremental=False, vectorized: Optional[bool] = None, identity_resolver: Optional[MepIdentityResolver] = None) -> dict[NationalParty, VotingCohesionComparison]:
+    logger = create_logger()
+    national_parties = list(national_parties)
+    vectorized = use_vectorized_comparison(vectorized, streaming, workers)
+    dates_to_examine = load_sitting_days(start_date, end_date, logger, offline)
+    compare_voting_cohesion_of_parties_on_day = partial(
+        compare_voting_cohesion_of_parties_at,
+        national_parties=national_parties,
+        eu_political_groups=eu_political_groups,
+        mep_id_pers_id_pairings=mep_id_pers_id_pairings,
+        logger=logger,
+        offline=offline,
+        streaming=streaming,
+        identity_resolver=identity_resolver,
+    )
+
+    def compare_voting_cohesion_of_parties_on(dates_to_compute: list[date]) -> dict[date, dict[NationalParty, VotingCohesionComparison]]:
+        if vectorized:
+            return compare_voting_cohesion_of_parties_on_days_vectorized(dates_to_compute, national_parties, eu_political_groups, mep_id_pers_id_pairings, logger, offline, identity_resolver)
+        return compare_voting_cohesion_on_days(dates_to_compute, compare_voting_cohesion_of_parties_on_day, workers)
+
+    if incremental:
+        result_stores = {
+            national_party: load_result_store(national_party, fingerprint_membership_data(national_party, eu_political_groups, mep_id_pers_id_pairings, identity_resolver))
+            for national_party in national_parties
+        }
+        # a sitting is compared again only if some party has no stored result for it, and then for every party at once
+        dates_to_compute = [date_to_examine for date_to_examine in dates_to_examine if any(date_to_examine not in result_store.comparisons_by_day for result_store in result_stores.values())]
+        instrumentation.count("result store hits", len(dates_to_examine) - len(dates_to_compute))
+        instrumentation.count("result store misses", len(dates_to_compute))
+        logger.info(f'{len(dates_to_examine) - len(dates_to_compute)} sitting days loaded from the result stores, {len(dates_to_compute)} to process')
+        computed_comparisons_by_day = compare_voting_cohesion_of_parties_on(dates_to_compute)
+        for national_party, result_store in result_stores.items():
+            for date_to_examine, computed_comparisons in computed_comparisons_by_day.items():
+                result_store.comparisons_by_day.setdefault(date_to_examine, computed_comparisons[national_party])
+            save_result_store(national_party, result_store)
+        comparisons_by_day = {
+            date_to_examine: {national_party: result_store.comparisons_by_day[date_to_examine] for national_party, result_store in result_stores.items() if date_to_examine in result_store.comparisons_by_day}
+            for date_to_examine in dates_to_examine
+        }
+    else:
+        comparisons_by_day = compare_voting_cohesion_of_parties_on(dates_to_examine)
+    comparisons = {national_party: VotingCohesionComparison() for national_party in national_parties}
+    for date_to_examine in dates_to_examine:
+        for national_party, comparison in comparisons_by_day.get(date_to_examine, {}).items():
+            comparisons[national_party].merge(comparison)
+    for national_party, comparison in comparisons.items():
+        log_voting_cohesion_comparison(logger, national_party, comparison)
+    return comparisons
+
+
+def compare_pairwise_agreement(national_parties: Iterable[NationalParty], mep_id_pers_id_pairings, start_date=FIRST_DATE_OF_NINTH_EP_SESSION, end_date=date.today(), offline=False, include_meps=False, identity_resolver: Optional[MepIdentityResolver] = None, output_folder: Optional[str] = None) -> tuple[AgreementMatrix, Optional[AgreementMatrix]]:
+    logger = create_logger()
+    dates_to_examine = load_sitting_days(start_date, end_date, logger, offline)
+    roll_call_votes_by_day = {date_to_examine: load_roll_call_votes(date_to_examine, logger, offline) for date_to_examine in dates_to_examine}
+    roll_call_votes_by_day = {date_to_examine: roll_call_votes for date_to_examine, roll_call_votes in roll_call_votes_by_day.items() if roll_call_votes is not None}
+    vote_matrix = build_vote_matrix(roll_call_votes_by_day, mep_id_pers_id_pairings, identity_resolver)
+    logger.info(f'computing pairwise agreement over {len(vote_matrix.days)} votes and {len(vote_matrix.mep_ids)} MEPs')
+    party_agreement = party_agreement_matrix(vote_matrix, national_parties)
+    mep_agreement = mep_agreement_matrix(vote_matrix) if include_meps else None
+    if output_folder is not None:
+        makedirs(output_folder, exist_ok=True)
+        save_agreement_matrix(party_agreement, f"{output_folder}/party_agreement.npz")
+        if mep_agreement is not None:
+            save_agreement_matrix(mep_agreement, f"{output_folder}/mep_agreement.npz")
+    return party_agreement, mep_agreement
+
+
+def export_vote_comparisons(national_parties: Iterable[NationalParty], eu_political_groups: list[EUPoliticalGroup], mep_id_pers_id_pairings, vote_comparison_writer: VoteComparisonWriter, start_date=FIRST_DATE_OF_NINTH_EP_SESSION, end_date=date.today(), offline=False, streaming=False, identity_resolver: Optional[MepIdentityResolver] = None) -> int:
+    logger = create_logger()
+    national_parties = list(national_parties)
+    # rows go to the writer as each sitting is compared, so nothing accumulates over the date range
+    for date_to_examine in load_sitting_days(start_date, end_date, logger, offline):
+        vote_comparisons = iterate_vote_comparisons_at(date_to_examine, national_parties, eu_political_groups, mep_id_pers_id_pairings, logger, offline, streaming, identity_resolver)
+        if vote_comparisons is not None:
+            for vote_comparison in vote_comparisons:
+                vote_comparison_writer.write(vote_comparison)
+    logger.info(f'exported {vote_comparison_writer.row_count} vote comparisons')
+    return vote_comparison_writer.row_count
+
+
+def find_parties_by_name_and_country(registry: EntityRegistry, names: Iterable[str], country: str, logger) -> list[NationalParty]:
+    parties = []
+    for name in names:
+        party = registry.find_party(name, country)
+        if party is None:
+            # a tracked party can be missing from the MEP data, e.g. before its first MEP took office
+            logger.warning(f"No national party named {name} found in {country}, skipping it")
+        else:
+            parties.append(party)
+    return parties
+
 
 if __name__ == "__main__":
-    eu_political_groups, national_parties = load_mep_data()
-    mep_id_pers_id_pairings = load_mep_ids()
-    party = find_party_by_name_and_country(national_parties, CHANCE_NAME, 'Hungary')
-    compare_voting_cohesion_with_ep_groups(party, eu_political_groups, mep_id_pers_id_pairings, date(2022, 10, 18), date.today(), True)
+    argument_parser = ArgumentParser(description="Compare the voting cohesion of the tracked Hungarian parties with the EP political groups")
+    argument_parser.add_argument("--instrument", action="store_true", help="report per-stage timings and counters at the end of the run")
+    argument_parser.add_argument("--profile", choices=PROFILERS, help="profile the run and report the hottest functions or allocations")
+    arguments = argument_parser.parse_args()
+    enable_instrumentation(arguments.instrument)
+    with profiled(arguments.profile) as profile_report, instrumentation.stage("total"):
+        with instrumentation.stage("loading MEP data"):
+            eu_political_groups, national_parties = load_mep_data()
+            registry = EntityRegistry(national_parties, eu_political_groups)
+            mep_id_pers_id_pairings = load_mep_ids()
+        parties = find_parties_by_name_and_country(registry, TRACKED_PARTY_NAMES, 'Hungary', create_logger())
+        identity_resolver = MepIdentityResolver(registry.meps, registry.political_groups)
+        compare_voting_cohesion_of_parties_with_ep_groups(parties, registry.political_groups, mep_id_pers_id_pairings, date(2022, 10, 18), date.today(), True, incremental=True, identity_resolver=identity_resolver)
+    if arguments.instrument:
+        create_logger().info('%s', instrumentation.report())
+    if arguments.profile:
+        create_logger().info('%s', profile_report.getvalue())
@@ -1,58 +1,113 @@
 from typing import (
     Iterable,
+    Iterator,
+    NamedTuple,
     Optional,
-    Union,
     TypeVar,
     Generic,
 )
 
+from bisect import bisect_right
+from collections import Counter
 from datetime import date
+from sys import intern
+
+
+def _state_of(state, *attribute_names) -> tuple:
+    # pickles written before the models were slotted carry the instance __dict__
+    return tuple(state[attribute_name] for attribute_name in attribute_names) if isinstance(state, dict) else state
+
+
+def _ordinal_of(date_to_convert: Optional[date]) -> Optional[int]:
+    return date_to_convert.toordinal() if date_to_convert is not None else None
+
+
+def _interned(value):
+    return intern(value) if isinstance(value, str) else value
+
+
+def _date_of(ordinal: Optional[int]) -> Optional[date]:
+    return date.fromordinal(ordinal) if ordinal is not None else None
 
 
 class MEP:
+    __slots__ = ('id', 'name', 'country')
     id: str
     name: str
     country: str
 
     def __init__(self, id: str, name: str, country: str):
-        self.id = id
+        # ballot ids are interned by the roll call loader, so lookups compare by identity
+        self.id = _interned(id)
         self.name = name
-        self.country = country
+        self.country = _interned(country)
 
-    def __key(self):
-        return (self.id)
+    def __getstate__(self):
+        return (self.id, self.name, self.country)
+
+    def __setstate__(self, state):
+        self.__init__(*_state_of(state, 'id', 'name', 'country'))
 
     def __hash__(self):
-        return hash(self.__key())
+        return hash(self.id)
 
     def __eq__(self, other):
         if isinstance(other, type(self)):
-            return self.__key() == other.__key()
+            return self.id == other.id
         return NotImplemented
 
 
 class Period:
-    start_date: date
-    end_date: Union[date, None]
+    __slots__ = ('start_ordinal', 'end_ordinal')
+    start_ordinal: Optional[int]
+    end_ordinal: Optional[int]
 
     def __init__(self, start_date: date, end_date=None):
-        self.start_date = start_date
-        self.end_date = end_date
+        self.start_ordinal = _ordinal_of(start_date)
+        self.end_ordinal = _ordinal_of(end_date)
+
+    @classmethod
+    def from_ordinals(cls, start_ordinal: Optional[int], end_ordinal: Optional[int] = None) -> "Period":
+        period = cls.__new__(cls)
+        period.start_ordinal = start_ordinal
+        period.end_ordinal = end_ordinal
+        return period
+
+    @property
+    def start_date(self) -> Optional[date]:
+        return _date_of(self.start_ordinal)
+
+    @property
+    def end_date(self) -> Optional[date]:
+        return _date_of(self.end_ordinal)
+
+    def __getstate__(self):
+        return (self.start_date, self.end_date)
+
+    def __setstate__(self, state):
+        self.__init__(*_state_of(state, 'start_date', 'end_date'))
 
     def is_date_in_period(self, date_to_check: date) -> bool:
-        return date_to_check is not None and date_to_check >= self.start_date and (self.end_date is None or date_to_check <= self.end_date)
+        if date_to_check is None:
+            return False
+        return self._is_ordinal_in_period(date_to_check.toordinal())
+
+    def _is_ordinal_in_period(self, ordinal_to_check: Optional[int]) -> bool:
+        if ordinal_to_check is None:
+            return False
+        return ordinal_to_check >= self.start_ordinal and (self.end_ordinal is None or ordinal_to_check <= self.end_ordinal)
 
     def is_other_period_in_period(self, period_to_check) -> bool:
         return (
-            self.start_date is None
-            or self.is_date_in_period(period_to_check.start_date)
+            self.start_ordinal is None
+            or self._is_ordinal_in_period(period_to_check.start_ordinal)
         ) and (
-            self.end_date is None
-            or self.is_date_in_period(period_to_check.end_date)
+            self.end_ordinal is None
+            or self._is_ordinal_in_period(period_to_check.end_ordinal)
         )
 
     def __key(self):
-        return (self.start_date, self.end_date)
+        return (self.start_ordinal, self.end_ordinal)
 
     def __hash__(self):
         return hash(self.__key())
@@ -64,9 +119,11 @@ class Period:
 
 
 T = TypeVar('T')
+MAX_ORDINAL = date.max.toordinal()
 
 
 class Membership(Generic[T]):
+    __slots__ = ('member', 'period')
     member: T
     period: Period
 
@@ -74,39 +131,109 @@ class Membership(Generic[T]):
         self.member = member
         self.period = period
 
+    def __getstate__(self):
+        return (self.member, self.period)
+
+    def __setstate__(self, state):
+        self.member, self.period = _state_of(state, 'member', 'period')
+
 
 class NationalPartyMembership(Membership[MEP]):
-    pass
+    __slots__ = ()
 
 
 class Memberships(Generic[T]):
     _memberships: list[Membership[T]]
+    _change_ordinals: Optional[list[int]]
+    _members_by_interval: Optional[list[list[T]]]
+    _member_ids_by_interval: dict[int, frozenset]
 
     def __init__(self):
         self._memberships = []
+        self._reset_index()
+
+    def _reset_index(self):
+        self._change_ordinals = None
+        self._members_by_interval = None
+        self._member_ids_by_interval = {}
+
+    def __getstate__(self):
+        return {'_memberships': self._memberships}
+
+    def __setstate__(self, state):
+        self._memberships = state['_memberships']
+        self._reset_index()
+
+    def _build_index(self):
+        # membership only changes at these days, so every day between two of them shares one snapshot
+        starts, ends = {}, {}
+        for position, membership in enumerate(self._memberships):
+            start_ordinal = membership.period.start_ordinal or 1
+            starts.setdefault(start_ordinal, []).append(position)
+            end_ordinal = membership.period.end_ordinal
+            if end_ordinal is not None and end_ordinal < MAX_ORDINAL:
+                ends.setdefault(end_ordinal + 1, []).append(position)
+        self._change_ordinals = sorted(starts.keys() | ends.keys())
+        self._members_by_interval = [[]]
+        active_positions = set()
+        for change_ordinal in self._change_ordinals:
+            active_positions.difference_update(ends.get(change_ordinal, ()))
+            active_positions.update(starts.get(change_ordinal, ()))
+            self._members_by_interval.append([self._memberships[position].member for position in sorted(active_positions)])
+
+    def _interval_of(self, date_to_check: date) -> int:
+        if self._change_ordinals is None:
+            self._build_index()
+        return bisect_right(self._change_ordinals, date_to_check.toordinal())
 
     def get_members_at(self, date_to_check: date):
-        return [membership.member for membership in self._memberships if membership.period.is_date_in_period(date_to_check)]
+        if date_to_check is None:
+            return []
+        interval = self._interval_of(date_to_check)
+        return list(self._members_by_interval[interval])
+
+    def get_member_ids_at(self, date_to_check: date) -> frozenset:
+        if date_to_check is None:
+            return frozenset()
+        interval = self._interval_of(date_to_check)
+        if interval not in self._member_ids_by_interval:
+            self._member_ids_by_interval[interval] = frozenset(member.id for member in self._members_by_interval[interval])
+        return self._member_ids_by_interval[interval]
+
+    def get_members_at_dates(self, dates_to_check: Iterable[date]) -> dict[date, list[T]]:
+        return {date_to_check: self.get_members_at(date_to_check) for date_to_check in dates_to_check}
+
+    def __iter__(self) -> Iterator[Membership[T]]:
+        return iter(self._memberships)
     
     def add(self, membership: Membership[T]):
         self._memberships.append(membership)
+        self._reset_index()
 
     def set_membership_period_for(self, member: T, period: Period):
         memberships = [membership for membership in self._memberships if membership.member == member]
         assert len(Membership) == 1
         memberships[0].period = period
+        self._reset_index()
 
 
 class NationalParty:
+    __slots__ = ('name', 'country', 'members')
     name: str
     country: Optional[str]
     members: Memberships[MEP]
 
     def __init__(self, name, country=None):
         self.name = name
-        self.country = country
+        self.country = _interned(country)
         self.members = Memberships()
 
+    def __getstate__(self):
+        return (self.name, self.country, self.members)
+
+    def __setstate__(self, state):
+        self.name, self.country, self.members = _state_of(state, 'name', 'country', 'members')
+
     def __key(self):
         return (self.name, self.country)
 
@@ -171,12 +298,11 @@ class EUPoliticalGroup:
         return found_national_parties[0] if len(found_national_parties) else None
 
     def is_party_a_member(self, national_party: NationalParty, member_at=date.today()) -> bool:
-        party_members = national_party.members.get_members_at(member_at)
-        return any(self.is_mep_a_member(party_member) for party_member in party_members)
+        party_member_ids = national_party.members.get_member_ids_at(member_at)
+        return not party_member_ids.isdisjoint(self.members.get_member_ids_at(member_at))
     
     def is_mep_a_member(self, mep: MEP, member_at=date.today()) -> bool:
-        group_members = self.members.get_members_at(member_at)
-        return mep in group_members
+        return mep.id in self.members.get_member_ids_at(member_at)
 
     def has_name(self, name: str) -> bool:
         return self.name == name or (self.aliases is not None and name in self.aliases)
@@ -186,3 +312,89 @@ class EUPoliticalGroup:
         ids = self.id_name_pairings[name]
         assert ids is not None
         return ids
+
+
+class Ballot(NamedTuple):
+    political_group_id: str
+    pers_id: Optional[str]
+    mep_id: str
+    name: str
+
+
+class GroupTally(NamedTuple):
+    counts: tuple[int, ...]
+    majority_vote: Optional[str]
+
+
+class RollCallVote:
+    id: Optional[str]
+    description: str
+    results: dict[str, dict[str, tuple[Ballot, ...]]]
+
+    def __init__(self, id: Optional[str], description: str, results: dict[str, dict[str, tuple[Ballot, ...]]]):
+        self.id = id
+        self.description = description
+        self.results = results
+
+    def ballots(self) -> Iterator[Ballot]:
+        for political_group_results in self.results.values():
+            for ballots in political_group_results.values():
+                yield from ballots
+
+
+class VoteComparison(NamedTuple):
+    sitting_date: date
+    roll_call_vote_id: Optional[str]
+    description: str
+    national_party: NationalParty
+    party_majority_vote: Optional[str]
+    cohesion: Optional[float]
+    political_group_majority_votes: dict[str, Optional[str]]
+
+    def political_group_comparison_results(self) -> Iterator[tuple[str, str, str]]:
+        if self.party_majority_vote is None:
+            return
+        for political_group_name, political_group_majority_vote in self.political_group_majority_votes.items():
+            if political_group_majority_vote is not None:
+                yield political_group_name, political_group_majority_vote, 'same' if political_group_majority_vote == self.party_majority_vote else 'different'
+
+
+class VotingCohesionComparison:
+    political_group_voting_comparisons: dict[str, Counter]
+    national_party_voting_cohesion_per_voting: list[float]
+    non_coherent_votings: set[str]
+
+    def __init__(self):
+        self.political_group_voting_comparisons = {
+            political_group_name: Counter(same=0, different=0) for political_group_name in EUPoliticalGroup.id_name_pairings
+        }
+        self.national_party_voting_cohesion_per_voting = []
+        self.non_coherent_votings = set()
+
+    def add(self, vote_comparison):
+        if vote_comparison.party_majority_vote is None:
+            return
+        self.national_party_voting_cohesion_per_voting.append(vote_comparison.cohesion)
+        if vote_comparison.cohesion < 100:
+            self.non_coherent_votings.add(f'{vote_comparison.sitting_date} - {vote_comparison.description}')
+        for political_group_name, _, comparison_result in vote_comparison.political_group_comparison_results():
+            self.political_group_voting_comparisons.setdefault(political_group_name, Counter(same=0, different=0))[comparison_result] += 1
+
+    def agreement_percentages(self) -> dict[str, float]:
+        return {
+            political_group_name: comparison_counter['same'] / comparison_counter.total() * 100
+            for political_group_name, comparison_counter in self.political_group_voting_comparisons.items()
+            if comparison_counter.total() > 0
+        }
+
+    def average_cohesion(self) -> Optional[float]:
+        if not self.national_party_voting_cohesion_per_voting:
+            return None
+        return sum(self.national_party_voting_cohesion_per_voting) / len(self.national_party_voting_cohesion_per_voting)
+
+    def merge(self, other):
+        for political_group_name, comparison_counter in other.political_group_voting_comparisons.items():
+            self.political_group_voting_comparisons.setdefault(political_group_name, Counter(same=0, different=0)).update(comparison_counter)
+        self.national_party_voting_cohesion_per_voting.extend(other.national_party_voting_cohesion_per_voting)
+        self.non_coherent_votings.update(other.non_coherent_votings)
+        return self
@@ -0,0 +1,6 @@
+import re
+
+
+def extract_last_name(mep_name):
+    # David McAllister is the only MEP with non-capitalized last name
+    return re.findall(r" [^a-z]+$| McALLISTER$", mep_name)[0][1:]
@@ -0,0 +1,59 @@
+from typing import Iterable, Optional
+
+from models import MEP, EUPoliticalGroup, NationalParty
+
+
+class EntityRegistry:
+    _parties_by_name_and_country: dict[tuple[str, Optional[str]], NationalParty]
+    _political_groups_by_name: dict[str, EUPoliticalGroup]
+    _political_groups_by_id: dict[str, EUPoliticalGroup]
+
+    def __init__(self, national_parties: Iterable[NationalParty] = (), political_groups: Iterable[EUPoliticalGroup] = ()):
+        self._parties_by_name_and_country = {}
+        self._political_groups_by_name = {}
+        self._political_groups_by_id = {}
+        for national_party in national_parties:
+            self.add_party(national_party)
+        for political_group in political_groups:
+            self.add_political_group(political_group)
+
+    @property
+    def national_parties(self) -> set[NationalParty]:
+        return set(self._parties_by_name_and_country.values())
+
+    @property
+    def political_groups(self) -> set[EUPoliticalGroup]:
+        return set(self._political_groups_by_name.values())
+
+    @property
+    def meps(self) -> set[MEP]:
+        return {
+            membership.member
+            for owner in [*self._parties_by_name_and_country.values(), *self._political_groups_by_name.values()]
+            for membership in owner.members
+        }
+
+    def add_party(self, national_party: NationalParty) -> NationalParty:
+        return self._parties_by_name_and_country.setdefault((national_party.name, national_party.country), national_party)
+
+    def find_party(self, name: str, country: Optional[str]) -> Optional[NationalParty]:
+        return self._parties_by_name_and_country.get((name, country))
+
+    def find_or_add_party(self, name: str, country: Optional[str]) -> NationalParty:
+        national_party = self.find_party(name, country)
+        return national_party if national_party is not None else self.add_party(NationalParty(name, country))
+
+    def find_parties_of_country(self, country: str) -> list[NationalParty]:
+        return [national_party for (_, party_country), national_party in self._parties_by_name_and_country.items() if party_country == country]
+
+    def add_political_group(self, political_group: EUPoliticalGroup):
+        for name in [political_group.name, *(political_group.aliases or [])]:
+            assert self._political_groups_by_name.setdefault(name, political_group) is political_group, f"Political group name {name} is ambiguous"
+        for political_group_id in political_group.ids:
+            assert self._political_groups_by_id.setdefault(political_group_id, political_group) is political_group, f"Political group ID {political_group_id} is ambiguous"
+
+    def find_political_group_by_name(self, name: str) -> Optional[EUPoliticalGroup]:
+        return self._political_groups_by_name.get(name)
+
+    def find_political_group_by_id(self, political_group_id: str) -> Optional[EUPoliticalGroup]:
+        return self._political_groups_by_id.get(political_group_id)
@@ -0,0 +1,138 @@
+from abc import ABC, abstractmethod
+import csv
+from glob import glob
+import json
+from os import makedirs, replace
+from os.path import exists, join
+
+import numpy as np
+
+from models import VoteComparison
+
+VOTE_COMPARISON_COLUMNS = ("sitting_date", "roll_call_vote_id", "description", "national_party", "country", "party_majority_vote", "cohesion")
+# a row group of this size keeps the buffered columns in the low megabytes
+COLUMNAR_ROW_GROUP_SIZE = 10000
+
+
+def vote_comparison_row(vote_comparison: VoteComparison, political_group_names: list[str]) -> list:
+    return [
+        vote_comparison.sitting_date.isoformat(),
+        vote_comparison.roll_call_vote_id,
+        vote_comparison.description,
+        vote_comparison.national_party.name,
+        vote_comparison.national_party.country,
+        vote_comparison.party_majority_vote,
+        vote_comparison.cohesion,
+    ] + [vote_comparison.political_group_majority_votes.get(political_group_name) for political_group_name in political_group_names]
+
+
+class VoteComparisonWriter(ABC):
+    political_group_names: list[str]
+    columns: list[str]
+    row_count: int
+
+    def __init__(self, political_group_names: list[str]):
+        self.political_group_names = list(political_group_names)
+        self.columns = list(VOTE_COMPARISON_COLUMNS) + self.political_group_names
+        self.row_count = 0
+
+    def write(self, vote_comparison: VoteComparison):
+        self.write_row(vote_comparison_row(vote_comparison, self.political_group_names))
+        self.row_count += 1
+
+    @abstractmethod
+    def write_row(self, row: list):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CsvVoteComparisonWriter(VoteComparisonWriter):
+    def __init__(self, file_uri: str, political_group_names: list[str]):
+        super().__init__(political_group_names)
+        self._file = open(file_uri, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.columns)
+
+    def write_row(self, row: list):
+        self._writer.writerow(["" if value is None else value for value in row])
+
+    def close(self):
+        self._file.close()
+
+
+class JsonLinesVoteComparisonWriter(VoteComparisonWriter):
+    def __init__(self, file_uri: str, political_group_names: list[str]):
+        super().__init__(political_group_names)
+        self._file = open(file_uri, "w", encoding="utf-8")
+
+    def write_row(self, row: list):
+        self._file.write(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False))
+        self._file.write("\n")
+
+    def close(self):
+        self._file.close()
+
+
+class ColumnarVoteComparisonWriter(VoteComparisonWriter):
+    def __init__(self, folder: str, political_group_names: list[str], row_group_size=COLUMNAR_ROW_GROUP_SIZE):
+        super().__init__(political_group_names)
+        if not exists(folder):
+            makedirs(folder)
+        self.folder = folder
+        self.row_group_size = row_group_size
+        self._part_count = 0
+        self._buffered_rows = []
+
+    def write_row(self, row: list):
+        self._buffered_rows.append(row)
+        if len(self._buffered_rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffered_rows:
+            return
+        columns = {}
+        for column, values in zip(self.columns, zip(*self._buffered_rows)):
+            if column == "cohesion":
+                columns[column] = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+            else:
+                columns[column] = np.array(["" if value is None else value for value in values], dtype=str)
+        # a row group is written to a temporary name first, so a reader never sees half a part
+        part_file_uri = join(self.folder, f"part-{self._part_count:05d}.npz")
+        with open(f"{part_file_uri}.part", "wb") as part_file:
+            np.savez_compressed(part_file, **columns)
+        replace(f"{part_file_uri}.part", part_file_uri)
+        self._part_count += 1
+        self._buffered_rows = []
+
+    def close(self):
+        self.flush()
+
+
+def load_columnar_vote_comparisons(folder: str) -> dict[str, np.ndarray]:
+    parts = []
+    for part_file_uri in sorted(glob(join(folder, "part-*.npz"))):
+        with np.load(part_file_uri) as part_file:
+            parts.append({column: part_file[column] for column in part_file.files})
+    if not parts:
+        return {}
+    return {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+
+
+EXPORT_WRITERS = {
+    "csv": CsvVoteComparisonWriter,
+    "jsonl": JsonLinesVoteComparisonWriter,
+    "columnar": ColumnarVoteComparisonWriter,
+}
+
+
+def create_vote_comparison_writer(export_format: str, target_uri: str, political_group_names: list[str]) -> VoteComparisonWriter:
+    return EXPORT_WRITERS[export_format](target_uri, political_group_names)
@@ -0,0 +1,72 @@
+from datetime import date
+from hashlib import sha256
+from os import makedirs, replace
+from os.path import exists
+import pickle
+from typing import Iterable, Optional
+
+from identity_resolver import MepIdentityResolver
+from models import MEP, EUPoliticalGroup, Memberships, NationalParty, VotingCohesionComparison
+
+RESULT_STORE_FOLDER = "cache/results"
+# bumped whenever the comparisons are computed differently, so stores of older code are recomputed
+RESULT_STORE_SCHEMA_VERSION = 1
+
+
+class VotingCohesionResultStore:
+    fingerprint: str
+    comparisons_by_day: dict[date, VotingCohesionComparison]
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.comparisons_by_day = dict()
+
+
+def _membership_rows_of(owner_key, memberships: Memberships) -> Iterable[tuple]:
+    for membership in memberships:
+        member = membership.member
+        member_key = member.id if isinstance(member, MEP) else (member.name, member.country)
+        yield (str(owner_key), str(member_key), str(membership.period.start_date), str(membership.period.end_date))
+
+
+def fingerprint_membership_data(national_party: NationalParty, eu_political_groups: Iterable[EUPoliticalGroup], mep_id_pers_id_pairings: dict, identity_resolver: Optional[MepIdentityResolver] = None) -> str:
+    rows = list(_membership_rows_of((national_party.name, national_party.country), national_party.members))
+    for political_group in eu_political_groups:
+        rows.extend(_membership_rows_of((political_group.name, tuple(political_group.ids)), political_group.members))
+    rows.extend(("pairing", str(mep_id), str(pers_id)) for mep_id, pers_id in mep_id_pers_id_pairings.items())
+    if identity_resolver is not None:
+        rows.extend(("name", name_variant, str(mep_id)) for name_variant, mep_id in identity_resolver.index_entries())
+    rows.append(("schema_version", str(RESULT_STORE_SCHEMA_VERSION)))
+    digest = sha256()
+    for row in sorted(rows):
+        digest.update("\x1f".join(row).encode())
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def _result_store_file_uri(national_party: NationalParty) -> str:
+    party_key = sha256(f"{national_party.name}|{national_party.country}".encode()).hexdigest()[:16]
+    return f"{RESULT_STORE_FOLDER}/{party_key}.pkl"
+
+
+def load_result_store(national_party: NationalParty, fingerprint: str) -> VotingCohesionResultStore:
+    result_store_file_uri = _result_store_file_uri(national_party)
+    if exists(result_store_file_uri):
+        try:
+            with open(result_store_file_uri, "rb") as result_store_file:
+                result_store = pickle.load(result_store_file)
+        except (AttributeError, EOFError, ImportError, pickle.UnpicklingError):
+            result_store = None
+        if getattr(result_store, "fingerprint", None) == fingerprint:
+            return result_store
+    return VotingCohesionResultStore(fingerprint)
+
+
+def save_result_store(national_party: NationalParty, result_store: VotingCohesionResultStore):
+    if not exists(RESULT_STORE_FOLDER):
+        makedirs(RESULT_STORE_FOLDER)
+    result_store_file_uri = _result_store_file_uri(national_party)
+    # a run that dies mid-write leaves the previous store in place
+    with open(f"{result_store_file_uri}.part", "wb") as result_store_file:
+        pickle.dump(result_store, result_store_file)
+    replace(f"{result_store_file_uri}.part", result_store_file_uri)
@@ -0,0 +1,69 @@
+from datetime import date
+from tempfile import TemporaryDirectory
+import unittest
+
+import numpy as np
+
+from agreement_matrix import load_agreement_matrix, mep_agreement_matrix, pairwise_agreement, party_agreement_matrix, save_agreement_matrix
+from models import MEP, Ballot, Membership, NationalParty, Period, RollCallVote
+from vote_matrix import build_vote_matrix
+
+
+def roll_call_vote_of(ballots_by_vote: dict[str, list[str]]) -> RollCallVote:
+    results = {vote: {} for vote in ["For", "Against", "Abstention"]}
+    for vote, pers_ids in ballots_by_vote.items():
+        results[vote]["PPE"] = tuple(Ballot("PPE", pers_id, f"MepId{pers_id}", pers_id) for pers_id in pers_ids)
+    return RollCallVote(None, "vote", results)
+
+
+class TestPairwiseAgreement(unittest.TestCase):
+
+    def test_pairwise_agreement_matches_pairwise_loop(self):
+        codes = np.random.default_rng(0).integers(0, 4, size=(50, 7), dtype=np.int8)
+        agreements, overlaps = pairwise_agreement(codes, block_rows=8)
+        for first in range(7):
+            for second in range(7):
+                both_voted = (codes[:, first] != 0) & (codes[:, second] != 0)
+                self.assertEqual(both_voted.sum(), overlaps[first, second])
+                self.assertEqual((both_voted & (codes[:, first] == codes[:, second])).sum(), agreements[first, second])
+
+    def test_pairwise_agreement_does_not_depend_on_blocks(self):
+        codes = np.random.default_rng(1).integers(0, 4, size=(100, 5), dtype=np.int8)
+        for expected, actual in zip(pairwise_agreement(codes, block_rows=1000), pairwise_agreement(codes, block_rows=7)):
+            np.testing.assert_array_equal(expected, actual)
+
+
+class TestAgreementMatrices(unittest.TestCase):
+
+    def setUp(self):
+        self.vote_matrix = build_vote_matrix({
+            date(2022, 10, 18): [
+                roll_call_vote_of({"For": ["1", "2", "3"], "Against": ["4"]}),
+                roll_call_vote_of({"For": ["1", "4"], "Against": ["2", "3"]}),
+            ],
+            date(2022, 10, 19): [
+                roll_call_vote_of({"Against": ["1", "3"], "Abstention": ["2", "4"]}),
+            ],
+        }, {})
+        self.alpha, self.beta = NationalParty("alpha", "Hungary"), NationalParty("beta", "Hungary")
+        for pers_id in ["1", "2"]:
+            self.alpha.members.add(Membership(MEP(pers_id, pers_id, "Hungary"), Period(date(2019, 7, 2))))
+        self.beta.members.add(Membership(MEP("3", "3", "Hungary"), Period(date(2019, 7, 2))))
+        self.beta.members.add(Membership(MEP("4", "4", "Hungary"), Period(date(2022, 10, 19))))
+
+    def test_party_agreement_matrix(self):
+        party_agreement = party_agreement_matrix(self.vote_matrix, [self.alpha, self.beta])
+        self.assertEqual(["alpha (Hungary)", "beta (Hungary)"], party_agreement.labels)
+        # alpha: For, For (tie), Against (tie); beta: For, Against, Against (tie)
+        np.testing.assert_array_equal([[3, 2], [2, 3]], party_agreement.agreements)
+        np.testing.assert_array_equal([[3, 3], [3, 3]], party_agreement.overlaps)
+
+    def test_mep_agreement_matrix_round_trip(self):
+        mep_agreement = mep_agreement_matrix(self.vote_matrix)
+        self.assertEqual(2, mep_agreement.agreements[mep_agreement.labels.index("1"), mep_agreement.labels.index("3")])
+        with TemporaryDirectory() as temporary_directory:
+            save_agreement_matrix(mep_agreement, f"{temporary_directory}/mep_agreement.npz")
+            loaded_mep_agreement = load_agreement_matrix(f"{temporary_directory}/mep_agreement.npz")
+        self.assertEqual(mep_agreement.labels, loaded_mep_agreement.labels)
+        np.testing.assert_array_equal(mep_agreement.agreements, loaded_mep_agreement.agreements)
+        np.testing.assert_array_equal(mep_agreement.agreement_rates(), loaded_mep_agreement.agreement_rates())
@@ -0,0 +1,31 @@
+from datetime import date
+import unittest
+
+from benchmark.bench_suite import compare_with_baseline, run_benchmarks
+from benchmark.synthetic_data import create_synthetic_membership_graph, synthetic_sitting_days
+from main import find_group_ids_of_party
+
+
+class TestSyntheticData(unittest.TestCase):
+
+    def test_synthetic_sitting_days(self):
+        self.assertEqual([date(2019, 7, 15), date(2019, 7, 16), date(2019, 7, 17), date(2019, 7, 18), date(2019, 7, 29)], synthetic_sitting_days(5))
+
+    def test_synthetic_parties_sit_in_one_group(self):
+        sitting_days = synthetic_sitting_days(8)
+        membership_graph = create_synthetic_membership_graph(100, 20, sitting_days)
+        for sitting_day in sitting_days:
+            for national_party in membership_graph.national_parties:
+                if national_party.members.get_member_ids_at(sitting_day):
+                    self.assertIn(membership_graph.group_ids_of_parties[national_party], find_group_ids_of_party(sitting_day, membership_graph.political_groups, national_party))
+
+
+class TestBenchSuite(unittest.TestCase):
+
+    def test_run_benchmarks(self):
+        benchmark_results = run_benchmarks(days=2, votes_per_day=3, meps=60, parties=12, repeat=1, seed=0)
+        self.assertEqual({"parsing", "membership_lookup", "counting", "counting_vectorized", "end_to_end_cold", "end_to_end_warm"}, set(benchmark_results["results"]))
+        self.assertEqual(6, benchmark_results["results"]["parsing"]["items"])
+        self.assertEqual([], compare_with_baseline(benchmark_results, benchmark_results))
+        slower_results = dict(benchmark_results, results={name: dict(result, seconds=result["seconds"] * 2 + 1) for name, result in benchmark_results["results"].items()})
+        self.assertEqual(6, len(compare_with_baseline(slower_results, benchmark_results)))
@@ -0,0 +1,54 @@
+from collections import Counter
+from datetime import date, timedelta
+import unittest
+
+from cohesion_series import create_cohesion_series
+from models import VotingCohesionComparison
+
+
+def comparison_of(cohesions: list[float], same: int, different: int) -> VotingCohesionComparison:
+    comparison = VotingCohesionComparison()
+    comparison.national_party_voting_cohesion_per_voting.extend(cohesions)
+    comparison.non_coherent_votings.update(f"vote {index}" for index, cohesion in enumerate(cohesions) if cohesion < 100)
+    comparison.political_group_voting_comparisons["Non-attached Members"] = Counter(same=same, different=different)
+    return comparison
+
+
+class TestCohesionSeries(unittest.TestCase):
+
+    def setUp(self):
+        self.comparisons_by_day = {
+            date(2022, 9, 12): comparison_of([100.0, 50.0], 1, 1),
+            date(2022, 9, 13): comparison_of([100.0], 1, 0),
+            date(2022, 10, 3): comparison_of([80.0, 100.0, 90.0], 0, 3),
+            date(2022, 10, 18): comparison_of([], 0, 0),
+        }
+        self.cohesion_series = create_cohesion_series(self.comparisons_by_day)
+
+    def test_summary_between_matches_merged_days(self):
+        summary = self.cohesion_series.summary_between(date(2022, 9, 13), date(2022, 10, 31))
+        merged = VotingCohesionComparison()
+        for day in [date(2022, 9, 13), date(2022, 10, 3), date(2022, 10, 18)]:
+            merged.merge(self.comparisons_by_day[day])
+        self.assertEqual(len(merged.national_party_voting_cohesion_per_voting), summary.voting_count)
+        self.assertAlmostEqual(sum(merged.national_party_voting_cohesion_per_voting) / 4, summary.average_cohesion)
+        self.assertEqual(2, summary.non_coherent_voting_count)
+        self.assertEqual({"Non-attached Members": 25.0}, summary.agreement_percentages)
+
+    def test_summary_between_without_votes(self):
+        summary = self.cohesion_series.summary_between(date(2022, 10, 4), date(2022, 10, 31))
+        self.assertEqual((0, None, {}), (summary.voting_count, summary.average_cohesion, summary.agreement_percentages))
+
+    def test_bucketed_by_month(self):
+        summaries = self.cohesion_series.bucketed("month")
+        self.assertEqual([(date(2022, 9, 1), date(2022, 9, 30), 3), (date(2022, 10, 1), date(2022, 10, 18), 3)], [(summary.start_date, summary.end_date, summary.voting_count) for summary in summaries])
+        self.assertAlmostEqual(250 / 3, summaries[0].average_cohesion)
+
+    def test_bucketed_by_custom_bucket(self):
+        fortnight_start_of = lambda day: date(2022, 9, 5) + timedelta(days=(day - date(2022, 9, 5)).days // 14 * 14)
+        self.assertEqual([3, 3, 0], [summary.voting_count for summary in self.cohesion_series.bucketed(fortnight_start_of)])
+
+    def test_rolling(self):
+        summaries = self.cohesion_series.rolling(timedelta(days=30))
+        self.assertEqual([2, 3, 6, 3], [summary.voting_count for summary in summaries])
+        self.assertEqual(date(2022, 9, 19), summaries[-1].start_date)
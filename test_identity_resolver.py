@@ -0,0 +1,58 @@
+from datetime import date
+import unittest
+
+from identity_resolver import MepIdentityResolver, normalize_name
+from models import MEP, EUPoliticalGroup, Membership, Period
+
+
+class TestNormalizeName(unittest.TestCase):
+
+    def test_normalize_name_accents_and_case(self):
+        self.assertEqual("schaller-baross", normalize_name("Schaller - Baross"))
+        self.assertEqual("stefanuta", normalize_name("ŞTEFĂNUȚĂ"))
+
+
+class TestMepIdentityResolver(unittest.TestCase):
+
+    def setUp(self):
+        self.meps = [
+            MEP("1", "Ernő SCHALLER-BAROSS", "Hungary"),
+            MEP("2", "David McALLISTER", "Germany"),
+            MEP("3", "Isabella ADINOLFI", "Italy"),
+            MEP("4", "Matteo ADINOLFI", "Italy"),
+            MEP("5", "Anna ADINOLFI", "Hungary"),
+        ]
+        self.epp = EUPoliticalGroup("Group of the European People's Party (Christian Democrats)", ["PPE", "EPP"])
+        self.identity_and_democracy = EUPoliticalGroup("Identity and Democracy Group", ["ID"])
+        self.epp.members.add(Membership(self.meps[2], Period(date(2019, 7, 2), date(2020, 12, 31))))
+        self.epp.members.add(Membership(self.meps[4], Period(date(2019, 7, 2))))
+        self.identity_and_democracy.members.add(Membership(self.meps[3], Period(date(2019, 7, 2))))
+        self.identity_resolver = MepIdentityResolver(self.meps, [self.epp, self.identity_and_democracy])
+
+    def test_resolve_by_last_name(self):
+        self.assertEqual("1", self.identity_resolver.resolve("Schaller-Baross"))
+        self.assertEqual("2", self.identity_resolver.resolve("McAllister"))
+
+    def test_resolve_shared_last_name_by_first_name(self):
+        self.assertIsNone(self.identity_resolver.resolve("Adinolfi"))
+        self.assertEqual("3", self.identity_resolver.resolve("Adinolfi Isabella"))
+        self.assertEqual("4", self.identity_resolver.resolve("Adinolfi Matteo"))
+
+    def test_resolve_same_name_from_another_country(self):
+        meps = [MEP("6", "Peter MÜLLER", "Germany"), MEP("7", "Peter MÜLLER", "Austria")]
+        group = EUPoliticalGroup("Renew Europe Group", ["Renew"])
+        group.members.add(Membership(meps[1], Period(date(2019, 7, 2))))
+        identity_resolver = MepIdentityResolver(meps, [group])
+        self.assertIsNone(identity_resolver.resolve("Müller Peter"))
+        self.assertIsNone(identity_resolver.resolve("Müller Peter", "PPE", date(2022, 10, 18)))
+        self.assertEqual("7", identity_resolver.resolve("Müller Peter", "Renew", date(2022, 10, 18)))
+
+    def test_resolve_shared_name_by_group_on_the_day(self):
+        self.assertEqual("5", self.identity_resolver.resolve("Adinolfi", "PPE", date(2022, 10, 18)))
+        self.assertEqual("4", self.identity_resolver.resolve("Adinolfi", "ID", date(2022, 10, 18)))
+        # both Isabella and Anna sat in the EPP group in 2020
+        self.assertIsNone(self.identity_resolver.resolve("Adinolfi", "PPE", date(2020, 10, 18)))
+
+    def test_resolve_is_memoized_per_ballot_text(self):
+        self.identity_resolver.resolve("Adinolfi Isabella")
+        self.assertEqual({"Adinolfi Isabella": frozenset({"3"})}, self.identity_resolver._candidate_mep_ids)
@@ -0,0 +1,52 @@
+from os.path import getsize, join
+from tempfile import TemporaryDirectory
+import unittest
+
+from instrumentation import Instrumentation, enable_instrumentation, instrumentation, profiled
+from loader.roll_call_loader import parse_roll_call_votes
+from test_roll_call_loader import ROLL_CALL_XML
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def tearDown(self):
+        enable_instrumentation(False)
+
+    def test_disabled_instrumentation_records_nothing(self):
+        disabled_instrumentation = Instrumentation()
+        with disabled_instrumentation.stage("parse"):
+            disabled_instrumentation.count("votes parsed")
+        self.assertEqual({}, disabled_instrumentation.timings)
+        self.assertEqual(0, sum(disabled_instrumentation.counters.values()))
+
+    def test_enabled_instrumentation_records_stages_and_counters(self):
+        enabled_instrumentation = Instrumentation(enabled=True)
+        for _ in range(2):
+            with enabled_instrumentation.stage("parse"):
+                enabled_instrumentation.count("bytes parsed", 10)
+        self.assertEqual(2, enabled_instrumentation.calls["parse"])
+        self.assertEqual(20, enabled_instrumentation.counters["bytes parsed"])
+        self.assertIn("bytes parsed", enabled_instrumentation.report())
+
+    def test_parsing_is_instrumented(self):
+        enable_instrumentation()
+        with TemporaryDirectory() as temporary_directory:
+            filename = join(temporary_directory, "2022-10-18.xml")
+            with open(filename, "w", encoding="utf-8") as xml_file:
+                xml_file.write(ROLL_CALL_XML)
+            roll_call_votes = parse_roll_call_votes(filename)
+            self.assertEqual(getsize(filename), instrumentation.counters["bytes parsed"])
+        self.assertEqual(len(roll_call_votes), instrumentation.counters["votes parsed"])
+        self.assertEqual(sum(1 for roll_call_vote in roll_call_votes for _ in roll_call_vote.ballots()), instrumentation.counters["ballots parsed"])
+        self.assertIn("parse", instrumentation.timings)
+
+    def test_profiled(self):
+        with profiled("cprofile") as profile_report:
+            sorted(range(1000), reverse=True)
+        self.assertIn("function calls", profile_report.getvalue())
+        with profiled("tracemalloc") as allocation_report:
+            _ = [str(number) for number in range(1000)]
+        self.assertIn("peak traced memory", allocation_report.getvalue())
+        with profiled(None) as empty_report:
+            pass
+        self.assertEqual("", empty_report.getvalue())
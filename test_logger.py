@@ -0,0 +1,48 @@
+import logging
+from os import chdir, environ, getcwd
+from tempfile import TemporaryDirectory
+import unittest
+from unittest.mock import patch
+
+from logger import LOG_LEVEL_ENVIRONMENT_VARIABLE, STDOUT_HANDLER_NAME, create_logger, log_level_of
+
+
+class TestCreateLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.working_directory = getcwd()
+        self.temporary_directory = TemporaryDirectory()
+        chdir(self.temporary_directory.name)
+        self.root_logger = logging.getLogger()
+        self.handlers = list(self.root_logger.handlers)
+        self.level = self.root_logger.level
+
+    def tearDown(self):
+        for handler in self.root_logger.handlers:
+            if handler not in self.handlers:
+                self.root_logger.removeHandler(handler)
+                handler.close()
+        self.root_logger.setLevel(self.level)
+        chdir(self.working_directory)
+        self.temporary_directory.cleanup()
+
+    def stdout_handlers(self):
+        return [handler for handler in self.root_logger.handlers if handler.get_name() == STDOUT_HANDLER_NAME]
+
+    def test_create_logger_adds_stdout_handler_once(self):
+        create_logger()
+        create_logger()
+        self.assertEqual(1, len(self.stdout_handlers()))
+
+    def test_create_logger_keeps_configured_level(self):
+        create_logger("debug")
+        self.assertEqual(logging.DEBUG, create_logger().level)
+        self.assertEqual(logging.WARNING, create_logger("quiet").level)
+
+    def test_log_level_of(self):
+        self.assertEqual(logging.ERROR, log_level_of(logging.ERROR))
+        self.assertEqual(logging.WARNING, log_level_of("QUIET"))
+        with patch.dict(environ, {LOG_LEVEL_ENVIRONMENT_VARIABLE: "debug"}):
+            self.assertEqual(logging.DEBUG, log_level_of(None))
+        with patch.dict(environ, clear=True):
+            self.assertEqual(logging.INFO, log_level_of(None))
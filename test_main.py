@@ -1,8 +1,19 @@
-from datetime import date
+from collections import Counter
+import csv
+from datetime import date, timedelta
+import logging
+from os import chdir, getcwd, makedirs
+from shutil import rmtree
+from tempfile import TemporaryDirectory
 import unittest
-from main import find_group_ids_of_party
+from agreement_matrix import load_agreement_matrix
+from loader.roll_call_loader import clear_roll_call_caches
+from identity_resolver import MepIdentityResolver
+from main import compare_pairwise_agreement, compare_voting_cohesion_series, compare_voting_cohesion_of_parties_with_ep_groups, compare_voting_cohesion_with_ep_groups, export_vote_comparisons, find_group_ids_of_party, find_parties_by_name_and_country, iterate_vote_comparisons_at
+from result_export import ColumnarVoteComparisonWriter, CsvVoteComparisonWriter, load_columnar_vote_comparisons
 
-from models import MEP, EUPoliticalGroup, Membership, NationalParty, Period
+from models import MEP, EUPoliticalGroup, Membership, Memberships, NationalParty, Period
+from registry import EntityRegistry
 
 
 class TestFindGroupIdOfParty(unittest.TestCase):
@@ -57,3 +68,239 @@ class TestFindGroupIdOfParty(unittest.TestCase):
 
         result = find_group_ids_of_party(date_to_examine, {political_group_positive, political_group_negative}, national_party)
         self.assertEqual(expected_result, result)
+
+
+class TestFindPartiesByNameAndCountry(unittest.TestCase):
+
+    def test_find_parties_by_name_and_country_skips_missing_parties(self):
+        fidesz, momentum = NationalParty("Fidesz-Magyar Polgári Szövetség", "Hungary"), NationalParty("Momentum", "Hungary")
+        registry = EntityRegistry([fidesz, momentum, NationalParty("Momentum", "Romania")])
+        logger = logging.getLogger(__name__)
+        with self.assertLogs(logger, logging.WARNING) as logs:
+            parties = find_parties_by_name_and_country(registry, ["Momentum", "Mi Hazánk Mozgalom", "Fidesz-Magyar Polgári Szövetség"], "Hungary", logger)
+        self.assertEqual([momentum, fidesz], parties)
+        self.assertEqual(1, len(logs.output))
+        self.assertIn("Mi Hazánk Mozgalom", logs.output[0])
+
+
+ROLL_CALL_XML_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<PV.RollCallVoteResults>
+    <RollCallVote.Result Identifier="1">
+        <RollCallVote.Description.Text>{day} - first vote</RollCallVote.Description.Text>
+        <Result.For Number="3">
+            <Result.PoliticalGroup.List Identifier="PPE">
+                <PoliticalGroup.Member.Name MepId="1" PersId="101">Alpha</PoliticalGroup.Member.Name>
+                <PoliticalGroup.Member.Name MepId="2" PersId="102">Beta</PoliticalGroup.Member.Name>
+            </Result.PoliticalGroup.List>
+        </Result.For>
+        <Result.Against Number="2">
+            <Result.PoliticalGroup.List Identifier="S&amp;D">
+                <PoliticalGroup.Member.Name MepId="3" PersId="103">Gamma</PoliticalGroup.Member.Name>
+            </Result.PoliticalGroup.List>
+        </Result.Against>
+    </RollCallVote.Result>
+    <RollCallVote.Result Identifier="2">
+        <RollCallVote.Description.Text>{day} - second vote</RollCallVote.Description.Text>
+        <Result.For Number="2">
+            <Result.PoliticalGroup.List Identifier="PPE">
+                <PoliticalGroup.Member.Name MepId="1" PersId="101">Alpha</PoliticalGroup.Member.Name>
+            </Result.PoliticalGroup.List>
+            <Result.PoliticalGroup.List Identifier="S&amp;D">
+                <PoliticalGroup.Member.Name MepId="3" PersId="103">Gamma</PoliticalGroup.Member.Name>
+            </Result.PoliticalGroup.List>
+        </Result.For>
+        <Result.Against Number="1">
+            <Result.PoliticalGroup.List Identifier="PPE">
+                <PoliticalGroup.Member.Name MepId="2">Beta</PoliticalGroup.Member.Name>
+            </Result.PoliticalGroup.List>
+        </Result.Against>
+    </RollCallVote.Result>
+</PV.RollCallVoteResults>
+"""
+
+
+class TestCompareVotingCohesionWithEpGroups(unittest.TestCase):
+
+    start_date = date(2022, 10, 17)
+    end_date = date(2022, 10, 20)
+    voting_days = [date(2022, 10, 18), date(2022, 10, 19)]
+
+    def setUp(self):
+        self.working_directory = getcwd()
+        self.temporary_directory = TemporaryDirectory()
+        chdir(self.temporary_directory.name)
+        makedirs("xml")
+        for voting_day in self.voting_days:
+            with open(f"xml/{voting_day}.xml", "w", encoding="utf-8") as xml_file:
+                xml_file.write(ROLL_CALL_XML_TEMPLATE.format(day=voting_day))
+        clear_roll_call_caches()
+
+        alpha, beta, gamma = MEP("101", "Alpha", "Hungary"), MEP("102", "Beta", "Hungary"), MEP("103", "Gamma", "Hungary")
+        membership_period = Period(date(2019, 7, 2))
+        self.national_party = NationalParty("test", "Hungary")
+        epp = EUPoliticalGroup("Group of the European People's Party (Christian Democrats)", ["PPE", "EPP"])
+        socialists = EUPoliticalGroup("Group of the Progressive Alliance of Socialists and Democrats in the European Parliament", ["S&amp;D", "S&D"])
+        for mep in [alpha, beta]:
+            self.national_party.members.add(Membership(mep, membership_period))
+            epp.members.add(Membership(mep, membership_period))
+        socialists.members.add(Membership(gamma, membership_period))
+        self.eu_political_groups = [epp, socialists]
+        self.mep_id_pers_id_pairings = {"2": "102"}
+
+    def tearDown(self):
+        chdir(self.working_directory)
+        self.temporary_directory.cleanup()
+
+    def compare(self, **kwargs):
+        return compare_voting_cohesion_with_ep_groups(self.national_party, self.eu_political_groups, self.mep_id_pers_id_pairings, self.start_date, self.end_date, True, **kwargs)
+
+    def test_compare_voting_cohesion_with_ep_groups(self):
+        result = self.compare()
+        self.assertEqual(Counter(same=4, different=0), result.political_group_voting_comparisons["Group of the European People's Party (Christian Democrats)"])
+        self.assertEqual(Counter(same=2, different=2), result.political_group_voting_comparisons["Group of the Progressive Alliance of Socialists and Democrats in the European Parliament"])
+        self.assertEqual([100.0, 50.0, 100.0, 50.0], result.national_party_voting_cohesion_per_voting)
+        self.assertEqual({"2022-10-18 - 2022-10-18 - second vote", "2022-10-19 - 2022-10-19 - second vote"}, result.non_coherent_votings)
+
+    def test_compare_voting_cohesion_with_ep_groups_in_parallel(self):
+        sequential_result = self.compare()
+        clear_roll_call_caches()
+        parallel_result = self.compare(workers=2)
+        self.assertEqual(sequential_result.political_group_voting_comparisons, parallel_result.political_group_voting_comparisons)
+        self.assertEqual(sequential_result.national_party_voting_cohesion_per_voting, parallel_result.national_party_voting_cohesion_per_voting)
+        self.assertEqual(sequential_result.non_coherent_votings, parallel_result.non_coherent_votings)
+
+    def rewrite_voting_days_with_first_vote_only(self):
+        first_vote_only_template = ROLL_CALL_XML_TEMPLATE[:ROLL_CALL_XML_TEMPLATE.index('    <RollCallVote.Result Identifier="2">')] + "</PV.RollCallVoteResults>\n"
+        for voting_day in self.voting_days:
+            with open(f"xml/{voting_day}.xml", "w", encoding="utf-8") as xml_file:
+                xml_file.write(first_vote_only_template.format(day=voting_day))
+        rmtree("cache/roll_call")
+        clear_roll_call_caches()
+
+    def test_compare_voting_cohesion_with_ep_groups_incremental_reuses_stored_days(self):
+        self.compare(incremental=True)
+        self.rewrite_voting_days_with_first_vote_only()
+        result = self.compare(incremental=True)
+        self.assertEqual([100.0, 50.0, 100.0, 50.0], result.national_party_voting_cohesion_per_voting)
+
+    def test_compare_voting_cohesion_with_ep_groups_incremental_invalidated_by_membership_change(self):
+        self.compare(incremental=True)
+        self.rewrite_voting_days_with_first_vote_only()
+        self.mep_id_pers_id_pairings = {}
+        result = self.compare(incremental=True)
+        self.assertEqual([100.0, 100.0], result.national_party_voting_cohesion_per_voting)
+
+    def test_compare_voting_cohesion_with_ep_groups_vectorized(self):
+        loop_result = self.compare(vectorized=False)
+        vectorized_result = self.compare()
+        self.assertEqual(loop_result.political_group_voting_comparisons, vectorized_result.political_group_voting_comparisons)
+        self.assertEqual(loop_result.national_party_voting_cohesion_per_voting, vectorized_result.national_party_voting_cohesion_per_voting)
+        self.assertEqual(loop_result.non_coherent_votings, vectorized_result.non_coherent_votings)
+
+    def test_compare_voting_cohesion_with_ep_groups_vectorized_rejects_loop_only_options(self):
+        with self.assertRaises(ValueError):
+            self.compare(vectorized=True, streaming=True)
+        with self.assertRaises(ValueError):
+            self.compare(vectorized=True, workers=2)
+
+    def test_compare_voting_cohesion_with_ep_groups_resolves_members_per_day(self):
+        beta = MEP("102", "Beta", "Hungary")
+        self.national_party.members = Memberships()
+        self.national_party.members.add(Membership(MEP("101", "Alpha", "Hungary"), Period(date(2019, 7, 2))))
+        self.national_party.members.add(Membership(beta, Period(date(2022, 10, 19))))
+        for vectorized in [False, True]:
+            result = self.compare(vectorized=vectorized)
+            self.assertEqual([100.0, 100.0, 100.0, 50.0], result.national_party_voting_cohesion_per_voting)
+
+    def test_compare_voting_cohesion_with_ep_groups_resolves_ballots_by_name(self):
+        self.mep_id_pers_id_pairings = {}
+        identity_resolver = MepIdentityResolver((membership.member for political_group in self.eu_political_groups for membership in political_group.members), self.eu_political_groups)
+        for vectorized in [False, True]:
+            self.assertEqual([100.0, 100.0, 100.0, 100.0], self.compare(vectorized=vectorized).national_party_voting_cohesion_per_voting)
+            result = self.compare(vectorized=vectorized, identity_resolver=identity_resolver)
+            self.assertEqual([100.0, 50.0, 100.0, 50.0], result.national_party_voting_cohesion_per_voting)
+
+    def test_compare_voting_cohesion_with_ep_groups_does_not_resolve_namesakes_of_other_countries(self):
+        self.mep_id_pers_id_pairings = {}
+        epp, socialists = self.eu_political_groups
+        namesake = MEP("201", "Beta", "Austria")
+        socialists.members.add(Membership(namesake, Period(date(2019, 7, 2))))
+        meps = [membership.member for political_group in self.eu_political_groups for membership in political_group.members]
+        for vectorized in [False, True]:
+            # the ballot was cast in the group of only one of the namesakes
+            result = self.compare(vectorized=vectorized, identity_resolver=MepIdentityResolver(meps, self.eu_political_groups))
+            self.assertEqual([100.0, 50.0, 100.0, 50.0], result.national_party_voting_cohesion_per_voting)
+            result = self.compare(vectorized=vectorized, identity_resolver=MepIdentityResolver(meps))
+            self.assertEqual([100.0, 100.0, 100.0, 100.0], result.national_party_voting_cohesion_per_voting)
+        epp.members.add(Membership(namesake, Period(date(2019, 7, 2))))
+        for vectorized in [False, True]:
+            result = self.compare(vectorized=vectorized, identity_resolver=MepIdentityResolver(meps, self.eu_political_groups))
+            self.assertEqual([100.0, 100.0, 100.0, 100.0], result.national_party_voting_cohesion_per_voting)
+
+    def test_unresolved_ballots_are_logged_once_per_vote(self):
+        alpha_party = NationalParty("alpha", "Hungary")
+        alpha_party.members.add(Membership(MEP("101", "Alpha", "Hungary"), Period(date(2019, 7, 2))))
+        logger = logging.getLogger(__name__)
+        with self.assertLogs(logger, logging.DEBUG) as logs:
+            list(iterate_vote_comparisons_at(date(2022, 10, 18), [alpha_party, self.national_party], self.eu_political_groups, {}, logger, True))
+        self.assertEqual(["DEBUG:test_main:no ID found for Beta (MEP ID: 2)"], [output for output in logs.output if "no ID found" in output])
+
+    def test_compare_voting_cohesion_of_parties_with_ep_groups(self):
+        alpha_party, beta_party = NationalParty("alpha", "Hungary"), NationalParty("beta", "Hungary")
+        alpha_party.members.add(Membership(MEP("101", "Alpha", "Hungary"), Period(date(2019, 7, 2))))
+        beta_party.members.add(Membership(MEP("102", "Beta", "Hungary"), Period(date(2022, 10, 19))))
+        for vectorized in [False, True]:
+            results = compare_voting_cohesion_of_parties_with_ep_groups([alpha_party, beta_party, self.national_party], self.eu_political_groups, self.mep_id_pers_id_pairings, self.start_date, self.end_date, True, vectorized=vectorized)
+            for national_party in [alpha_party, beta_party, self.national_party]:
+                single_party_result = compare_voting_cohesion_with_ep_groups(national_party, self.eu_political_groups, self.mep_id_pers_id_pairings, self.start_date, self.end_date, True)
+                self.assertEqual(single_party_result.political_group_voting_comparisons, results[national_party].political_group_voting_comparisons)
+                self.assertEqual(single_party_result.national_party_voting_cohesion_per_voting, results[national_party].national_party_voting_cohesion_per_voting)
+                self.assertEqual(single_party_result.non_coherent_votings, results[national_party].non_coherent_votings)
+            self.assertEqual([100.0, 100.0], results[beta_party].national_party_voting_cohesion_per_voting)
+
+    def test_compare_voting_cohesion_of_parties_with_ep_groups_incremental_reuses_stored_days(self):
+        self.compare(incremental=True)
+        self.rewrite_voting_days_with_first_vote_only()
+        alpha_party = NationalParty("alpha", "Hungary")
+        alpha_party.members.add(Membership(MEP("101", "Alpha", "Hungary"), Period(date(2019, 7, 2))))
+        for vectorized in [False, True]:
+            results = compare_voting_cohesion_of_parties_with_ep_groups([alpha_party, self.national_party], self.eu_political_groups, self.mep_id_pers_id_pairings, self.start_date, self.end_date, True, incremental=True, vectorized=vectorized)
+            self.assertEqual([100.0, 50.0, 100.0, 50.0], results[self.national_party].national_party_voting_cohesion_per_voting)
+            self.assertEqual([100.0, 100.0], results[alpha_party].national_party_voting_cohesion_per_voting)
+        self.assertEqual([100.0, 50.0, 100.0, 50.0], self.compare(incremental=True).national_party_voting_cohesion_per_voting)
+
+    def test_compare_pairwise_agreement(self):
+        socialist_party = NationalParty("socialist", "Hungary")
+        socialist_party.members.add(Membership(MEP("103", "Gamma", "Hungary"), Period(date(2019, 7, 2))))
+        party_agreement, mep_agreement = compare_pairwise_agreement([self.national_party, socialist_party], self.mep_id_pers_id_pairings, self.start_date, self.end_date, True, include_meps=True, output_folder="output")
+        self.assertEqual([[4, 2], [2, 4]], party_agreement.agreements.tolist())
+        self.assertEqual(["101", "102", "103"], mep_agreement.labels)
+        self.assertEqual(load_agreement_matrix("output/party_agreement.npz").agreements.tolist(), party_agreement.agreements.tolist())
+
+    def test_compare_voting_cohesion_series(self):
+        cohesion_series = compare_voting_cohesion_series(self.national_party, self.eu_political_groups, self.mep_id_pers_id_pairings, self.start_date, self.end_date, "week", timedelta(days=1), True)
+        overall_result = self.compare()
+        summary = cohesion_series.summary_between(self.start_date, self.end_date)
+        self.assertEqual(sum(overall_result.national_party_voting_cohesion_per_voting) / 4, summary.average_cohesion)
+        self.assertEqual({"Group of the European People's Party (Christian Democrats)": 100.0, "Group of the Progressive Alliance of Socialists and Democrats in the European Parliament": 50.0}, summary.agreement_percentages)
+        self.assertEqual([2, 2], [summary.voting_count for summary in cohesion_series.rolling(timedelta(days=1))])
+
+    def test_compare_voting_cohesion_with_ep_groups_streaming(self):
+        self.assertEqual(self.compare().national_party_voting_cohesion_per_voting, self.compare(streaming=True).national_party_voting_cohesion_per_voting)
+
+    def test_compare_voting_cohesion_with_ep_groups_agreement_percentages(self):
+        result = self.compare()
+        self.assertEqual({"Group of the European People's Party (Christian Democrats)": 100.0, "Group of the Progressive Alliance of Socialists and Democrats in the European Parliament": 50.0}, result.agreement_percentages())
+        self.assertEqual(75.0, result.average_cohesion())
+
+    def test_export_vote_comparisons(self):
+        political_group_names = [political_group.name for political_group in self.eu_political_groups]
+        with CsvVoteComparisonWriter("comparisons.csv", political_group_names) as csv_writer:
+            self.assertEqual(4, export_vote_comparisons([self.national_party], self.eu_political_groups, self.mep_id_pers_id_pairings, csv_writer, self.start_date, self.end_date, True))
+        with open("comparisons.csv", newline="", encoding="utf-8") as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        self.assertEqual(["100.0", "50.0", "100.0", "50.0"], [row["cohesion"] for row in rows])
+        self.assertEqual(["Against", "For", "Against", "For"], [row["Group of the Progressive Alliance of Socialists and Democrats in the European Parliament"] for row in rows])
+        with ColumnarVoteComparisonWriter("comparisons", political_group_names, row_group_size=3) as columnar_writer:
+            export_vote_comparisons([self.national_party], self.eu_political_groups, self.mep_id_pers_id_pairings, columnar_writer, self.start_date, self.end_date, True)
+        self.assertEqual([100.0, 50.0, 100.0, 50.0], load_columnar_vote_comparisons("comparisons")["cohesion"].tolist())
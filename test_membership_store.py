@@ -0,0 +1,114 @@
+from datetime import date
+from os import chdir, getcwd, makedirs
+import pickle
+from tempfile import TemporaryDirectory
+import unittest
+
+import numpy as np
+
+from loader.eu_political_group_loader import load_default_political_groups
+from loader.membership_store import create_membership_store, fingerprint_membership_sources, load_membership_store, save_membership_store
+from loader.mep_data_loader import MEP_LIST_URLS, fingerprint_mep_data_sources, load_mep_data, mep_xml_cache_file_uri
+from models import MEP, EUPoliticalGroup, Membership, NationalParty, Period
+
+
+def create_mep_data() -> tuple[set[EUPoliticalGroup], set[NationalParty]]:
+    kovacs = MEP("1", "Anna KOVÁCS", "Hungary")
+    nagy = MEP("2", "Péter NAGY", "Hungary")
+    fidesz = NationalParty("Fidesz-Magyar Polgári Szövetség", "Hungary")
+    fidesz.members.add(Membership(kovacs, Period(date(2019, 7, 2))))
+    fidesz.members.add(Membership(nagy, Period(date(2019, 7, 2), date(2020, 1, 31))))
+    independent = NationalParty("Independent", None)
+    independent.members.add(Membership(nagy, Period(date(2020, 2, 1))))
+    epp = EUPoliticalGroup("Group of the European People's Party (Christian Democrats)", ["PPE", "EPP"])
+    epp.members.add(Membership(kovacs, Period(date(2019, 7, 2), date(2021, 3, 18))))
+    non_attached = EUPoliticalGroup("Non-attached Members", ["NI"])
+    non_attached.members.add(Membership(kovacs, Period(date(2021, 3, 19))))
+    return {epp, non_attached}, {fidesz, independent}
+
+
+def membership_rows_of(owners) -> set[tuple]:
+    return {
+        (owner.name, membership.member.id, membership.member.name, membership.period.start_date, membership.period.end_date)
+        for owner in owners
+        for membership in owner.members
+    }
+
+
+class TestMembershipStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = TemporaryDirectory()
+        self.folder = f"{self.temporary_directory.name}/membership_store"
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_round_trip(self):
+        eu_political_groups, national_parties = create_mep_data()
+        save_membership_store(create_membership_store(eu_political_groups, national_parties), "fingerprint", self.folder)
+        loaded_political_groups, loaded_national_parties = load_membership_store("fingerprint", self.folder).to_models()
+        self.assertEqual(national_parties, loaded_national_parties)
+        self.assertEqual(membership_rows_of(national_parties), membership_rows_of(loaded_national_parties))
+        self.assertEqual(membership_rows_of(eu_political_groups), membership_rows_of(loaded_political_groups))
+        self.assertEqual({("PPE", "EPP"), ("NI",)}, {tuple(group.ids) for group in loaded_political_groups})
+
+    def test_columns_are_memory_mapped(self):
+        save_membership_store(create_membership_store(*create_mep_data()), "fingerprint", self.folder)
+        columns = load_membership_store("fingerprint", self.folder).columns
+        self.assertIsInstance(columns["national_party_start"], np.memmap)
+        self.assertEqual([date(2019, 7, 2).toordinal()] * 2 + [date(2020, 2, 1).toordinal()], sorted(columns["national_party_start"].tolist()))
+
+    def test_invalidated_by_source_fingerprint(self):
+        save_membership_store(create_membership_store(*create_mep_data()), "fingerprint", self.folder)
+        self.assertIsNone(load_membership_store("other fingerprint", self.folder))
+
+    def test_fingerprint_covers_group_definitions(self):
+        political_groups = load_default_political_groups()
+        renamed_groups = load_default_political_groups()
+        renamed_groups.add(EUPoliticalGroup("Patriots for Europe", ["PfE"]))
+        self.assertEqual(fingerprint_membership_sources(political_groups), fingerprint_membership_sources(load_default_political_groups()))
+        self.assertNotEqual(fingerprint_membership_sources(political_groups), fingerprint_membership_sources(renamed_groups))
+
+
+class TestLoadMepData(unittest.TestCase):
+
+    def setUp(self):
+        self.working_directory = getcwd()
+        self.temporary_directory = TemporaryDirectory()
+        chdir(self.temporary_directory.name)
+
+    def tearDown(self):
+        chdir(self.working_directory)
+        self.temporary_directory.cleanup()
+
+    def test_migrates_legacy_pickles(self):
+        eu_political_groups, national_parties = create_mep_data()
+        makedirs("cache")
+        with open("cache/eu_groups.pkl", "wb") as eu_groups_file:
+            pickle.dump(eu_political_groups, eu_groups_file)
+        with open("cache/national_parties.pkl", "wb") as national_party_file:
+            pickle.dump(national_parties, national_party_file)
+        self.assertEqual(membership_rows_of(national_parties), membership_rows_of(load_mep_data()[1]))
+        self.assertIsNotNone(load_membership_store(fingerprint_mep_data_sources()))
+        with open("cache/national_parties.pkl", "wb") as national_party_file:
+            pickle.dump(set(), national_party_file)
+        self.assertEqual(membership_rows_of(eu_political_groups), membership_rows_of(load_mep_data()[0]))
+        self.assertEqual(membership_rows_of(national_parties), membership_rows_of(load_mep_data()[1]))
+
+    def test_invalidated_by_changed_source_files(self):
+        makedirs("xml")
+        makedirs("html")
+        with open(mep_xml_cache_file_uri(MEP_LIST_URLS[0]), "w", encoding="utf-8") as mep_list_file:
+            mep_list_file.write("<meps/>")
+        with open("html/1.html", "w", encoding="utf-8") as history_file:
+            history_file.write("<html></html>")
+        save_membership_store(create_membership_store(*create_mep_data()), fingerprint_mep_data_sources())
+        self.assertIsNotNone(load_membership_store(fingerprint_mep_data_sources()))
+        with open("html/1.html", "w", encoding="utf-8") as history_file:
+            history_file.write("<html><body>refetched</body></html>")
+        self.assertIsNone(load_membership_store(fingerprint_mep_data_sources()))
+        save_membership_store(create_membership_store(*create_mep_data()), fingerprint_mep_data_sources())
+        with open("html/2.html", "w", encoding="utf-8") as history_file:
+            history_file.write("<html></html>")
+        self.assertIsNone(load_membership_store(fingerprint_mep_data_sources()))
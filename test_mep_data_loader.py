@@ -1,21 +1,17 @@
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+from os import chdir, getcwd, listdir, makedirs
+from tempfile import TemporaryDirectory
+from threading import Thread
 import unittest
 from collections import Counter
 
 from main import calculate_cohesion
-from mep_data_loader import extract_last_name, extract_national_party_from, find_political_group_by_name
-from models import EUPoliticalGroup
-
-
-class TestExtractLastName(unittest.TestCase):
-
-    def test_extract_last_name(self):
-        self.assertEqual(extract_last_name("Magdalena ADAMOWICZ"), "ADAMOWICZ")
-
-    def test_extract_last_name_mcallister(self):
-        self.assertEqual(extract_last_name("David McALLISTER"), "McALLISTER")
-
-    def test_extract_last_name_special_characters(self):
-        self.assertEqual(extract_last_name("Ernő SCHALLER-BAROSS"), "SCHALLER-BAROSS")
+from loader.membership_store import load_membership_store
+from loader.mep_data_loader import MEP_HISTORY_CACHE_FOLDER, MEP_LIST_URLS, fingerprint_mep_data_sources, load_mep_data, mep_xml_cache_file_uri, extract_national_party_from, fetch_mep_histories, find_political_group_by_name
+from models import MEP, EUPoliticalGroup
+from registry import EntityRegistry
 
 
 class TestCalculateCohesion(unittest.TestCase):
@@ -53,16 +49,130 @@ class TestFindPoliticalGroupByName(unittest.TestCase):
         EUPoliticalGroup("Non-attached Members", ["NI"])
     }
 
+    registry = EntityRegistry(political_groups=political_groups)
+
 
     def test_find_political_group_by_name_positive(self):
-        result = find_political_group_by_name(self.political_groups, "Group of the European People's Party (Christian Democrats)")
+        result = find_political_group_by_name(self.registry, "Group of the European People's Party (Christian Democrats)")
         self.assertEquals(self.epp, result)
 
 
     def test_find_political_group_by_name_negative(self):
         try:
-            find_political_group_by_name(self.political_groups, "kiskrumpli")
+            find_political_group_by_name(self.registry, "kiskrumpli")
         except AssertionError as e:
             self.assertTrue("No political group named kiskrumpli found", str(e))
         else:
             self.fail()
+
+
+MEP_HISTORY_HTML = """<html><body>
+<div class="erpl_meps-status-list">
+<div class="erpl_meps-status"><h4>Political groups</h4><ul>
+<li><strong>02-07-2019 / 18-03-2021</strong> : Group of the European People's Party (Christian Democrats) - Member</li>
+<li><strong>19-03-2021 ...</strong> : Non-attached Members</li>
+</ul></div>
+<div class="erpl_meps-status"><h4>National parties</h4><ul>
+<li><strong>02-07-2019 ...</strong> : Fidesz-Magyar Polgári Szövetség-Kereszténydemokrata Néppárt (Hungary)</li>
+</ul></div>
+</div>
+</body></html>"""
+
+
+class StubMepHistoryHandler(BaseHTTPRequestHandler):
+    requested_paths = []
+    failing_path_prefixes = set()
+
+    def do_GET(self):
+        self.requested_paths.append(self.path)
+        if any(self.path.startswith(failing_path_prefix) for failing_path_prefix in self.failing_path_prefixes):
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/unavailable/"):
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path.startswith("/missing/"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        content = (MEP_HISTORY_HTML if self.path.startswith("/197001/") else "<html><body></body></html>").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestFetchMepHistories(unittest.TestCase):
+
+    meps = [MEP("197001", "Alpha ALPHA", "Hungary"), MEP("197002", "Beta BETA", "Hungary")]
+
+    def setUp(self):
+        StubMepHistoryHandler.requested_paths = []
+        StubMepHistoryHandler.failing_path_prefixes = set()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubMepHistoryHandler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url_template = f"http://127.0.0.1:{self.server.server_port}/{{id}}/{{name}}/history/9"
+        self.working_directory = getcwd()
+        self.temporary_directory = TemporaryDirectory()
+        chdir(self.temporary_directory.name)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        chdir(self.working_directory)
+        self.temporary_directory.cleanup()
+
+    def fetch(self, meps, url_template=None, retries=0):
+        return fetch_mep_histories(meps, logging.getLogger(), concurrency=2, workers=1, url_template=url_template or self.url_template, retries=retries, backoff=0)
+
+    def test_fetch_mep_histories(self):
+        mep_histories = self.fetch(self.meps)
+        national_party_memberships_data, eu_group_memberships_data = mep_histories[self.meps[0]]
+        self.assertEqual("Fidesz-Magyar Polgári Szövetség-Kereszténydemokrata Néppárt", national_party_memberships_data[0][0])
+        self.assertEqual("Hungary", national_party_memberships_data[0][1])
+        self.assertEqual(["Group of the European People's Party (Christian Democrats)", "Non-attached Members"], [name for name, _ in eu_group_memberships_data])
+        self.assertEqual(date(2021, 3, 18), eu_group_memberships_data[0][1].end_date)
+        self.assertIsNone(mep_histories[self.meps[1]])
+
+    def test_fetch_mep_histories_resumes_from_cached_pages(self):
+        self.fetch(self.meps[:1])
+        self.fetch(self.meps)
+        self.assertEqual(["/197001/ALPHA_ALPHA/history/9", "/197002/BETA_BETA/history/9"], sorted(StubMepHistoryHandler.requested_paths))
+
+    def test_fetch_mep_histories_skips_failed_pages(self):
+        mep_histories = self.fetch(self.meps[:1], f"http://127.0.0.1:{self.server.server_port}/missing/{{id}}")
+        self.assertEqual({}, mep_histories)
+        self.assertEqual([], listdir(MEP_HISTORY_CACHE_FOLDER))
+
+    def test_fetch_mep_histories_retries_only_server_errors(self):
+        self.fetch(self.meps[:1], f"http://127.0.0.1:{self.server.server_port}/missing/{{id}}", retries=2)
+        self.assertEqual(1, len(StubMepHistoryHandler.requested_paths))
+        self.fetch(self.meps[:1], f"http://127.0.0.1:{self.server.server_port}/unavailable/{{id}}", retries=2)
+        self.assertEqual(4, len(StubMepHistoryHandler.requested_paths))
+
+    def test_load_mep_data_fetches_failed_pages_on_the_next_run(self):
+        makedirs("xml")
+        meps_xml = "<meps>" + "".join(
+            f"<mep><fullName>{mep.name}</fullName><country>{mep.country}</country><politicalGroup>Group of the European People's Party (Christian Democrats)</politicalGroup><id>{mep.id}</id><nationalPoliticalGroup>Fidesz-Magyar Polgári Szövetség-Kereszténydemokrata Néppárt</nationalPoliticalGroup></mep>"
+            for mep in self.meps
+        ) + "</meps>"
+        for url in MEP_LIST_URLS:
+            with open(mep_xml_cache_file_uri(url), "w", encoding="utf-8") as mep_list_file:
+                mep_list_file.write(meps_xml)
+        StubMepHistoryHandler.failing_path_prefixes = {"/197001/"}
+        eu_political_groups, _ = load_mep_data(self.url_template, retries=0, backoff=0)
+        self.assertEqual([], [membership.member.id for political_group in eu_political_groups for membership in political_group.members])
+        self.assertIsNone(load_membership_store(fingerprint_mep_data_sources()))
+        StubMepHistoryHandler.failing_path_prefixes = set()
+        eu_political_groups, _ = load_mep_data(self.url_template, retries=0, backoff=0)
+        self.assertEqual(["197001", "197001"], [membership.member.id for political_group in eu_political_groups for membership in political_group.members])
+        self.assertIsNotNone(load_membership_store(fingerprint_mep_data_sources()))
+        self.assertEqual(["/197001/ALPHA_ALPHA/history/9", "/197001/ALPHA_ALPHA/history/9", "/197002/BETA_BETA/history/9"], sorted(StubMepHistoryHandler.requested_paths))
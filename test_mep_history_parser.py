@@ -0,0 +1,32 @@
+import unittest
+
+from loader.mep_history_parser import extract_status_lists_with_soup, extract_status_lists_with_stream
+
+MEP_HISTORY_HTML = """<!DOCTYPE html><html><head><meta charset="utf-8"><link rel="stylesheet" href="x.css"></head><body>
+<ul class="erpl_menu"><li><strong>not a status</strong> menu</li></ul>
+<div class="erpl_meps-status-list mb-3">
+<div class="erpl_meps-status"><h4>Political groups</h4><ul class="pl-2">
+<li><strong class="mr-1">02-07-2019 / 18-03-2021</strong> : Group of the European People&#39;s Party (Christian Democrats) - Member<br/></li>
+<li><strong>19-03-2021 ...</strong> : <span>Non-attached Members</span><ul><li>nested</li></ul></li>
+</ul></div>
+<div class="erpl_meps-status"><h4>National parties</h4><ul>
+<li><strong>02-07-2019 ...</strong> : Fidesz-Magyar Polgári Szövetség-Kereszténydemokrata Néppárt (Hungary)</li>
+</ul></div>
+<div class="wrapper"><div class="erpl_meps-status"><ul><li><strong>not a direct child</strong></li></ul></div></div>
+</div>
+</body></html>"""
+
+
+class TestExtractStatusLists(unittest.TestCase):
+
+    def test_extract_status_lists_with_stream(self):
+        status_lists = extract_status_lists_with_stream(MEP_HISTORY_HTML)
+        self.assertEqual(2, len(status_lists))
+        self.assertEqual(("02-07-2019 / 18-03-2021", "02-07-2019 / 18-03-2021 : Group of the European People's Party (Christian Democrats) - Member"), status_lists[0][0])
+        self.assertEqual(("02-07-2019 ...", "02-07-2019 ... : Fidesz-Magyar Polgári Szövetség-Kereszténydemokrata Néppárt (Hungary)"), status_lists[1][0])
+
+    def test_extract_status_lists_backends_agree(self):
+        self.assertEqual(extract_status_lists_with_soup(MEP_HISTORY_HTML), extract_status_lists_with_stream(MEP_HISTORY_HTML))
+
+    def test_extract_status_lists_without_status_list(self):
+        self.assertEqual([], extract_status_lists_with_stream("<html><body><ul><li>nothing</li></ul></body></html>"))
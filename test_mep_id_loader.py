@@ -0,0 +1,89 @@
+from datetime import date
+from os import chdir, getcwd, makedirs
+from os.path import join
+import pickle
+from tempfile import TemporaryDirectory
+import unittest
+
+from loader.mep_id_loader import SCANNED_DAYS_FILE_URI, fetch_mep_ids, load_mep_ids, scan_mep_id_pairings
+from loader.roll_call_loader import parse_roll_call_votes
+from test_roll_call_loader import ROLL_CALL_XML
+
+BALLOT_XML_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<PV.RollCallVoteResults>
+    <RollCallVote.Result Identifier="1">
+        <RollCallVote.Description.Text>{day}</RollCallVote.Description.Text>
+        <Result.For Number="1">
+            <Result.PoliticalGroup.List Identifier="PPE">
+                <PoliticalGroup.Member.Name MepId="{mep_id}" PersId="{pers_id}">Alpha</PoliticalGroup.Member.Name>
+            </Result.PoliticalGroup.List>
+        </Result.For>
+    </RollCallVote.Result>
+</PV.RollCallVoteResults>
+"""
+
+
+class TestScanMepIdPairings(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = TemporaryDirectory()
+        self.filename = join(self.temporary_directory.name, "2022-10-18.xml")
+        with open(self.filename, "w", encoding="utf-8") as xml_file:
+            xml_file.write(ROLL_CALL_XML)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_scan_matches_full_parse(self):
+        pairings = {
+            ballot.mep_id: ballot.pers_id
+            for roll_call_vote in parse_roll_call_votes(self.filename)
+            for ballot in roll_call_vote.ballots()
+            if ballot.pers_id
+        }
+        self.assertEqual(pairings, scan_mep_id_pairings(self.filename))
+        self.assertNotIn("7003", scan_mep_id_pairings(self.filename))
+
+
+class TestLoadMepIds(unittest.TestCase):
+
+    def setUp(self):
+        self.working_directory = getcwd()
+        self.temporary_directory = TemporaryDirectory()
+        chdir(self.temporary_directory.name)
+        makedirs("xml")
+        self.write_sitting(date(2022, 10, 18), "7001", "197001")
+        self.write_sitting(date(2022, 10, 19), "7002", "197002")
+
+    def tearDown(self):
+        chdir(self.working_directory)
+        self.temporary_directory.cleanup()
+
+    def write_sitting(self, sitting_day: date, mep_id: str, pers_id: str):
+        with open(f"xml/{sitting_day}.xml", "w", encoding="utf-8") as xml_file:
+            xml_file.write(BALLOT_XML_TEMPLATE.format(day=sitting_day, mep_id=mep_id, pers_id=pers_id))
+
+    def test_load_mep_ids(self):
+        self.assertEqual({"7001": "197001", "7002": "197002"}, load_mep_ids())
+
+    def test_load_mep_ids_scans_new_sittings_only(self):
+        load_mep_ids()
+        # an already scanned sitting is not read again, even if its file changes
+        self.write_sitting(date(2022, 10, 19), "7002", "changed")
+        self.write_sitting(date(2022, 10, 20), "7001", "297001")
+        self.assertEqual({"7001": "297001", "7002": "197002"}, load_mep_ids())
+        with open(SCANNED_DAYS_FILE_URI, "rb") as scanned_days_file:
+            self.assertEqual({date(2022, 10, 18), date(2022, 10, 19), date(2022, 10, 20)}, pickle.load(scanned_days_file))
+
+    def test_load_mep_ids_keeps_pairings_of_later_sittings(self):
+        load_mep_ids()
+        # a sitting published late is scanned after the ones following it, but does not override them
+        self.write_sitting(date(2022, 10, 17), "7002", "097002")
+        self.assertEqual({"7001": "197001", "7002": "197002"}, load_mep_ids())
+        self.assertEqual(load_mep_ids(), fetch_mep_ids())
+
+    def test_load_mep_ids_rescans_records_without_pairing_days(self):
+        makedirs("cache")
+        with open(SCANNED_DAYS_FILE_URI, "wb") as scanned_days_file:
+            pickle.dump({date(2022, 10, 18), date(2022, 10, 19)}, scanned_days_file)
+        self.assertEqual({"7001": "197001", "7002": "197002"}, load_mep_ids())
@@ -1,11 +1,18 @@
 from datetime import date
+import pickle
 import unittest
 
-from models import Period
+from models import MEP, EUPoliticalGroup, Membership, Memberships, NationalParty, Period
 
 
 class TestPeriod(unittest.TestCase):
 
+    def test_period_from_ordinals(self):
+        period = Period.from_ordinals(date(2023, 9, 26).toordinal())
+        self.assertEqual(Period(date(2023, 9, 26)), period)
+        self.assertEqual(date(2023, 9, 26), period.start_date)
+        self.assertIsNone(period.end_date)
+
     def test_period_inside_other_fully_inside(self):
         period = Period(date(2023, 9, 26), date(2023, 9, 29)) 
         period_inside_other_period = Period(date(2023, 9, 27), date(2023, 9, 28))
@@ -70,3 +77,82 @@ class TestPeriod(unittest.TestCase):
         period = Period(date(2023, 9, 26), None) 
         period_not_inside_other_period = Period(date(2023, 9, 25), date(2023, 9, 28))
         self.assertFalse(period.is_other_period_in_period(period_not_inside_other_period))
+
+
+class TestMemberships(unittest.TestCase):
+
+    def setUp(self):
+        self.memberships = Memberships()
+        self.memberships.add(Membership(MEP("1", "Alpha", "Hungary"), Period(date(2019, 7, 2))))
+        self.memberships.add(Membership(MEP("2", "Beta", "Hungary"), Period(date(2019, 7, 2), date(2022, 9, 30))))
+        self.memberships.add(Membership(MEP("3", "Gamma", "Hungary"), Period(date(2022, 10, 1))))
+
+    def test_get_member_ids_at(self):
+        self.assertEqual(frozenset(["1", "2"]), self.memberships.get_member_ids_at(date(2022, 9, 30)))
+        self.assertEqual(frozenset(["1", "3"]), self.memberships.get_member_ids_at(date(2022, 10, 1)))
+        self.assertEqual(frozenset(), self.memberships.get_member_ids_at(date(2019, 7, 1)))
+
+    def test_get_members_at_none(self):
+        self.assertEqual([], self.memberships.get_members_at(None))
+        self.assertEqual(frozenset(), self.memberships.get_member_ids_at(None))
+
+    def test_get_member_ids_at_is_shared_within_interval(self):
+        self.assertIs(self.memberships.get_member_ids_at(date(2020, 1, 1)), self.memberships.get_member_ids_at(date(2021, 1, 1)))
+
+    def test_get_member_ids_at_after_add(self):
+        self.memberships.get_member_ids_at(date(2023, 1, 1))
+        self.memberships.add(Membership(MEP("4", "Delta", "Hungary"), Period(date(2022, 12, 1))))
+        self.assertEqual(frozenset(["1", "3", "4"]), self.memberships.get_member_ids_at(date(2023, 1, 1)))
+
+    def test_get_members_at_boundaries(self):
+        self.assertEqual(["1", "2"], [mep.id for mep in self.memberships.get_members_at(date(2019, 7, 2))])
+        self.assertEqual(["1", "2"], [mep.id for mep in self.memberships.get_members_at(date(2022, 9, 30))])
+        self.assertEqual(["1", "3"], [mep.id for mep in self.memberships.get_members_at(date(2022, 10, 1))])
+        self.assertEqual([], self.memberships.get_members_at(None))
+
+    def test_get_members_at_dates(self):
+        snapshots = self.memberships.get_members_at_dates([date(2019, 7, 1), date(2023, 1, 1)])
+        self.assertEqual([], snapshots[date(2019, 7, 1)])
+        self.assertEqual(["1", "3"], [mep.id for mep in snapshots[date(2023, 1, 1)]])
+
+
+class TestModelPickling(unittest.TestCase):
+
+    def test_round_trip(self):
+        national_party = NationalParty("test", "Hungary")
+        national_party.members.add(Membership(MEP("1", "Alpha", "Hungary"), Period(date(2019, 7, 2), date(2022, 9, 30))))
+        national_party.members.add(Membership(MEP("2", "Beta", "Hungary"), Period(date(2022, 10, 1))))
+        loaded_national_party = pickle.loads(pickle.dumps(national_party))
+        self.assertEqual(national_party, loaded_national_party)
+        self.assertEqual(
+            [(membership.member.id, membership.period) for membership in national_party.members],
+            [(membership.member.id, membership.period) for membership in loaded_national_party.members],
+        )
+        self.assertEqual(date(2022, 9, 30), next(iter(loaded_national_party.members)).period.end_date)
+
+    def test_state_of_unslotted_models(self):
+        # pickle hands the instance __dict__ of models pickled before slotting to __setstate__
+        mep = MEP.__new__(MEP)
+        mep.__setstate__({"id": "1", "name": "Alpha", "country": "Hungary"})
+        period = Period.__new__(Period)
+        period.__setstate__({"start_date": date(2019, 7, 2), "end_date": None})
+        membership = Membership.__new__(Membership)
+        membership.__setstate__({"member": mep, "period": period})
+        memberships = Memberships()
+        memberships.add(membership)
+        national_party = NationalParty.__new__(NationalParty)
+        national_party.__setstate__({"name": "test", "country": "Hungary", "members": memberships})
+        self.assertEqual(frozenset(["1"]), national_party.members.get_member_ids_at(date(2020, 1, 1)))
+        self.assertEqual(Period(date(2019, 7, 2)), membership.period)
+
+
+class TestEUPoliticalGroup(unittest.TestCase):
+
+    def test_is_party_a_member_at_date(self):
+        mep = MEP("1", "Alpha", "Hungary")
+        national_party = NationalParty("test", "Hungary")
+        national_party.members.add(Membership(mep, Period(date(2019, 7, 2))))
+        political_group = EUPoliticalGroup("test group", ["TEST"])
+        political_group.members.add(Membership(mep, Period(date(2019, 7, 2), date(2021, 3, 18))))
+        self.assertTrue(political_group.is_party_a_member(national_party, date(2020, 1, 1)))
+        self.assertFalse(political_group.is_party_a_member(national_party, date(2022, 1, 1)))
@@ -0,0 +1,32 @@
+import unittest
+
+from models import EUPoliticalGroup, NationalParty
+from registry import EntityRegistry
+
+
+class TestEntityRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.fidesz = NationalParty("Fidesz-Magyar Polgári Szövetség", "Hungary")
+        self.left = EUPoliticalGroup("The Left group in the European Parliament - GUE/NGL", ["The Left", "GUE/NGL"], ["Group of the European United Left - Nordic Green Left"])
+        self.registry = EntityRegistry({self.fidesz}, {self.left, EUPoliticalGroup("Non-attached Members", ["NI"])})
+
+    def test_find_party_by_name_and_country(self):
+        self.assertIs(self.fidesz, self.registry.find_party("Fidesz-Magyar Polgári Szövetség", "Hungary"))
+        self.assertIsNone(self.registry.find_party("Fidesz-Magyar Polgári Szövetség", "Poland"))
+
+    def test_find_or_add_party_reuses_registered_party(self):
+        self.assertIs(self.fidesz, self.registry.find_or_add_party("Fidesz-Magyar Polgári Szövetség", "Hungary"))
+        added_party = self.registry.find_or_add_party("Momentum", "Hungary")
+        self.assertIs(added_party, self.registry.find_party("Momentum", "Hungary"))
+        self.assertEqual({self.fidesz, added_party}, self.registry.national_parties)
+        self.assertEqual([self.fidesz, added_party], self.registry.find_parties_of_country("Hungary"))
+
+    def test_find_political_group_by_name_and_alias(self):
+        self.assertIs(self.left, self.registry.find_political_group_by_name("The Left group in the European Parliament - GUE/NGL"))
+        self.assertIs(self.left, self.registry.find_political_group_by_name("Group of the European United Left - Nordic Green Left"))
+        self.assertIsNone(self.registry.find_political_group_by_name("kiskrumpli"))
+
+    def test_find_political_group_by_id(self):
+        self.assertIs(self.left, self.registry.find_political_group_by_id("GUE/NGL"))
+        self.assertIsNone(self.registry.find_political_group_by_id("EPP"))
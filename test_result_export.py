@@ -0,0 +1,56 @@
+from datetime import date
+import json
+from os import listdir
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+
+from models import NationalParty, VoteComparison
+from result_export import ColumnarVoteComparisonWriter, VoteComparisonWriter, JsonLinesVoteComparisonWriter, create_vote_comparison_writer, load_columnar_vote_comparisons
+
+
+def create_vote_comparisons(count: int) -> list[VoteComparison]:
+    national_party = NationalParty("test", "Hungary")
+    return [
+        VoteComparison(date(2022, 10, 18), str(index), f"vote {index}", national_party, "For" if index % 2 else None, 100.0 if index % 2 else None, {"EPP": "For", "S&D": None})
+        for index in range(count)
+    ]
+
+
+class TestResultExport(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = TemporaryDirectory()
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_vote_comparison_writer_needs_write_row(self):
+        with self.assertRaises(TypeError):
+            VoteComparisonWriter(["EPP", "S&D"])
+
+    def test_json_lines_writer(self):
+        file_uri = join(self.temporary_directory.name, "comparisons.jsonl")
+        with JsonLinesVoteComparisonWriter(file_uri, ["EPP", "S&D"]) as writer:
+            for vote_comparison in create_vote_comparisons(2):
+                writer.write(vote_comparison)
+        with open(file_uri, encoding="utf-8") as json_lines_file:
+            rows = [json.loads(line) for line in json_lines_file]
+        self.assertEqual({"sitting_date": "2022-10-18", "roll_call_vote_id": "1", "description": "vote 1", "national_party": "test", "country": "Hungary", "party_majority_vote": "For", "cohesion": 100.0, "EPP": "For", "S&D": None}, rows[1])
+        self.assertIsNone(rows[0]["cohesion"])
+
+    def test_columnar_writer_flushes_row_groups(self):
+        folder = join(self.temporary_directory.name, "comparisons")
+        with ColumnarVoteComparisonWriter(folder, ["EPP", "S&D"], row_group_size=2) as writer:
+            for vote_comparison in create_vote_comparisons(5):
+                writer.write(vote_comparison)
+        self.assertEqual(["part-00000.npz", "part-00001.npz", "part-00002.npz"], sorted(listdir(folder)))
+        columns = load_columnar_vote_comparisons(folder)
+        self.assertEqual([str(index) for index in range(5)], columns["roll_call_vote_id"].tolist())
+        self.assertEqual(["", "For", "", "For", ""], columns["party_majority_vote"].tolist())
+        self.assertEqual(2, int((columns["cohesion"] == 100.0).sum()))
+
+    def test_create_vote_comparison_writer(self):
+        with create_vote_comparison_writer("csv", join(self.temporary_directory.name, "comparisons.csv"), ["EPP"]) as writer:
+            writer.write(create_vote_comparisons(1)[0])
+        self.assertEqual(1, writer.row_count)
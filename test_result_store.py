@@ -0,0 +1,47 @@
+from datetime import date
+from os import chdir, getcwd, listdir, makedirs
+import pickle
+from tempfile import TemporaryDirectory
+import unittest
+from unittest.mock import patch
+
+from models import MEP, EUPoliticalGroup, Membership, NationalParty, Period, VotingCohesionComparison
+import result_store
+from result_store import RESULT_STORE_FOLDER, _result_store_file_uri, fingerprint_membership_data, load_result_store, save_result_store
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.working_directory = getcwd()
+        self.temporary_directory = TemporaryDirectory()
+        chdir(self.temporary_directory.name)
+        self.national_party = NationalParty("test", "Hungary")
+        self.national_party.members.add(Membership(MEP("101", "Alpha", "Hungary"), Period(date(2019, 7, 2))))
+        self.eu_political_groups = [EUPoliticalGroup("Non-attached Members", ["NI"])]
+
+    def tearDown(self):
+        chdir(self.working_directory)
+        self.temporary_directory.cleanup()
+
+    def fingerprint(self) -> str:
+        return fingerprint_membership_data(self.national_party, self.eu_political_groups, {})
+
+    def test_result_store_round_trip(self):
+        stored = load_result_store(self.national_party, self.fingerprint())
+        stored.comparisons_by_day[date(2022, 10, 18)] = VotingCohesionComparison()
+        save_result_store(self.national_party, stored)
+        self.assertEqual([date(2022, 10, 18)], list(load_result_store(self.national_party, self.fingerprint()).comparisons_by_day))
+        self.assertEqual([_result_store_file_uri(self.national_party).split("/")[-1]], listdir(RESULT_STORE_FOLDER))
+
+    def test_schema_version_is_part_of_the_fingerprint(self):
+        fingerprint = self.fingerprint()
+        with patch.object(result_store, "RESULT_STORE_SCHEMA_VERSION", result_store.RESULT_STORE_SCHEMA_VERSION + 1):
+            self.assertNotEqual(fingerprint, self.fingerprint())
+
+    def test_unreadable_result_store_is_a_miss(self):
+        makedirs(RESULT_STORE_FOLDER)
+        with open(_result_store_file_uri(self.national_party), "wb") as result_store_file:
+            # a store cut short by a crash mid-write, as written before stores went through a .part file
+            result_store_file.write(pickle.dumps(load_result_store(self.national_party, self.fingerprint()))[:-8])
+        self.assertEqual({}, load_result_store(self.national_party, self.fingerprint()).comparisons_by_day)
@@ -0,0 +1,170 @@
+from datetime import date
+import logging
+import pickle
+from os import chdir, getcwd, makedirs
+from os.path import join
+from tempfile import TemporaryDirectory
+import unittest
+from unittest.mock import patch
+
+from loader import roll_call_loader
+from loader.roll_call_loader import (
+    ROLL_CALL_CACHE_FOLDER,
+    ROLL_CALL_CACHE_SCHEMA_VERSION,
+    ROLL_CALL_MEMO_SIZE,
+    clear_roll_call_caches,
+    iterate_roll_call_votes,
+    load_cached_roll_call_votes,
+    load_group_tallies,
+    load_roll_call_votes,
+    load_stored_group_tallies,
+    majority_vote_of_political_group,
+    parse_roll_call_votes,
+    stream_roll_call_votes,
+    tally_political_groups_of,
+)
+from models import GroupTally
+
+ROLL_CALL_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<PV.RollCallVoteResults Sitting.Date="2022-10-18">
+    <RollCallVote.Result Identifier="150001" Date="2022-10-18 12:00:00">
+        <RollCallVote.Description.Text>A9-0001/2022 - Test report - Vote unique</RollCallVote.Description.Text>
+        <Result.For Number="3">
+            <Result.PoliticalGroup.List Identifier="PPE">
+                <PoliticalGroup.Member.Name MepId="7001" PersId="197001">Alpha</PoliticalGroup.Member.Name>
+                <PoliticalGroup.Member.Name MepId="7002" PersId="197002">Beta</PoliticalGroup.Member.Name>
+            </Result.PoliticalGroup.List>
+            <Result.PoliticalGroup.List Identifier="S&amp;D">
+                <PoliticalGroup.Member.Name MepId="7003">Gamma</PoliticalGroup.Member.Name>
+            </Result.PoliticalGroup.List>
+        </Result.For>
+        <Result.Against Number="1">
+            <Result.PoliticalGroup.List Identifier="ID">
+                <PoliticalGroup.Member.Name MepId="7004" PersId="197004">Delta</PoliticalGroup.Member.Name>
+            </Result.PoliticalGroup.List>
+        </Result.Against>
+        <Result.Abstention Number="0"/>
+    </RollCallVote.Result>
+    <RollCallVote.Result Identifier="150002" Date="2022-10-18 12:01:00">
+        <RollCallVote.Description.Text><a href="#">A9-0002/2022</a> - Second report</RollCallVote.Description.Text>
+        <Result.For Number="1">
+            <Result.PoliticalGroup.List Identifier="NI">
+                <PoliticalGroup.Member.Name MepId="7005" PersId="197005">Epsilon</PoliticalGroup.Member.Name>
+            </Result.PoliticalGroup.List>
+        </Result.For>
+    </RollCallVote.Result>
+</PV.RollCallVoteResults>
+"""
+
+
+class TestParseRollCallVotes(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = TemporaryDirectory()
+        self.filename = join(self.temporary_directory.name, "2022-10-18.xml")
+        with open(self.filename, "w", encoding="utf-8") as xml_file:
+            xml_file.write(ROLL_CALL_XML)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_parse_roll_call_votes_count(self):
+        self.assertEqual(2, len(parse_roll_call_votes(self.filename)))
+
+    def test_parse_roll_call_votes_description(self):
+        roll_call_votes = parse_roll_call_votes(self.filename)
+        self.assertEqual("150001", roll_call_votes[0].id)
+        self.assertEqual("A9-0001/2022 - Test report - Vote unique", roll_call_votes[0].description)
+
+    def test_parse_roll_call_votes_description_from_link(self):
+        roll_call_votes = parse_roll_call_votes(self.filename)
+        self.assertEqual("A9-0002/2022  - Second report", roll_call_votes[1].description)
+
+    def test_parse_roll_call_votes_ballots(self):
+        roll_call_vote = parse_roll_call_votes(self.filename)[0]
+        self.assertEqual(2, len(roll_call_vote.results['For']['PPE']))
+        self.assertEqual(("S&D", None, "7003", "Gamma"), roll_call_vote.results['For']['S&D'][0])
+        self.assertEqual({}, roll_call_vote.results['Abstention'])
+
+    def test_parse_roll_call_votes_missing_result(self):
+        roll_call_vote = parse_roll_call_votes(self.filename)[1]
+        self.assertEqual({}, roll_call_vote.results['Against'])
+
+    def test_iterate_roll_call_votes_yields_one_result_at_a_time(self):
+        roll_call_votes = iterate_roll_call_votes(self.filename)
+        self.assertEqual("150001", next(roll_call_votes).id)
+        self.assertEqual("150002", next(roll_call_votes).id)
+        self.assertIsNone(next(roll_call_votes, None))
+
+
+class TestGroupTallies(unittest.TestCase):
+
+    def setUp(self):
+        self.working_directory = getcwd()
+        self.temporary_directory = TemporaryDirectory()
+        chdir(self.temporary_directory.name)
+        makedirs("xml")
+        with open("xml/2022-10-18.xml", "w", encoding="utf-8") as xml_file:
+            xml_file.write(ROLL_CALL_XML)
+        clear_roll_call_caches()
+
+    def tearDown(self):
+        clear_roll_call_caches()
+        chdir(self.working_directory)
+        self.temporary_directory.cleanup()
+
+    def test_tally_political_groups_of(self):
+        group_tallies = tally_political_groups_of(parse_roll_call_votes("xml/2022-10-18.xml")[0])
+        self.assertEqual(GroupTally((2, 0, 0), "For"), group_tallies["PPE"])
+        self.assertEqual(GroupTally((0, 1, 0), "Against"), group_tallies["ID"])
+
+    def test_majority_vote_of_political_group(self):
+        group_tallies = {"S&amp;D": GroupTally((1, 2, 0), "Against"), "S&D": GroupTally((2, 0, 0), "For")}
+        self.assertEqual("For", majority_vote_of_political_group(group_tallies, ["S&amp;D", "S&D"]))
+        self.assertEqual("Against", majority_vote_of_political_group(group_tallies, ["S&amp;D"]))
+        self.assertIsNone(majority_vote_of_political_group(group_tallies, ["NI"]))
+
+    def test_group_tallies_are_stored_at_ingest(self):
+        load_roll_call_votes(date(2022, 10, 18), logging.getLogger(), True)
+        group_tallies = load_stored_group_tallies(date(2022, 10, 18))
+        self.assertEqual(["For"], [group_tally.majority_vote for group_tally in group_tallies[1].values()])
+        self.assertEqual(group_tallies, load_group_tallies(date(2022, 10, 18), logging.getLogger(), True))
+
+    def test_roll_call_cache_of_another_schema_version_is_a_miss(self):
+        makedirs(ROLL_CALL_CACHE_FOLDER)
+        # pickles from before the schema version was stored hold the bare lists
+        for file_uri in [f"{ROLL_CALL_CACHE_FOLDER}/2022-10-18.pkl", f"{ROLL_CALL_CACHE_FOLDER}/2022-10-18.tallies.pkl"]:
+            with open(file_uri, "wb") as cache_file:
+                pickle.dump([], cache_file)
+        self.assertEqual(2, len(load_roll_call_votes(date(2022, 10, 18), logging.getLogger(), True)))
+        self.assertEqual(2, len(load_stored_group_tallies(date(2022, 10, 18))))
+        clear_roll_call_caches()
+        with open(f"{ROLL_CALL_CACHE_FOLDER}/2022-10-18.pkl", "wb") as cache_file:
+            pickle.dump({"schema_version": ROLL_CALL_CACHE_SCHEMA_VERSION + 1, "data": []}, cache_file)
+        self.assertIsNone(load_cached_roll_call_votes(date(2022, 10, 18)))
+        self.assertEqual(2, len(load_roll_call_votes(date(2022, 10, 18), logging.getLogger(), True)))
+        clear_roll_call_caches()
+        self.assertEqual(2, len(load_cached_roll_call_votes(date(2022, 10, 18))))
+
+    def test_stored_group_tallies_are_memoized(self):
+        load_roll_call_votes(date(2022, 10, 18), logging.getLogger(), True)
+        clear_roll_call_caches()
+        group_tallies = load_stored_group_tallies(date(2022, 10, 18))
+        self.assertIs(group_tallies, load_stored_group_tallies(date(2022, 10, 18)))
+
+    def test_memo_keeps_the_most_recently_used_sittings(self):
+        with open("xml/2022-10-19.xml", "w", encoding="utf-8") as xml_file:
+            xml_file.write(ROLL_CALL_XML)
+        with patch.object(roll_call_loader, "ROLL_CALL_MEMO_SIZE", 1):
+            first_roll_call_votes = load_roll_call_votes(date(2022, 10, 18), logging.getLogger(), True)
+            second_roll_call_votes = load_roll_call_votes(date(2022, 10, 19), logging.getLogger(), True)
+            self.assertIs(second_roll_call_votes, load_cached_roll_call_votes(date(2022, 10, 19)))
+            self.assertIsNot(first_roll_call_votes, load_cached_roll_call_votes(date(2022, 10, 18)))
+
+    def test_streamed_roll_call_votes_are_not_memoized(self):
+        load_roll_call_votes(date(2022, 10, 18), logging.getLogger(), True)
+        clear_roll_call_caches()
+        streamed_roll_call_votes = list(stream_roll_call_votes(date(2022, 10, 18), logging.getLogger(), True))
+        self.assertIsNot(streamed_roll_call_votes[0], load_cached_roll_call_votes(date(2022, 10, 18))[0])
+        self.assertIsNot(load_stored_group_tallies(date(2022, 10, 18), memoize=False), load_stored_group_tallies(date(2022, 10, 18)))
+
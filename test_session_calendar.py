@@ -0,0 +1,72 @@
+from datetime import date
+import logging
+from os import chdir, getcwd, makedirs, utime
+from tempfile import TemporaryDirectory
+import unittest
+from unittest.mock import patch
+
+from loader import session_calendar
+from loader.session_calendar import SessionCalendar, load_sitting_days
+
+
+class TestSessionCalendar(unittest.TestCase):
+
+    today = date(2022, 11, 30)
+
+    def test_days_to_probe_unknown_days(self):
+        session_calendar = SessionCalendar()
+        session_calendar.record(date(2022, 10, 17), False, self.today)
+        session_calendar.record(date(2022, 10, 18), True, self.today)
+        self.assertEqual([date(2022, 10, 19)], session_calendar.days_to_probe(date(2022, 10, 17), date(2022, 10, 19), date(2022, 12, 1)))
+
+    def test_days_to_probe_recent_non_vote_days(self):
+        session_calendar = SessionCalendar()
+        session_calendar.record(date(2022, 11, 28), False, self.today)
+        self.assertEqual([], session_calendar.days_to_probe(date(2022, 11, 28), date(2022, 11, 28), self.today))
+        self.assertEqual([date(2022, 11, 28)], session_calendar.days_to_probe(date(2022, 11, 28), date(2022, 11, 28), date(2022, 12, 1)))
+
+    def test_record_vote_day_after_non_vote_day(self):
+        session_calendar = SessionCalendar()
+        session_calendar.record(date(2022, 11, 28), False, self.today)
+        session_calendar.record(date(2022, 11, 28), True, date(2022, 12, 1))
+        self.assertEqual([date(2022, 11, 28)], session_calendar.sitting_days(date(2022, 11, 1), date(2022, 11, 30)))
+
+
+class TestLoadSittingDays(unittest.TestCase):
+
+    def setUp(self):
+        self.working_directory = getcwd()
+        self.temporary_directory = TemporaryDirectory()
+        chdir(self.temporary_directory.name)
+        makedirs("xml")
+        for voting_day in [date(2022, 10, 18), date(2022, 10, 19)]:
+            open(f"xml/{voting_day}.xml", "w").close()
+
+    def tearDown(self):
+        chdir(self.working_directory)
+        self.temporary_directory.cleanup()
+
+    def test_load_sitting_days_offline(self):
+        sitting_days = load_sitting_days(date(2022, 10, 1), date(2022, 10, 31), logging.getLogger(), True)
+        self.assertEqual([date(2022, 10, 18), date(2022, 10, 19)], sitting_days)
+
+    def test_load_sitting_days_is_persisted(self):
+        load_sitting_days(date(2022, 10, 1), date(2022, 10, 31), logging.getLogger(), True)
+        open("xml/2022-10-20.xml", "w").close()
+        sitting_days = load_sitting_days(date(2022, 10, 18), date(2022, 10, 20), logging.getLogger(), True)
+        self.assertEqual([date(2022, 10, 18), date(2022, 10, 19), date(2022, 10, 20)], sitting_days)
+
+    def test_load_sitting_days_offline_does_not_probe_missing_days_again(self):
+        load_sitting_days(date(2022, 10, 1), date(2022, 10, 31), logging.getLogger(), True)
+        with patch.object(session_calendar, "exists", wraps=session_calendar.exists) as exists:
+            sitting_days = load_sitting_days(date(2022, 10, 1), date(2022, 10, 31), logging.getLogger(), True)
+        self.assertEqual([date(2022, 10, 18), date(2022, 10, 19)], sitting_days)
+        self.assertFalse([call for call in exists.call_args_list if call.args[0].startswith("xml/")])
+
+    def test_load_sitting_days_offline_rechecks_missing_days_when_folder_changes(self):
+        load_sitting_days(date(2022, 10, 1), date(2022, 10, 31), logging.getLogger(), True)
+        open("xml/2022-10-05.xml", "w").close()
+        # the folder mtime may not tick within the same test, so it is moved explicitly
+        utime("xml", (0, 0))
+        sitting_days = load_sitting_days(date(2022, 10, 1), date(2022, 10, 31), logging.getLogger(), True)
+        self.assertEqual([date(2022, 10, 5), date(2022, 10, 18), date(2022, 10, 19)], sitting_days)
@@ -0,0 +1,80 @@
+from datetime import date
+import unittest
+
+import numpy as np
+
+from const import VOTES
+from main import extract_national_vote_counter, extract_political_group_votes_counter
+from models import Ballot, EUPoliticalGroup, RollCallVote
+from vote_matrix import build_vote_matrix, majority_votes
+
+
+def create_roll_call_vote(id: str, ballots_by_vote: dict[str, list[Ballot]]) -> RollCallVote:
+    results = {vote: {} for vote in VOTES}
+    for vote, ballots in ballots_by_vote.items():
+        for ballot in ballots:
+            results[vote][ballot.political_group_id] = results[vote].get(ballot.political_group_id, ()) + (ballot,)
+    return RollCallVote(id, f"vote {id}", results)
+
+
+class TestVoteMatrix(unittest.TestCase):
+
+    epp = EUPoliticalGroup("Group of the European People's Party (Christian Democrats)", ["PPE", "EPP"])
+    socialists = EUPoliticalGroup("Group of the Progressive Alliance of Socialists and Democrats in the European Parliament", ["S&amp;D", "S&D"])
+    national_party_mep_ids = frozenset(["101", "102", "104"])
+    mep_id_pers_id_pairings = {"2": "102"}
+    roll_call_votes_by_day = {
+        date(2022, 10, 19): [
+            create_roll_call_vote("3", {
+                'Abstention': [Ballot("PPE", "101", "1", "Alpha"), Ballot("PPE", None, "2", "Beta")],
+                'For': [Ballot("S&D", "103", "3", "Gamma")],
+            }),
+        ],
+        date(2022, 10, 18): [
+            create_roll_call_vote("1", {
+                'For': [Ballot("PPE", "101", "1", "Alpha"), Ballot("S&D", "103", "3", "Gamma")],
+                'Against': [Ballot("PPE", None, "2", "Beta"), Ballot("PPE", None, "9", "Unknown")],
+            }),
+            create_roll_call_vote("2", {
+                'Against': [Ballot("S&D", "103", "3", "Gamma"), Ballot("S&D", "104", "4", "Delta")],
+            }),
+        ],
+    }
+
+    def setUp(self):
+        self.vote_matrix = build_vote_matrix(self.roll_call_votes_by_day, self.mep_id_pers_id_pairings)
+        self.roll_call_votes = [roll_call_vote for day in sorted(self.roll_call_votes_by_day) for roll_call_vote in self.roll_call_votes_by_day[day]]
+
+    def test_build_vote_matrix_rows_are_ordered_by_day(self):
+        self.assertEqual([date(2022, 10, 18), date(2022, 10, 18), date(2022, 10, 19)], self.vote_matrix.days)
+        self.assertEqual(slice(0, 2), self.vote_matrix.rows_by_day[date(2022, 10, 18)])
+
+    def test_party_tallies_match_extract_national_vote_counter(self):
+        for group_ids_of_party in [self.epp.ids, self.socialists.ids]:
+            cell_mask = self.vote_matrix.group_mask(group_ids_of_party) & self.vote_matrix.columns_of(self.national_party_mep_ids)
+            tallies = self.vote_matrix.tallies(cell_mask)
+            for row, roll_call_vote in enumerate(self.roll_call_votes):
+                expected = extract_national_vote_counter(roll_call_vote, group_ids_of_party, self.national_party_mep_ids, self.mep_id_pers_id_pairings)
+                self.assertEqual([expected[vote] for vote in VOTES], tallies[row].tolist())
+
+    def test_group_tallies_match_extract_political_group_votes_counter(self):
+        for political_group in [self.epp, self.socialists]:
+            tallies = self.vote_matrix.tallies(self.vote_matrix.group_mask(political_group.ids))
+            for row, roll_call_vote in enumerate(self.roll_call_votes):
+                expected = extract_political_group_votes_counter(roll_call_vote, political_group)
+                self.assertEqual([expected[vote] for vote in VOTES], tallies[row].tolist())
+
+    def test_group_tallies_count_every_group_at_once(self):
+        group_tallies = self.vote_matrix.group_tallies()
+        for political_group in [self.epp, self.socialists]:
+            group_indices = [self.vote_matrix.group_index[group_id] for group_id in political_group.ids if group_id in self.vote_matrix.group_index]
+            self.assertEqual(self.vote_matrix.tallies(self.vote_matrix.group_mask(political_group.ids)).tolist(), group_tallies[:, group_indices].sum(axis=1).tolist())
+
+    def test_build_vote_matrix_of_political_groups_keeps_every_vote(self):
+        vote_matrix = build_vote_matrix(self.roll_call_votes_by_day, self.mep_id_pers_id_pairings, political_group_ids=self.socialists.ids)
+        self.assertEqual(self.vote_matrix.days, vote_matrix.days)
+        self.assertEqual(["103", "104"], vote_matrix.mep_ids)
+        self.assertEqual([[1, 0, 0], [0, 2, 0], [1, 0, 0]], vote_matrix.tallies(vote_matrix.group_mask(self.socialists.ids)).tolist())
+
+    def test_majority_votes(self):
+        self.assertEqual([0, 1, -1], majority_votes(np.array([[2, 2, 0], [0, 1, 0], [0, 0, 0]])).tolist())
@@ -0,0 +1,73 @@
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+from os import chdir, getcwd
+from os.path import exists
+from tempfile import TemporaryDirectory
+from threading import Thread
+import unittest
+
+from loader.voting_data_loader import prefetch_voting_data
+
+
+class StubVotingDataHandler(BaseHTTPRequestHandler):
+    published_dates = {"2022-10-18", "2022-10-19"}
+    flaky_dates = {"2022-10-19"}
+    requested_paths = []
+
+    def do_GET(self):
+        self.requested_paths.append(self.path)
+        date_requested = self.path.strip("/").removesuffix(".xml")
+        if date_requested in self.flaky_dates and self.requested_paths.count(self.path) == 1:
+            self.send_response(503)
+            self.end_headers()
+        elif date_requested in self.published_dates:
+            content = f"<PV.RollCallVoteResults>{date_requested}</PV.RollCallVoteResults>".encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestPrefetchVotingData(unittest.TestCase):
+
+    def setUp(self):
+        StubVotingDataHandler.requested_paths = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubVotingDataHandler)
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url_template = f"http://127.0.0.1:{self.server.server_port}/{{date}}.xml"
+        self.working_directory = getcwd()
+        self.temporary_directory = TemporaryDirectory()
+        chdir(self.temporary_directory.name)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        chdir(self.working_directory)
+        self.temporary_directory.cleanup()
+
+    def prefetch(self, dates_to_fetch):
+        return prefetch_voting_data(dates_to_fetch, logging.getLogger(), concurrency=4, requests_per_second=100, backoff=0.01, url_template=self.url_template)
+
+    def test_prefetch_voting_data(self):
+        result = self.prefetch([date(2022, 10, 17), date(2022, 10, 18), date(2022, 10, 19)])
+        self.assertEqual({date(2022, 10, 17): None, date(2022, 10, 18): "xml/2022-10-18.xml", date(2022, 10, 19): "xml/2022-10-19.xml"}, result)
+        with open("xml/2022-10-18.xml") as voting_record_file:
+            self.assertEqual("<PV.RollCallVoteResults>2022-10-18</PV.RollCallVoteResults>", voting_record_file.read())
+        self.assertFalse(exists("xml/2022-10-17.xml"))
+
+    def test_prefetch_voting_data_retries_server_errors(self):
+        self.prefetch([date(2022, 10, 19)])
+        self.assertEqual(["/2022-10-19.xml", "/2022-10-19.xml"], StubVotingDataHandler.requested_paths)
+
+    def test_prefetch_voting_data_skips_downloaded_files(self):
+        self.prefetch([date(2022, 10, 18)])
+        self.prefetch([date(2022, 10, 18)])
+        self.assertEqual(["/2022-10-18.xml"], StubVotingDataHandler.requested_paths)
@@ -0,0 +1,199 @@
+from datetime import date
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from const import VOTES
+from identity_resolver import MepIdentityResolver
+from models import Ballot, EUPoliticalGroup, RollCallVote, VotingCohesionComparison
+
+ABSENT = 0
+VOTE_CODES = {vote: code for code, vote in enumerate(VOTES, start=1)}
+NO_GROUP = -1
+NO_MAJORITY = -1
+
+
+class VoteMatrix:
+    days: list[date]
+    descriptions: list[str]
+    mep_ids: list[str]
+    group_ids: list[str]
+    votes: np.ndarray
+    groups: np.ndarray
+    rows_by_day: dict[date, slice]
+
+    def __init__(self, days: list[date], descriptions: list[str], mep_ids: list[str], group_ids: list[str], votes: np.ndarray, groups: np.ndarray):
+        self.days = days
+        self.descriptions = descriptions
+        self.mep_ids = mep_ids
+        self.group_ids = group_ids
+        self.votes = votes
+        self.groups = groups
+        self.mep_index = {mep_id: column for column, mep_id in enumerate(mep_ids)}
+        self.group_index = {group_id: index for index, group_id in enumerate(group_ids)}
+        self.rows_by_day = {}
+        for row, day in enumerate(days):
+            first_row = self.rows_by_day[day].start if day in self.rows_by_day else row
+            self.rows_by_day[day] = slice(first_row, row + 1)
+
+    def columns_of(self, mep_ids: Iterable[str]) -> np.ndarray:
+        columns = np.zeros(len(self.mep_ids), dtype=bool)
+        columns[self.column_indices_of(mep_ids)] = True
+        return columns
+
+    def column_indices_of(self, mep_ids: Iterable[str]) -> np.ndarray:
+        return np.array(sorted(self.mep_index[mep_id] for mep_id in mep_ids if mep_id in self.mep_index), dtype=np.intp)
+
+    def group_mask(self, political_group_ids: Iterable[str], rows=slice(None), columns=slice(None)) -> np.ndarray:
+        group_indices = [self.group_index[group_id] for group_id in political_group_ids if group_id in self.group_index]
+        return np.isin(self.groups[rows, columns], group_indices)
+
+    def tallies(self, cell_mask: np.ndarray, rows=slice(None), columns=slice(None)) -> np.ndarray:
+        votes = self.votes[rows, columns]
+        return np.stack([((votes == code) & cell_mask).sum(axis=1) for code in VOTE_CODES.values()], axis=1)
+
+    def group_tallies(self) -> np.ndarray:
+        # one pass over the matrix counts every group at once, indexed by row, group and vote
+        voted = self.votes != ABSENT
+        rows = np.broadcast_to(np.arange(len(self.days))[:, np.newaxis], self.votes.shape)[voted]
+        cells = (rows * len(self.group_ids) + self.groups[voted]) * len(VOTE_CODES) + self.votes[voted] - 1
+        return np.bincount(cells, minlength=len(self.days) * len(self.group_ids) * len(VOTE_CODES)).reshape(len(self.days), len(self.group_ids), len(VOTE_CODES))
+
+
+def majority_votes(tallies: np.ndarray) -> np.ndarray:
+    # argmax picks the first maximum, in VOTES order, like select_max_voted does
+    majorities = tallies.argmax(axis=1)
+    majorities[tallies.max(axis=1) == 0] = NO_MAJORITY
+    return majorities
+
+
+def cohesions(tallies: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return tallies.max(axis=1) / tallies.sum(axis=1) * 100
+
+
+def _resolve_column_id(pers_id: Optional[str], mep_id: str, name: Optional[str], mep_id_pers_id_pairings: dict, identity_resolver: Optional[MepIdentityResolver], political_group_id: str, day: date) -> str:
+    resolved_id = pers_id or mep_id_pers_id_pairings.get(mep_id)
+    if not resolved_id and identity_resolver is not None:
+        resolved_id = identity_resolver.resolve(name, political_group_id, day)
+    # unresolved ballots still count for their group, but can never match a party member
+    return resolved_id if resolved_id else f"MepId:{mep_id}"
+
+
+def build_vote_matrix(roll_call_votes_by_day: dict[date, Iterable[RollCallVote]], mep_id_pers_id_pairings: dict, identity_resolver: Optional[MepIdentityResolver] = None, political_group_ids: Optional[Iterable[str]] = None) -> VoteMatrix:
+    days, descriptions, mep_ids, group_ids = [], [], [], []
+    mep_index, group_index = {}, {}
+    column_by_pers_id, column_by_mep_id = {}, {}
+    # ballots of groups nobody asked about are left out, the rows of every vote are kept
+    political_group_ids = set(political_group_ids) if political_group_ids is not None else None
+    blocks = []
+
+    def column_of(ballot: Ballot, day: date) -> int:
+        political_group_id, pers_id, mep_id, name = ballot
+        column = mep_index.setdefault(_resolve_column_id(pers_id, mep_id, name, mep_id_pers_id_pairings, identity_resolver, political_group_id, day), len(mep_index))
+        if pers_id is None:
+            column_by_mep_id[mep_id] = column
+        else:
+            column_by_pers_id[pers_id] = column
+        return column
+
+    for day in sorted(roll_call_votes_by_day):
+        first_row = len(days)
+        columns, segment_rows, segment_codes, segment_groups, segment_lengths = [], [], [], [], []
+        for row, roll_call_vote in enumerate(roll_call_votes_by_day[day]):
+            days.append(day)
+            descriptions.append(roll_call_vote.description)
+            for vote, code in VOTE_CODES.items():
+                for political_group_id, ballots in roll_call_vote.results[vote].items():
+                    if political_group_ids is not None and political_group_id not in political_group_ids:
+                        continue
+                    group_columns = [column_by_mep_id.get(mep_id) if pers_id is None else column_by_pers_id.get(pers_id) for _, pers_id, mep_id, _ in ballots]
+                    if None in group_columns:
+                        group_columns = [column if column is not None else column_of(ballot, day) for column, ballot in zip(group_columns, ballots)]
+                    columns.extend(group_columns)
+                    segment_rows.append(row)
+                    segment_codes.append(code)
+                    segment_groups.append(group_index.setdefault(political_group_id, len(group_index)))
+                    segment_lengths.append(len(ballots))
+        # a day is written with one scatter, the ballots of a group list share their row, vote and group
+        block_votes = np.full((len(days) - first_row, len(mep_index)), ABSENT, dtype=np.int8)
+        block_groups = np.full((len(days) - first_row, len(mep_index)), NO_GROUP, dtype=np.int8)
+        rows, columns = np.repeat(np.array(segment_rows, dtype=np.intp), segment_lengths), np.array(columns, dtype=np.intp)
+        block_votes[rows, columns] = np.repeat(segment_codes, segment_lengths)
+        block_groups[rows, columns] = np.repeat(segment_groups, segment_lengths)
+        blocks.append((block_votes, block_groups))
+    mep_ids.extend(mep_index)
+    group_ids.extend(group_index)
+    votes = np.full((len(days), len(mep_ids)), ABSENT, dtype=np.int8)
+    groups = np.full((len(days), len(mep_ids)), NO_GROUP, dtype=np.int8)
+    first_row = 0
+    for block_votes, block_groups in blocks:
+        block_rows, block_columns = block_votes.shape
+        votes[first_row:first_row + block_rows, :block_columns] = block_votes
+        groups[first_row:first_row + block_rows, :block_columns] = block_groups
+        first_row += block_rows
+    return VoteMatrix(days, descriptions, mep_ids, group_ids, votes, groups)
+
+
+def political_group_majorities_in(vote_matrix: VoteMatrix, eu_political_groups: Iterable[EUPoliticalGroup]) -> dict[str, np.ndarray]:
+    group_tallies = vote_matrix.group_tallies()
+    political_group_majorities = {}
+    for political_group in eu_political_groups:
+        group_indices = [vote_matrix.group_index[group_id] for group_id in political_group.ids if group_id in vote_matrix.group_index]
+        political_group_majorities[political_group.name] = majority_votes(group_tallies[:, group_indices].sum(axis=1))
+    return political_group_majorities
+
+
+def _runs_of_same_roster(vote_matrix: VoteMatrix, national_party_mep_ids_by_day: dict[date, frozenset[str]], group_ids_of_party_by_day: dict[date, list[str]]) -> Iterator[tuple[frozenset[str], list[str], list[date]]]:
+    # rosters change a few times a term, so consecutive sitting days are counted together
+    run_key, run_days = None, []
+    for day in vote_matrix.rows_by_day:
+        day_key = (national_party_mep_ids_by_day[day], tuple(group_ids_of_party_by_day[day]))
+        if day_key != run_key and run_days:
+            yield run_key[0], list(run_key[1]), run_days
+            run_days = []
+        run_key = day_key
+        run_days.append(day)
+    if run_days:
+        yield run_key[0], list(run_key[1]), run_days
+
+
+def compare_voting_cohesion_in_vote_matrix(
+        vote_matrix: VoteMatrix,
+        eu_political_groups: Iterable[EUPoliticalGroup],
+        national_party_mep_ids_by_day: dict[date, frozenset[str]],
+        group_ids_of_party_by_day: dict[date, list[str]],
+        political_group_majorities: Optional[dict[str, np.ndarray]] = None,
+) -> dict[date, VotingCohesionComparison]:
+    if political_group_majorities is None:
+        political_group_majorities = political_group_majorities_in(vote_matrix, eu_political_groups)
+    political_group_names = list(political_group_majorities)
+    group_majorities = np.stack([political_group_majorities[political_group_name] for political_group_name in political_group_names]) if political_group_names else np.empty((0, len(vote_matrix.days)), dtype=np.intp)
+    comparisons_by_day = {}
+    for national_party_mep_ids, group_ids_of_party, run_days in _runs_of_same_roster(vote_matrix, national_party_mep_ids_by_day, group_ids_of_party_by_day):
+        rows = slice(vote_matrix.rows_by_day[run_days[0]].start, vote_matrix.rows_by_day[run_days[-1]].stop)
+        # only the columns of the members are read, so a party costs in proportion to its size
+        columns = vote_matrix.column_indices_of(national_party_mep_ids)
+        party_tallies = vote_matrix.tallies(vote_matrix.group_mask(group_ids_of_party, rows, columns), rows, columns)
+        party_majorities = majority_votes(party_tallies)
+        voted = party_majorities != NO_MAJORITY
+        party_cohesions = cohesions(party_tallies)
+        run_group_majorities = group_majorities[:, rows]
+        compared = voted & (run_group_majorities != NO_MAJORITY)
+        same = compared & (run_group_majorities == party_majorities)
+        for day in run_days:
+            day_rows = slice(vote_matrix.rows_by_day[day].start - rows.start, vote_matrix.rows_by_day[day].stop - rows.start)
+            comparison = VotingCohesionComparison()
+            day_voted = voted[day_rows]
+            day_cohesions = party_cohesions[day_rows]
+            comparison.national_party_voting_cohesion_per_voting.extend(day_cohesions[day_voted].tolist())
+            for row in np.flatnonzero(day_voted & (day_cohesions < 100)):
+                comparison.non_coherent_votings.add(f'{day} - {vote_matrix.descriptions[rows.start + day_rows.start + row]}')
+            same_counts = same[:, day_rows].sum(axis=1).tolist()
+            compared_counts = compared[:, day_rows].sum(axis=1).tolist()
+            for political_group_name, same_count, compared_count in zip(political_group_names, same_counts, compared_counts):
+                comparison_counter = comparison.political_group_voting_comparisons[political_group_name]
+                comparison_counter['same'] += same_count
+                comparison_counter['different'] += compared_count - same_count
+            comparisons_by_day[day] = comparison
+    return comparisons_by_day